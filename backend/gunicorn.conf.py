@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+
+# Servidor de produção: master pré-fork + workers gthread (vários processos,
+# cada um com várias threads). Ajustável por variáveis de ambiente.
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+# Aplicação importada uma vez no master e compartilhada com os workers via fork
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+def when_ready(server):
+    # Banco inicializado uma única vez, no master, antes dos workers existirem
+    from src.main import inicializar_banco
+    from src.models.user import db
+    from src.services.instrumentacao import limpar_metricas
+    from src.wsgi import app
+
+    inicializar_banco(app)
+    limpar_metricas()
+    with app.app_context():
+        db.engine.dispose()
+
+def post_fork(server, worker):
+    # Cada worker abre suas próprias conexões e roda seu próprio worker de jobs
+    from src.models.user import db
+    from src.services.jobs import iniciar_worker
+    from src.wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+    iniciar_worker(app)
+
+def worker_exit(server, worker):
+    # Últimas requisições do worker entram no snapshot somado em /api/_metrics
+    from src.services.instrumentacao import gravar_metricas
+
+    gravar_metricas()
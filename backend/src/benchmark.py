@@ -0,0 +1,592 @@
+import argparse
+import http.client
+import io
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import signal
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import event
+
+from src.config import BASE_DIR, obter_config
+from src.gerar_dados import BANCO_BENCHMARK, pasta_contratos
+from src.main import create_app
+from src.models.user import db
+from src.services.jobs import reivindicar_proximo, executar_job
+
+# Benchmark de todas as rotas da API sobre um banco gerado por src/gerar_dados.py.
+#
+#   modo cliente:  Flask test client no próprio processo, sequencial; mede
+#                  latência, vazão, consultas SQL por requisição e RSS de pico.
+#   modo servidor: gunicorn local (gunicorn.conf.py) com vários workers,
+#                  requisições HTTP concorrentes com keep-alive; consultas lidas
+#                  do cabeçalho Server-Timing, RSS somado dos processos do servidor.
+#
+# O resultado vai para um JSON de baseline (uma entrada por modo). Em execuções
+# seguintes, cada rota é comparada com a baseline e o script termina com
+# exit 1 se p95 ou consultas pioraram além da tolerância.
+#
+#   python src/benchmark.py --modo cliente --gravar
+#   python src/benchmark.py --modo servidor --workers 4 --concorrencia 16
+
+BASELINE_PADRAO = os.path.join(BASE_DIR, 'database', 'benchmark_baseline.json')
+BACKEND_DIR = os.path.dirname(BASE_DIR)
+
+REQUISICOES_PADRAO = 50
+AQUECIMENTO = 3  # requisições descartadas por rota (só leitura)
+TOLERANCIA_PADRAO = 0.25  # 25% acima da baseline
+PIORA_MINIMA_MS = 2.0  # diferenças menores que isso são ruído
+TEMPO_SUBIDA_SERVIDOR = 30  # segundos
+TEMPO_JOBS = 300  # segundos de espera pelos jobs antes de jobs.download
+
+CONSULTAS_SERVER_TIMING = re.compile(r'db;[^,]*desc="(\d+) consultas"')
+
+CREDENCIAIS = {'usuario': 'eighmen', 'senha': 'Eighmen8'}
+
+def _pdf_minimo():
+    from reportlab.pdfgen import canvas
+    buffer = io.BytesIO()
+    pagina = canvas.Canvas(buffer)
+    pagina.drawString(100, 750, 'Contrato de benchmark')
+    pagina.save()
+    return buffer.getvalue()
+
+CSV_IMPORTACAO = '\n'.join(
+    ['data;valor;descricao'] + [f'2025-06-{dia:02d};-{dia}0,00;Benchmark {dia}' for dia in range(1, 29)]
+).encode('utf-8')
+
+def _corpo_usuario(indice):
+    nome = f'bench_{uuid.uuid4().hex[:12]}'
+    return {'username': nome, 'email': f'{nome}@exemplo.com'}
+
+# (nome, método, rota, corpo, coleta)
+# Na rota, {x} é um id existente sorteado de ids[x] e {novo_x} consome um id
+# criado por um caso anterior com coleta='x' (os DELETEs apagam o que os POSTs criaram).
+# corpo: dict (JSON), função(indice) -> dict, ou ('multipart', campos, (campo, nome, bytes)).
+CASOS = [
+    ('auth.login', 'POST', '/api/login', CREDENCIAIS, None),
+    ('auth.check', 'GET', '/api/check-auth', None, None),
+
+    ('lancamentos.listar', 'GET', '/api/lancamentos', None, None),
+    ('lancamentos.listar_campos', 'GET', '/api/lancamentos?fields=id,data,valor', None, None),
+    ('lancamentos.listar_periodo', 'GET', '/api/lancamentos?data_inicio=2025-01-01&data_fim=2025-03-31', None, None),
+    ('lancamentos.listar_ndjson', 'GET', '/api/lancamentos?stream=1&data_inicio=2025-12-01', None, None),
+    ('lancamentos.resumo_mes', 'GET', '/api/lancamentos/resumo?data_inicio=2025-01-01&data_fim=2025-12-31&group_by=mes', None, None),
+    ('lancamentos.resumo_total', 'GET', '/api/lancamentos/resumo', None, None),
+    ('lancamentos.export_csv', 'GET', '/api/lancamentos/export?data_inicio=2025-12-01', None, None),
+    ('lancamentos.criar', 'POST', '/api/lancamentos', {
+        'tipo': 'saida', 'valor': 42.5, 'data': '2025-06-15', 'categoria': 'Benchmark', 'descricao': 'benchmark'
+    }, 'lancamento'),
+    ('lancamentos.lote', 'POST', '/api/lancamentos/lote', {'criar': [
+        {'tipo': 'saida', 'valor': 10.0 + i, 'data': '2025-06-15', 'categoria': 'Benchmark', 'descricao': f'lote {i}'}
+        for i in range(20)
+    ]}, None),
+    ('lancamentos.excluir', 'DELETE', '/api/lancamentos/{novo_lancamento}', None, None),
+    ('lancamentos.importar', 'POST', '/api/lancamentos/importar',
+     ('multipart', {'categoria': 'Benchmark'}, ('arquivo', 'extrato.csv', CSV_IMPORTACAO)), None),
+
+    ('orcamentos.listar', 'GET', '/api/orcamentos', None, None),
+    ('orcamentos.listar_status', 'GET', '/api/orcamentos?status=aceito', None, None),
+    ('orcamentos.listar_texto', 'GET', '/api/orcamentos?texto=casamento', None, None),
+    ('orcamentos.listar_valor', 'GET', '/api/orcamentos?ordenar_por=valor_total', None, None),
+    ('orcamentos.obter', 'GET', '/api/orcamentos/{orcamento}', None, None),
+    ('orcamentos.pdf', 'GET', '/api/orcamentos/{orcamento}/pdf', None, None),
+    ('orcamentos.clientes', 'GET', '/api/orcamentos/clientes', None, None),
+    ('orcamentos.export_xlsx', 'GET', '/api/orcamentos/export?formato=xlsx&status=pendente&data_inicio=2025-10-01', None, None),
+    ('orcamentos.criar', 'POST', '/api/orcamentos', {
+        'titulo': 'Casamento benchmark', 'cliente': 'Cliente Benchmark', 'forma_pagamento': 'PIX',
+        'servicos': [{'nome': 'Fotografia', 'quantidade': 1, 'preco_unitario': 1500},
+                     {'nome': 'Drone', 'quantidade': 1, 'preco_unitario': 600}]
+    }, 'orcamento_novo'),
+    ('orcamentos.status', 'PUT', '/api/orcamentos/{orcamento_novo}/status', {'status': 'enviado'}, None),
+
+    ('contratos.listar', 'GET', '/api/contratos', None, None),
+    ('contratos.listar_campos', 'GET', '/api/contratos?fields=id,titulo,cliente,data_upload', None, None),
+    ('contratos.listar_cliente', 'GET', '/api/contratos?cliente=silva', None, None),
+    ('contratos.download', 'GET', '/api/contratos/{contrato}/download', None, None),
+    ('contratos.view', 'GET', '/api/contratos/{contrato}/view', None, None),
+    ('contratos.thumb', 'GET', '/api/contratos/{contrato}/thumb', None, None),
+    ('contratos.clientes', 'GET', '/api/contratos/clientes', None, None),
+    ('contratos.criar', 'POST', '/api/contratos', ('multipart', {
+        'titulo': 'Contrato benchmark', 'cliente': 'Cliente Benchmark', 'valor': '1000',
+        'data_inicio': '2025-06-01', 'data_fim': '2025-07-01'
+    }, ('arquivo', 'benchmark.pdf', _pdf_minimo())), None),
+
+    ('tarefas.listar', 'GET', '/api/tarefas', None, None),
+    ('tarefas.listar_tipo', 'GET', '/api/tarefas?tipo=edicao', None, None),
+    ('tarefas.listar_periodo', 'GET', '/api/tarefas?data_inicio=2025-11-01&data_fim=2025-11-30', None, None),
+    ('tarefas.calendario', 'GET', '/api/tarefas/calendario/2025/11', None, None),
+    ('tarefas.estatisticas', 'GET', '/api/tarefas/estatisticas?data_inicio=2025-01-01&data_fim=2025-12-31', None, None),
+    ('tarefas.export_csv', 'GET', '/api/tarefas/export?tipo=reuniao&data_inicio=2025-07-01', None, None),
+    ('tarefas.criar', 'POST', '/api/tarefas', {
+        'titulo': 'Tarefa benchmark', 'tipo': 'reuniao', 'data': '2025-11-20', 'horario': '15:00'
+    }, 'tarefa'),
+    ('tarefas.lote', 'POST', '/api/tarefas/lote', {'criar': [
+        {'titulo': f'Sessão semanal {semana}', 'tipo': 'captacao', 'data': f'2025-{mes:02d}-{dia:02d}', 'horario': '09:00'}
+        for semana, (mes, dia) in enumerate([(m, d) for m in range(9, 13) for d in (3, 10, 17, 24)])
+    ]}, None),
+    ('tarefas.concluir', 'PUT', '/api/tarefas/{tarefa}/concluir', {'concluida': True}, None),
+    ('tarefas.excluir', 'DELETE', '/api/tarefas/{novo_tarefa}', None, None),
+
+    ('busca.global', 'GET', '/api/busca?q=casamento', None, None),
+    ('dashboard.resumo', 'GET', '/api/dashboard?data_inicio=2025-01-01&data_fim=2025-12-31', None, None),
+
+    ('relatorios.lote', 'POST', '/api/relatorios/lote', {
+        'data_inicio': '2025-12-01', 'data_fim': '2025-12-31', 'incluir_extrato': False
+    }, 'job'),
+    ('jobs.obter', 'GET', '/api/jobs/{job}', None, None),
+    ('jobs.download', 'GET', '/api/jobs/{job}/download', None, None),
+
+    ('purga.simular', 'POST', '/api/purga/orcamentos', {'status': 'rejeitado', 'simular': True}, None),
+
+    ('users.listar', 'GET', '/api/users', None, None),
+    ('users.criar', 'POST', '/api/users', _corpo_usuario, 'usuario'),
+    ('users.obter', 'GET', '/api/users/{usuario}', None, None),
+    ('users.atualizar', 'PUT', '/api/users/{usuario}', _corpo_usuario, None),
+    ('users.excluir', 'DELETE', '/api/users/{novo_usuario}', None, None),
+
+    ('auth.logout', 'POST', '/api/logout', None, None)
+]
+
+# Chave na resposta de criação -> id coletado
+CHAVES_CRIACAO = ['lancamento', 'orcamento', 'tarefa', 'contrato', 'job', 'id']
+
+def _multipart(campos, arquivo):
+    fronteira = uuid.uuid4().hex
+    partes = []
+    for nome, valor in campos.items():
+        partes.append(f'--{fronteira}\r\nContent-Disposition: form-data; name="{nome}"\r\n\r\n{valor}\r\n'.encode('utf-8'))
+    campo, nome_arquivo, conteudo = arquivo
+    partes.append(
+        f'--{fronteira}\r\nContent-Disposition: form-data; name="{campo}"; filename="{nome_arquivo}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'.encode('utf-8') + conteudo + b'\r\n'
+    )
+    partes.append(f'--{fronteira}--\r\n'.encode('utf-8'))
+    return b''.join(partes), f'multipart/form-data; boundary={fronteira}'
+
+def _corpo(corpo, indice):
+    # Devolve (bytes, content-type) ou (None, None)
+    if corpo is None:
+        return None, None
+    if callable(corpo):
+        corpo = corpo(indice)
+    if isinstance(corpo, tuple):
+        _, campos, arquivo = corpo
+        return _multipart(campos, arquivo)
+    return json.dumps(corpo).encode('utf-8'), 'application/json'
+
+def _id_criado(dados):
+    for chave in CHAVES_CRIACAO:
+        valor = dados.get(chave)
+        if isinstance(valor, dict) and 'id' in valor:
+            return valor['id']
+        if chave == 'id' and isinstance(valor, int):
+            return valor
+    return None
+
+class ClienteFlask:
+    # Test client no próprio processo; conta as consultas SQL de cada requisição
+    def __init__(self, caminho_banco):
+        class ConfigBenchmark(obter_config()):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho_banco}'
+            LOG_DESEMPENHO = False
+
+        self.app = create_app(ConfigBenchmark)
+        self.cliente = self.app.test_client()
+        self.consultas = 0
+        with self.app.app_context():
+            self.engine = db.engine
+        event.listen(self.engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *args):
+        self.consultas += 1
+
+    def requisitar(self, metodo, rota, corpo, tipo):
+        self.consultas = 0
+        inicio = time.perf_counter()
+        resposta = self.cliente.open(rota, method=metodo, data=corpo, content_type=tipo)
+        dados = resposta.get_data()
+        resposta.close()
+        return resposta.status_code, dados, time.perf_counter() - inicio, self.consultas
+
+    def processar_jobs(self):
+        # Sem worker de jobs neste modo: os jobs enfileirados rodam aqui
+        with self.app.app_context():
+            while True:
+                job = reivindicar_proximo()
+                if job is None:
+                    return
+                executar_job(job)
+
+    def rss_pico_mb(self):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def encerrar(self):
+        event.remove(self.engine, 'before_cursor_execute', self._contar)
+
+class ClienteHttp:
+    # gunicorn local; uma conexão keep-alive por thread
+    def __init__(self, caminho_banco, workers):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.porta = sock.getsockname()[1]
+        ambiente = dict(
+            os.environ, DATABASE_URL=f'sqlite:///{caminho_banco}', PORT=str(self.porta),
+            WEB_CONCURRENCY=str(workers), FLASK_ENV=os.environ.get('FLASK_ENV', 'production'),
+            LOG_DESEMPENHO='0'
+        )
+        self.processo = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{self.porta}',
+             '--access-logfile', '/dev/null', 'src.wsgi:app'],
+            cwd=BACKEND_DIR, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.local = threading.local()
+        self.cookie = None
+        self._aguardar()
+
+    def processar_jobs(self):
+        # Os workers do gunicorn já rodam os jobs (gunicorn.conf.py)
+        pass
+
+    def _aguardar(self):
+        limite = time.monotonic() + TEMPO_SUBIDA_SERVIDOR
+        while time.monotonic() < limite:
+            if self.processo.poll() is not None:
+                raise RuntimeError('gunicorn terminou durante a inicialização')
+            try:
+                status, _, _, _ = self.requisitar('GET', '/api/check-auth', None, None)
+                if status < 500:
+                    return
+            except OSError:
+                self.local.conexao = None
+            time.sleep(0.2)
+        raise RuntimeError('gunicorn não respondeu a tempo')
+
+    def _enviar(self, metodo, rota, corpo, cabecalhos):
+        conexao = getattr(self.local, 'conexao', None)
+        reaproveitada = conexao is not None
+        if conexao is None:
+            conexao = self.local.conexao = http.client.HTTPConnection('127.0.0.1', self.porta, timeout=120)
+        inicio = time.perf_counter()
+        try:
+            conexao.request(metodo, rota, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        except (http.client.HTTPException, OSError):
+            conexao.close()
+            self.local.conexao = None
+            if reaproveitada:
+                # O servidor fecha conexões ociosas (keepalive); tenta de novo em uma nova
+                return self._enviar(metodo, rota, corpo, cabecalhos)
+            raise
+        return resposta, dados, time.perf_counter() - inicio
+
+    def requisitar(self, metodo, rota, corpo, tipo):
+        cabecalhos = {'Accept-Encoding': 'identity'}
+        if tipo:
+            cabecalhos['Content-Type'] = tipo
+        if self.cookie:
+            cabecalhos['Cookie'] = self.cookie
+
+        resposta, dados, duracao = self._enviar(metodo, rota, corpo, cabecalhos)
+        cookie = resposta.getheader('Set-Cookie')
+        if cookie and rota == '/api/login':
+            self.cookie = cookie.split(';', 1)[0]
+        # Consultas informadas pelo próprio servidor (services/instrumentacao.py)
+        consultas = CONSULTAS_SERVER_TIMING.search(resposta.getheader('Server-Timing') or '')
+        return resposta.status, dados, duracao, int(consultas.group(1)) if consultas else None
+
+    def _processos(self):
+        pids = [self.processo.pid]
+        for nome in os.listdir('/proc'):
+            if not nome.isdigit():
+                continue
+            try:
+                with open(f'/proc/{nome}/stat') as arquivo:
+                    pai = int(arquivo.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if pai == self.processo.pid:
+                pids.append(int(nome))
+        return pids
+
+    def rss_pico_mb(self):
+        # VmHWM: pico de memória residente de cada processo (Linux)
+        total = 0
+        for pid in self._processos():
+            try:
+                with open(f'/proc/{pid}/status') as arquivo:
+                    for linha in arquivo:
+                        if linha.startswith('VmHWM:'):
+                            total += int(linha.split()[1])
+            except OSError:
+                continue
+        return total / 1024 if total else None
+
+    def encerrar(self):
+        self.processo.send_signal(signal.SIGTERM)
+        try:
+            self.processo.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.processo.kill()
+
+def copiar_armazenamento(origem):
+    # Os PDFs do banco gerado, copiados para uma pasta temporária: uploads
+    # do benchmark não vão para o armazenamento real nem para o da geração.
+    # A variável vale para este processo e para o gunicorn iniciado depois
+    destino = tempfile.mkdtemp(suffix='_contratos')
+    if os.path.isdir(pasta_contratos(origem)):
+        shutil.copytree(pasta_contratos(origem), destino, dirs_exist_ok=True)
+    os.environ['ARMAZENAMENTO_CONTRATOS'] = destino
+    return destino
+
+def copiar_banco(origem):
+    # Cada execução parte de uma cópia idêntica do banco gerado: as rotas de
+    # escrita não alteram a origem nem os números da próxima execução
+    descritor, destino = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(origem))
+    os.close(descritor)
+    fonte, copia = sqlite3.connect(origem), sqlite3.connect(destino)
+    try:
+        fonte.backup(copia)
+    finally:
+        fonte.close()
+        copia.close()
+    return destino
+
+def remover_banco(caminho):
+    for sufixo in ('', '-wal', '-shm'):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+def carregar_ids(caminho_banco):
+    conexao = sqlite3.connect(caminho_banco)
+    try:
+        ids = {}
+        for chave, tabela in (('orcamento', 'orcamentos'), ('contrato', 'contratos'),
+                              ('tarefa', 'tarefas'), ('job', 'jobs'), ('usuario', 'user')):
+            ids[chave] = [linha[0] for linha in conexao.execute(f'SELECT id FROM {tabela} ORDER BY random() LIMIT 1000')]
+        contagens = {
+            tabela: conexao.execute(f'SELECT count(*) FROM {tabela}').fetchone()[0]
+            for tabela in ('lancamentos', 'orcamentos', 'servicos_orcamento', 'contratos', 'tarefas')
+        }
+        return ids, contagens
+    finally:
+        conexao.close()
+
+def preparar_downloads(cliente, ids):
+    # jobs.download deve medir o envio do ZIP, não o 409 de job em andamento:
+    # espera os jobs coletados terminarem e só sorteia os que têm resultado
+    cliente.processar_jobs()
+    limite = time.monotonic() + TEMPO_JOBS
+    prontos = []
+    for job_id in ids.get('job', []):
+        while True:
+            status, dados, _, _ = cliente.requisitar('GET', f'/api/jobs/{job_id}', None, None)
+            job = json.loads(dados)['job'] if status == 200 else None
+            if job is None or job['status'] in ('concluido', 'erro') or time.monotonic() > limite:
+                break
+            time.sleep(0.2)
+        if job is not None and job['disponivel']:
+            prontos.append(job_id)
+    ids['job'] = prontos
+
+# caso -> função(cliente, ids) chamada antes de medi-lo
+PREPAROS = {'jobs.download': preparar_downloads}
+
+def _rota(rota, ids, aleatorio):
+    for chave in list(ids):
+        novo = '{novo_' + chave + '}'
+        if novo in rota:
+            if not ids[chave]:
+                return None
+            rota = rota.replace(novo, str(ids[chave].pop()))
+        marcador = '{' + chave + '}'
+        if marcador in rota:
+            if not ids[chave]:
+                return None
+            rota = rota.replace(marcador, str(aleatorio.choice(ids[chave])))
+    return rota
+
+def _percentil(valores, p):
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+def medir_caso(cliente, caso, ids, aleatorio, requisicoes, concorrencia):
+    nome, metodo, rota, corpo, coleta = caso
+    escrita = metodo != 'GET'
+    lock = threading.Lock()
+    latencias, consultas, tamanhos, status = [], [], [], {}
+
+    def uma(indice):
+        with lock:
+            destino = _rota(rota, ids, aleatorio)
+        if destino is None:
+            return
+        dados, tipo = _corpo(corpo, indice)
+        codigo, conteudo, duracao, quantidade = cliente.requisitar(metodo, destino, dados, tipo)
+        with lock:
+            latencias.append(duracao * 1000)
+            tamanhos.append(len(conteudo))
+            status[str(codigo)] = status.get(str(codigo), 0) + 1
+            if quantidade is not None:
+                consultas.append(quantidade)
+            if coleta and codigo < 300:
+                criado = _id_criado(json.loads(conteudo))
+                if criado is not None:
+                    ids.setdefault(coleta, []).append(criado)
+
+    if not escrita:
+        for indice in range(AQUECIMENTO):
+            uma(indice)
+        latencias.clear(); consultas.clear(); tamanhos.clear(); status.clear()
+
+    inicio = time.perf_counter()
+    # Rotas com sessão (login/logout) rodam em sequência para não misturar cookies
+    if concorrencia > 1 and nome.split('.')[0] != 'auth':
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            list(executor.map(uma, range(requisicoes)))
+    else:
+        for indice in range(requisicoes):
+            uma(indice)
+    duracao = time.perf_counter() - inicio
+
+    if not latencias:
+        return {'status': {}, 'observacao': 'sem ids disponíveis'}
+    return {
+        'p50_ms': round(_percentil(latencias, 50), 2),
+        'p95_ms': round(_percentil(latencias, 95), 2),
+        'p99_ms': round(_percentil(latencias, 99), 2),
+        'rps': round(len(latencias) / duracao, 1),
+        'consultas': round(statistics.median(consultas), 1) if consultas else None,
+        'bytes': int(statistics.median(tamanhos)),
+        'status': status
+    }
+
+def comparar(atual, baseline, tolerancia):
+    # Devolve a lista de rotas que pioraram em relação à baseline
+    pioras = []
+    print(f"\n{'rota':34} {'p95 base':>9} {'p95 atual':>9} {'variação':>9}  consultas")
+    for nome, medida in atual['rotas'].items():
+        base = baseline['rotas'].get(nome)
+        if not base or 'p95_ms' not in base or 'p95_ms' not in medida:
+            continue
+        variacao = (medida['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0
+        motivos = []
+        if variacao > tolerancia and medida['p95_ms'] - base['p95_ms'] > PIORA_MINIMA_MS:
+            motivos.append('latência')
+        if medida.get('consultas') is not None and base.get('consultas') is not None \
+                and medida['consultas'] > base['consultas']:
+            motivos.append('consultas')
+        consultas = f"{base.get('consultas')} -> {medida.get('consultas')}" if medida.get('consultas') is not None else '-'
+        marca = '  ❌ ' + ', '.join(motivos) if motivos else ''
+        print(f"{nome:34} {base['p95_ms']:9.2f} {medida['p95_ms']:9.2f} {variacao:+9.0%}  {consultas}{marca}")
+        if motivos:
+            pioras.append(nome)
+    return pioras
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das rotas da API.')
+    parser.add_argument('--modo', choices=['cliente', 'servidor'], default='cliente')
+    parser.add_argument('--banco', default=BANCO_BENCHMARK, help='banco gerado por src/gerar_dados.py')
+    parser.add_argument('--requisicoes', type=int, default=REQUISICOES_PADRAO, help='por rota')
+    parser.add_argument('--concorrencia', type=int, default=8, help='só no modo servidor')
+    parser.add_argument('--workers', type=int, default=4, help='workers do gunicorn no modo servidor')
+    parser.add_argument('--rotas', help='filtra casos pelo prefixo do nome (ex.: orcamentos,tarefas)')
+    parser.add_argument('--baseline', default=BASELINE_PADRAO)
+    parser.add_argument('--gravar', action='store_true', help='grava o resultado como nova baseline')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    caminho = os.path.abspath(args.banco)
+    if not os.path.exists(caminho):
+        print(f'❌ {caminho} não existe; gere com python src/gerar_dados.py')
+        return 1
+
+    casos = CASOS
+    if args.rotas:
+        prefixos = tuple(prefixo.strip() for prefixo in args.rotas.split(','))
+        casos = [caso for caso in CASOS if caso[0].startswith(prefixos) or caso[0].startswith('auth.login')]
+
+    copia = copiar_banco(caminho)
+    armazenamento = copiar_armazenamento(caminho)
+    ids, contagens = carregar_ids(copia)
+    aleatorio = random.Random(args.semente)
+    concorrencia = args.concorrencia if args.modo == 'servidor' else 1
+    try:
+        cliente = ClienteFlask(copia) if args.modo == 'cliente' else ClienteHttp(copia, args.workers)
+    except Exception:
+        remover_banco(copia)
+        shutil.rmtree(armazenamento, ignore_errors=True)
+        raise
+
+    resultado = {
+        'modo': args.modo,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'contagens': contagens,
+        'requisicoes': args.requisicoes,
+        'concorrencia': concorrencia,
+        'workers': args.workers if args.modo == 'servidor' else None,
+        'rotas': {}
+    }
+
+    print(f"{'rota':34} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'consultas':>9}  status")
+    try:
+        for caso in casos:
+            if caso[0] in PREPAROS:
+                PREPAROS[caso[0]](cliente, ids)
+            medida = medir_caso(cliente, caso, ids, aleatorio, args.requisicoes, concorrencia)
+            resultado['rotas'][caso[0]] = medida
+            if 'p50_ms' not in medida:
+                print(f"{caso[0]:34} {medida['observacao']}")
+                continue
+            consultas = medida['consultas'] if medida['consultas'] is not None else '-'
+            print(f"{caso[0]:34} {medida['p50_ms']:8.2f} {medida['p95_ms']:8.2f} {medida['p99_ms']:8.2f} "
+                  f"{medida['rps']:8.1f} {consultas:>9}  {medida['status']}")
+        resultado['rss_pico_mb'] = cliente.rss_pico_mb()
+    finally:
+        cliente.encerrar()
+        remover_banco(copia)
+        shutil.rmtree(armazenamento, ignore_errors=True)
+
+    if resultado['rss_pico_mb'] is not None:
+        print(f"\nRSS de pico: {resultado['rss_pico_mb']:.1f} MB")
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as arquivo:
+            baselines = json.load(arquivo)
+
+    pioras = []
+    if args.modo in baselines:
+        pioras = comparar(resultado, baselines[args.modo], args.tolerancia)
+
+    if args.gravar:
+        baselines[args.modo] = resultado
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(baselines, arquivo, ensure_ascii=False, indent=2)
+        print(f'\nBaseline gravada em {args.baseline}')
+
+    if pioras:
+        print(f'\n❌ {len(pioras)} rota(s) pioraram em relação à baseline.')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
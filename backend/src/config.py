@@ -0,0 +1,86 @@
+import os
+
+BASE_DIR = os.path.dirname(__file__)
+
+def _env_int(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'orbisx_secret_key_2025')
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        'DATABASE_URL', f"sqlite:///{os.path.join(BASE_DIR, 'database', 'app.db')}"
+    )
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexões por processo (cada worker do gunicorn tem o seu)
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 5)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 5)
+    DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT', 30)
+
+    # Limite do corpo da requisição: PDF de até 16MB mais os campos do formulário
+    MAX_CONTENT_LENGTH = 17 * 1024 * 1024
+
+    # Entrega dos PDFs (ver services/entrega_arquivos.py): 'flask', 'x-accel'
+    # (nginx com location internal em X_ACCEL_PREFIXO apontando para
+    # src/uploads/contratos, ou para ARMAZENAMENTO_CONTRATOS se definida)
+    # ou 'x-sendfile' (Apache/lighttpd)
+    ENTREGA_ARQUIVOS = os.environ.get('ENTREGA_ARQUIVOS', 'flask')
+    X_ACCEL_PREFIXO = os.environ.get('X_ACCEL_PREFIXO', '/_arquivos/contratos')
+    USE_X_SENDFILE = ENTREGA_ARQUIVOS == 'x-sendfile'
+
+    # Respostas JSON menores que isso (bytes) não são comprimidas
+    COMPRESSAO_LIMIAR = _env_int('COMPRESSAO_LIMIAR', 1024)
+
+    # Instrumentação por requisição (ver services/instrumentacao.py): cabeçalho
+    # Server-Timing, log JSON por requisição e métricas em /api/_metrics.
+    # N_MAIS_1_LIMITE: execuções da mesma instrução numa requisição acima das
+    # quais é emitido um aviso de possível N+1. Com METRICAS_TOKEN definido,
+    # /api/_metrics exige "Authorization: Bearer <token>".
+    INSTRUMENTACAO = os.environ.get('INSTRUMENTACAO', '1') == '1'
+    LOG_DESEMPENHO = os.environ.get('LOG_DESEMPENHO', '1') == '1'
+    N_MAIS_1_LIMITE = _env_int('N_MAIS_1_LIMITE', 10)
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+
+    # Perfilador por amostragem sob demanda (ver services/perfilador.py).
+    # Desligado, não registra nenhum hook: custo zero por requisição
+    PERFILADOR = os.environ.get('PERFILADOR', '0') == '1'
+    PERFILADOR_INTERVALO_MS = _env_int('PERFILADOR_INTERVALO_MS', 5)
+
+    # Codificador JSON das respostas (ver services/json_rapido.py): 'orjson'
+    # (usado se o pacote estiver instalado) ou 'padrao' (json da biblioteca padrão)
+    JSON_CODIFICADOR = os.environ.get('JSON_CODIFICADOR', 'orjson')
+
+    # PRAGMAs aplicados em toda conexão SQLite nova (ver src/database.py).
+    # WAL deixa leitores rodarem em paralelo com o escritor; com WAL,
+    # synchronous=NORMAL continua seguro contra corrupção e evita um fsync por commit.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': -_env_int('SQLITE_CACHE_KB', 32000),  # negativo = KiB
+        'mmap_size': _env_int('SQLITE_MMAP_BYTES', 128 * 1024 * 1024),
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'foreign_keys': 'ON',
+        'temp_store': 'MEMORY'
+    }
+
+class DevelopmentConfig(Config):
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 2)
+
+class ProductionConfig(Config):
+    # Uma conexão por thread do worker, com folga para o dashboard e os jobs
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', _env_int('GUNICORN_THREADS', 4) + 2)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 4)
+    SQLITE_PRAGMAS = dict(
+        Config.SQLITE_PRAGMAS,
+        cache_size=-_env_int('SQLITE_CACHE_KB', 64000),
+        mmap_size=_env_int('SQLITE_MMAP_BYTES', 256 * 1024 * 1024)
+    )
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig
+}
+
+def obter_config(ambiente=None):
+    ambiente = ambiente or os.environ.get('FLASK_ENV', 'development')
+    return CONFIGS.get(ambiente, DevelopmentConfig)
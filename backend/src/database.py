@@ -0,0 +1,65 @@
+from sqlalchemy import event
+from src.models.user import db
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+def opcoes_engine(config):
+    # Dimensionamento do pool; bancos em memória usam pool próprio do SQLAlchemy
+    if ':memory:' in config['SQLALCHEMY_DATABASE_URI']:
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT']
+    }
+
+def aplicar_pragmas(conexao_dbapi, pragmas):
+    cursor = conexao_dbapi.cursor()
+    try:
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome} = {valor}')
+    finally:
+        cursor.close()
+
+def configurar_sqlite(app):
+    # Registra os PRAGMAs no evento "connect" do engine deste app
+    pragmas = app.config['SQLITE_PRAGMAS']
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return
+
+        @event.listens_for(engine, 'connect')
+        def ao_conectar(conexao_dbapi, registro):
+            aplicar_pragmas(conexao_dbapi, pragmas)
+
+def _adicionar_colunas(conexao, tabela):
+    # SQLite só permite ADD COLUMN; colunas novas precisam ser anuláveis
+    existentes = {linha[1] for linha in conexao.exec_driver_sql(f'PRAGMA table_info({tabela.name})')}
+    for coluna in tabela.columns:
+        if existentes and coluna.name not in existentes:
+            tipo = coluna.type.compile(dialect=conexao.dialect)
+            conexao.exec_driver_sql(f'ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}')
+
+def migrar_esquema():
+    # create_all só cria tabelas novas; colunas e índices declarados depois em
+    # tabelas já existentes (app.db de instalações antigas) são criados aqui
+    with db.engine.begin() as conexao:
+        for tabela in db.metadata.sorted_tables:
+            _adicionar_colunas(conexao, tabela)
+            for indice in tabela.indexes:
+                indice.create(bind=conexao, checkfirst=True)
+        # Atualiza as estatísticas do planejador quando necessário
+        conexao.exec_driver_sql('PRAGMA optimize')
+    _ativar_auto_vacuum()
+
+def _ativar_auto_vacuum():
+    # auto_vacuum=INCREMENTAL (a purga usa incremental_vacuum) só passa a
+    # valer depois de um VACUUM completo. Feito uma única vez, aqui na
+    # implantação e antes dos workers, e não dentro de um job; VACUUM não
+    # roda em transação, daí a conexão em autocommit
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        if conexao.exec_driver_sql('PRAGMA auto_vacuum').scalar() != AUTO_VACUUM_INCREMENTAL:
+            conexao.exec_driver_sql(f'PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}')
+            conexao.exec_driver_sql('VACUUM')
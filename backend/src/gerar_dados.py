@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import io
+import os
+import random
+import shutil
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from datetime import date, datetime, timedelta, time as horario
+from reportlab.pdfgen import canvas
+
+from src.config import BASE_DIR, obter_config
+from src.main import create_app, inicializar_banco
+from src.models.user import db
+from src.models.lancamento import Lancamento
+from src.models.orcamento import Orcamento, ServicoOrcamento
+from src.models.contrato import Contrato, ArquivoContrato
+from src.models.tarefa import Tarefa
+from src.services.armazenamento import caminho_arquivo
+from src.services.busca import INDICES, garantir_indice_busca
+from src.services.processamento_contratos import processar_pdf
+from src.services.rollup_lancamentos import reconstruir_rollup
+
+# Gera um banco com volumes realistas para benchmarks (ver src/benchmark.py).
+# A mesma semente sempre produz os mesmos dados. Por padrão grava em
+# src/database/benchmark.db, nunca no app.db, a menos que --banco diga o contrário.
+# Os PDFs dos contratos vão para uma pasta ao lado do banco (benchmark_contratos/),
+# não para o armazenamento real em src/uploads/contratos.
+#
+#   python src/gerar_dados.py --escala 100k
+#   python src/gerar_dados.py --escala 1m --semente 7 --substituir
+
+BANCO_BENCHMARK = os.path.join(BASE_DIR, 'database', 'benchmark.db')
+
+def pasta_contratos(caminho_banco):
+    # Armazenamento dos PDFs que acompanha o banco gerado
+    return os.path.splitext(caminho_banco)[0] + '_contratos'
+
+# escala -> quantidade de lançamentos; as outras tabelas são proporcionais
+ESCALAS = {'10k': 10000, '100k': 100000, '1m': 1000000}
+PROPORCOES = {'orcamentos': 4, 'tarefas': 2, 'contratos': 20}  # 1 a cada N lançamentos
+
+TAMANHO_LOTE_GERACAO = 5000
+PDFS_DISTINTOS = 16  # contratos compartilham poucos arquivos, como no armazenamento por hash
+DATA_REFERENCIA = date(2025, 12, 31)  # fixa para os dados não dependerem do dia da geração
+DIAS_HISTORICO = 3 * 365
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+         'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Tiago', 'Vitória']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira',
+              'Almeida', 'Ribeiro', 'Carvalho', 'Gomes', 'Martins', 'Rocha', 'Barbosa']
+EVENTOS = ['Casamento', 'Aniversário', 'Ensaio gestante', 'Formatura', 'Batizado', 'Evento corporativo',
+           'Ensaio de família', 'Chá revelação', 'Book profissional', 'Festa de 15 anos']
+SERVICOS = [('Fotografia', 800, 4000), ('Filmagem', 1200, 6000), ('Álbum impresso', 300, 1500),
+            ('Drone', 400, 1200), ('Edição de vídeo', 500, 2500), ('Ensaio pré-evento', 350, 900),
+            ('Transmissão ao vivo', 600, 2000), ('Segundo fotógrafo', 400, 1000)]
+CATEGORIAS = {
+    'entrada': ['Ensaio', 'Casamento', 'Evento', 'Álbum', 'Sinal', 'Pacote'],
+    'saida': ['Equipamento', 'Transporte', 'Aluguel', 'Impressão', 'Software', 'Marketing', 'Impostos']
+}
+FORMAS_PAGAMENTO = ['À vista', 'PIX', 'Cartão de crédito', '50% entrada + 50% na entrega', 'Boleto']
+STATUS = ['pendente', 'enviado', 'aceito', 'rejeitado']
+TIPOS_TAREFA = ['captacao', 'edicao', 'reuniao']
+LOCAIS = ['Estúdio', 'Igreja Matriz', 'Espaço Jardim', 'Salão Villa', 'Praia', 'Parque Municipal', 'Online']
+
+def _cliente(aleatorio):
+    return f'{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}'
+
+def _data(aleatorio):
+    return DATA_REFERENCIA - timedelta(days=aleatorio.randrange(DIAS_HISTORICO))
+
+def _momento(aleatorio):
+    return datetime.combine(_data(aleatorio), horario(aleatorio.randrange(8, 20), aleatorio.randrange(60)))
+
+def _inserir(modelo, linhas):
+    db.session.execute(modelo.__table__.insert(), linhas)
+    db.session.commit()
+
+def _em_lotes(total, gerar_linha, modelo, rotulo):
+    inicio = time.monotonic()
+    lote = []
+    for indice in range(total):
+        lote.append(gerar_linha(indice))
+        if len(lote) >= TAMANHO_LOTE_GERACAO:
+            _inserir(modelo, lote)
+            lote = []
+    if lote:
+        _inserir(modelo, lote)
+    print(f'  {rotulo}: {total} em {time.monotonic() - inicio:.1f}s')
+
+def gerar_lancamentos(aleatorio, total):
+    def linha(_):
+        tipo = 'entrada' if aleatorio.random() < 0.55 else 'saida'
+        return {
+            'tipo': tipo,
+            'valor': round(aleatorio.lognormvariate(6, 1), 2),
+            'data': _data(aleatorio),
+            'categoria': aleatorio.choice(CATEGORIAS[tipo]),
+            'descricao': f'{aleatorio.choice(EVENTOS)} - {_cliente(aleatorio)}' if aleatorio.random() < 0.7 else None,
+            'data_criacao': _momento(aleatorio)
+        }
+    _em_lotes(total, linha, Lancamento, 'lançamentos')
+
+def gerar_orcamentos(aleatorio, total):
+    def linha(indice):
+        criacao = _momento(aleatorio)
+        cliente = _cliente(aleatorio)
+        return {
+            'id': indice + 1,
+            'titulo': f'{aleatorio.choice(EVENTOS)} {cliente.split()[0]}',
+            'cliente': cliente,
+            'descricao': 'Cobertura completa do evento' if aleatorio.random() < 0.5 else None,
+            'forma_pagamento': aleatorio.choice(FORMAS_PAGAMENTO),
+            'prazo_entrega': (criacao + timedelta(days=aleatorio.randrange(15, 90))).date(),
+            'status': aleatorio.choice(STATUS),
+            'data_criacao': criacao
+        }
+    _em_lotes(total, linha, Orcamento, 'orçamentos')
+
+    # 1 a 5 serviços por orçamento (média 3)
+    servicos = []
+    inicio = time.monotonic()
+    quantidade = 0
+    for orcamento_id in range(1, total + 1):
+        for nome, minimo, maximo in aleatorio.sample(SERVICOS, aleatorio.randint(1, 5)):
+            servicos.append({
+                'orcamento_id': orcamento_id, 'nome': nome,
+                'quantidade': aleatorio.choice([1, 1, 1, 2]),
+                'preco_unitario': float(aleatorio.randrange(minimo, maximo, 50))
+            })
+        if len(servicos) >= TAMANHO_LOTE_GERACAO:
+            quantidade += len(servicos)
+            _inserir(ServicoOrcamento, servicos)
+            servicos = []
+    if servicos:
+        quantidade += len(servicos)
+        _inserir(ServicoOrcamento, servicos)
+    print(f'  serviços de orçamento: {quantidade} em {time.monotonic() - inicio:.1f}s')
+
+def _pdf_ficticio(numero):
+    buffer = io.BytesIO()
+    pagina = canvas.Canvas(buffer)
+    pagina.setTitle(f'Contrato modelo {numero}')
+    texto = pagina.beginText(60, 780)
+    texto.textLine(f'CONTRATO DE PRESTAÇÃO DE SERVIÇOS FOTOGRÁFICOS - MODELO {numero}')
+    for clausula in range(1, 25):
+        texto.textLine(f'Cláusula {clausula}. O contratado se compromete a entregar o material no prazo acordado.')
+    pagina.drawText(texto)
+    pagina.save()
+    return buffer.getvalue()
+
+def gerar_arquivos_contrato():
+    # Grava os PDFs no armazenamento por hash e gera texto e miniatura de cada um
+    arquivos = []
+    for numero in range(1, PDFS_DISTINTOS + 1):
+        conteudo = _pdf_ficticio(numero)
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        destino = caminho_arquivo(sha256)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        arquivos.append((sha256, destino, len(conteudo), processar_pdf(destino, sha256)))
+    return arquivos
+
+def gerar_contratos(aleatorio, total):
+    arquivos = gerar_arquivos_contrato()
+    referencias = {sha256: 0 for sha256, _, _, _ in arquivos}
+
+    def linha(_):
+        sha256, destino, _, texto = aleatorio.choice(arquivos)
+        referencias[sha256] += 1
+        inicio = _data(aleatorio)
+        cliente = _cliente(aleatorio)
+        return {
+            'titulo': f'Contrato {aleatorio.choice(EVENTOS)}',
+            'cliente': cliente,
+            'valor': float(aleatorio.randrange(800, 15000, 50)),
+            'data_inicio': inicio,
+            'data_fim': inicio + timedelta(days=aleatorio.randrange(1, 365)),
+            'observacoes': 'Assinado digitalmente' if aleatorio.random() < 0.3 else None,
+            'nome_arquivo': f"contrato_{cliente.replace(' ', '_').lower()}.pdf",
+            'caminho_arquivo': destino,
+            'hash_arquivo': sha256,
+            'texto_extraido': texto,
+            'data_upload': datetime.combine(inicio, horario(12))
+        }
+    _em_lotes(total, linha, Contrato, 'contratos')
+
+    _inserir(ArquivoContrato, [
+        {'hash': sha256, 'tamanho': tamanho, 'referencias': referencias[sha256]}
+        for sha256, _, tamanho, _ in arquivos if referencias[sha256]
+    ])
+
+def gerar_tarefas(aleatorio, total):
+    def linha(_):
+        data = _data(aleatorio)
+        return {
+            'titulo': f'{aleatorio.choice(EVENTOS)} - {aleatorio.choice(NOMES)}',
+            'tipo': aleatorio.choice(TIPOS_TAREFA),
+            'data': data,
+            'horario': horario(aleatorio.randrange(8, 21), aleatorio.choice([0, 30])) if aleatorio.random() < 0.9 else None,
+            'cliente': _cliente(aleatorio) if aleatorio.random() < 0.8 else None,
+            'local': aleatorio.choice(LOCAIS),
+            'descricao': None,
+            'concluida': data < DATA_REFERENCIA - timedelta(days=30) or aleatorio.random() < 0.2,
+            'data_criacao': datetime.combine(data - timedelta(days=aleatorio.randrange(1, 60)), horario(9))
+        }
+    _em_lotes(total, linha, Tarefa, 'tarefas')
+
+def remover_indices_busca():
+    # Os triggers de FTS atualizariam o índice linha a linha; é mais rápido
+    # gerar tudo sem eles e reconstruir o índice inteiro no fim
+    with db.engine.begin() as conexao:
+        for tabela, indice in INDICES.items():
+            for nome in indice['triggers']:
+                conexao.exec_driver_sql(f'DROP TRIGGER IF EXISTS {nome}')
+            conexao.exec_driver_sql(f'DROP TABLE IF EXISTS {tabela}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos para benchmarks.')
+    parser.add_argument('--escala', choices=ESCALAS, default='10k')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--banco', default=BANCO_BENCHMARK, help='arquivo SQLite de destino')
+    parser.add_argument('--substituir', action='store_true', help='apaga o banco de destino se existir')
+    args = parser.parse_args()
+
+    caminho = os.path.abspath(args.banco)
+    if os.path.exists(caminho):
+        if not args.substituir:
+            print(f'❌ {caminho} já existe (use --substituir)')
+            return 1
+        for sufixo in ('', '-wal', '-shm'):
+            if os.path.exists(caminho + sufixo):
+                os.remove(caminho + sufixo)
+        shutil.rmtree(pasta_contratos(caminho), ignore_errors=True)
+
+    # caminho_arquivo() passa a apontar para a pasta do banco gerado
+    os.environ['ARMAZENAMENTO_CONTRATOS'] = pasta_contratos(caminho)
+
+    class ConfigGeracao(obter_config()):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+
+    app = create_app(ConfigGeracao)
+    inicializar_banco(app)
+    aleatorio = random.Random(args.semente)
+    total = ESCALAS[args.escala]
+
+    print(f'Gerando escala {args.escala} (semente {args.semente}) em {caminho}')
+    inicio = time.monotonic()
+    with app.app_context():
+        remover_indices_busca()
+        gerar_lancamentos(aleatorio, total)
+        gerar_orcamentos(aleatorio, total // PROPORCOES['orcamentos'])
+        gerar_contratos(aleatorio, total // PROPORCOES['contratos'])
+        gerar_tarefas(aleatorio, total // PROPORCOES['tarefas'])
+
+        print(f'  rollup diário: {reconstruir_rollup()} linhas')
+        garantir_indice_busca()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+
+    print(f'✅ Banco gerado em {time.monotonic() - inicio:.1f}s')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,19 +1,16 @@
 import os
-import sqlite3
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-# Caminho para o banco de dados
-db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+from src.main import create_app
+from src.services.purga import validar_filtros, purgar
 
-# Conectar ao banco
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
-# Apagar contratos
-try:
-    cursor.execute("DELETE FROM contratos;")
-    conn.commit()
-    print("✅ Contratos apagados com sucesso.")
-except Exception as e:
-    print("❌ Erro ao apagar dados:", e)
-finally:
-    conn.close()
+# Apaga todos os contratos e os PDFs que ficarem sem referência, em lotes
+# (ver src/purgar.py para filtros)
+app = create_app()
+with app.app_context():
+    try:
+        resultado = purgar('contratos', validar_filtros('contratos', {'todos': True}))
+        print(f"✅ {resultado['removidos']} contrato(s) e {resultado['arquivos_removidos']} arquivo(s) apagados com sucesso.")
+    except Exception as e:
+        print("❌ Erro ao apagar dados:", e)
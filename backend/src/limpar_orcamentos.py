@@ -1,20 +1,15 @@
 import os
-import sqlite3
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-# Caminho para o banco de dados
-db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+from src.main import create_app
+from src.services.purga import validar_filtros, purgar
 
-# Conectar ao banco
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
-# Apagar dados relacionados a orçamentos
-try:
-    cursor.execute("DELETE FROM servicos_orcamento;")
-    cursor.execute("DELETE FROM orcamentos;")
-    conn.commit()
-    print("✅ Orçamentos e serviços de orçamentos apagados com sucesso.")
-except Exception as e:
-    print("❌ Erro ao apagar dados:", e)
-finally:
-    conn.close()
+# Apaga todos os orçamentos e seus serviços, em lotes (ver src/purgar.py para filtros)
+app = create_app()
+with app.app_context():
+    try:
+        resultado = purgar('orcamentos', validar_filtros('orcamentos', {'todos': True}))
+        print(f"✅ {resultado['removidos']} orçamento(s) e seus serviços apagados com sucesso.")
+    except Exception as e:
+        print("❌ Erro ao apagar dados:", e)
@@ -3,15 +3,20 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, current_app, send_from_directory
 from flask_cors import CORS
 
+from src.config import obter_config
+from src.database import configurar_sqlite, opcoes_engine, migrar_esquema
+
 # Importar modelos
 from src.models.user import db
-from src.models.lancamento import Lancamento
+from src.models.lancamento import Lancamento, LancamentoRollupDiario
 from src.models.orcamento import Orcamento, ServicoOrcamento
 from src.models.contrato import Contrato
 from src.models.tarefa import Tarefa
+from src.models.job import Job
+from src.models.versao import VersaoTabela
 
 # Importar rotas
 from src.routes.user import user_bp
@@ -20,46 +25,114 @@ from src.routes.lancamentos import lancamentos_bp
 from src.routes.orcamentos import orcamentos_bp
 from src.routes.contratos import contratos_bp
 from src.routes.tarefas import tarefas_bp
+from src.routes.busca import busca_bp
+from src.routes.relatorios import relatorios_bp
+from src.routes.dashboard import dashboard_bp
+from src.routes.purga import purga_bp
+from src.routes.metricas import metricas_bp
+from src.routes.perfilador import perfilador_bp
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Configurações
-app.config['SECRET_KEY'] = 'orbisx_secret_key_2025'
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Configurar CORS para permitir requisições do frontend
-CORS(app, supports_credentials=True)
-
-# Registrar blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(lancamentos_bp, url_prefix='/api')
-app.register_blueprint(orcamentos_bp, url_prefix='/api')
-app.register_blueprint(contratos_bp, url_prefix='/api')
-app.register_blueprint(tarefas_bp, url_prefix='/api')
-
-# Inicializar banco de dados
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+from src.services.rollup_lancamentos import garantir_rollup
+from src.services.busca import garantir_indice_busca
+from src.services.pdf import registrar_recursos
+from src.services.jobs import iniciar_worker
+from src.services.versoes import garantir_versoes
+from src.services.json_rapido import registrar_json
+from src.services.instrumentacao import registrar_instrumentacao
+from src.services.perfilador import registrar_perfilador
+from src.services.etag import registrar_etag
+from src.services.armazenamento import RequisicaoUpload
+from src.services.compressao import PASTA_ASSETS, registrar_compressao, precomprimir_assets, enviar_asset
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
+    static_folder_path = current_app.static_folder
     if static_folder_path is None:
         return "Static folder not configured", 404
 
     if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+        if path.startswith(PASTA_ASSETS + '/'):
+            return enviar_asset(static_folder_path, path)
         return send_from_directory(static_folder_path, path)
     else:
         index_path = os.path.join(static_folder_path, 'index.html')
         if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+            # index.html aponta para os assets com hash: sempre revalidar
+            resposta = send_from_directory(static_folder_path, 'index.html')
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
         else:
             return "index.html not found", 404
 
+def create_app(config=None):
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    # Upload de contratos gravado direto no armazenamento, com hash calculado
+    # durante a leitura (só nas rotas de ENDPOINTS_ARMAZENAMENTO)
+    app.request_class = RequisicaoUpload
+
+    # Configurações por ambiente (FLASK_ENV), ver src/config.py
+    app.config.from_object(config or obter_config())
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes_engine(app.config)
+
+    # Configurar CORS para permitir requisições do frontend
+    CORS(app, supports_credentials=True)
+
+    # Registrar blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(lancamentos_bp, url_prefix='/api')
+    app.register_blueprint(orcamentos_bp, url_prefix='/api')
+    app.register_blueprint(contratos_bp, url_prefix='/api')
+    app.register_blueprint(tarefas_bp, url_prefix='/api')
+    app.register_blueprint(busca_bp, url_prefix='/api')
+    app.register_blueprint(relatorios_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(purga_bp, url_prefix='/api')
+    app.register_blueprint(metricas_bp, url_prefix='/api')
+    app.register_blueprint(perfilador_bp, url_prefix='/api')
+
+    # Frontend (build do React)
+    app.add_url_rule('/', defaults={'path': ''}, view_func=serve)
+    app.add_url_rule('/<path:path>', view_func=serve)
+
+    db.init_app(app)
+    configurar_sqlite(app)
+
+    # Codificador JSON (orjson quando disponível); a instrumentação o substitui
+    # por uma subclasse que mede o tempo de serialização
+    registrar_json(app)
+
+    # Server-Timing, log de desempenho e métricas (antes dos outros hooks)
+    registrar_instrumentacao(app)
+
+    # Perfilador sob demanda (PERFILADOR=1)
+    registrar_perfilador(app)
+
+    # ETag / 304 para GETs da API a partir das versões das tabelas
+    registrar_etag(app)
+
+    # Compressão gzip/brotli das respostas JSON e dos assets do frontend
+    registrar_compressao(app)
+    precomprimir_assets(app.static_folder)
+
+    # Fontes e logo dos PDFs carregados uma única vez por processo
+    registrar_recursos(app.static_folder)
+
+    return app
+
+def inicializar_banco(app):
+    # Criação de tabelas, rollup e índices de busca: executar uma vez por
+    # implantação (no master do servidor), não em cada worker
+    with app.app_context():
+        db.create_all()
+        migrar_esquema()
+        garantir_rollup()
+        garantir_indice_busca()
+        garantir_versoes()
+
 if __name__ == '__main__':
+    # Servidor de desenvolvimento; em produção use gunicorn (ver gunicorn.conf.py)
+    app = create_app()
+    inicializar_banco(app)
+    iniciar_worker(app)
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -3,6 +3,12 @@ from datetime import datetime
 
 class Contrato(db.Model):
     __tablename__ = 'contratos'
+    __table_args__ = (
+        db.Index('ix_contratos_data_upload_id', 'data_upload', 'id'),
+        db.Index('ix_contratos_data_fim', 'data_fim'),
+        db.Index('ix_contratos_cliente', 'cliente'),
+        db.Index('ix_contratos_hash_arquivo', 'hash_arquivo'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
@@ -13,6 +19,10 @@ class Contrato(db.Model):
     observacoes = db.Column(db.Text, nullable=True)
     nome_arquivo = db.Column(db.String(255), nullable=True)
     caminho_arquivo = db.Column(db.String(500), nullable=True)
+    hash_arquivo = db.Column(db.String(64), nullable=True)  # SHA-256 do PDF (ver services/armazenamento.py)
+    # Preenchido pelo job processar_contrato (até LIMITE_TEXTO caracteres). Adiado:
+    # só é lido quando acessado, não nas listagens
+    texto_extraido = db.deferred(db.Column(db.Text, nullable=True))
     data_upload = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -28,6 +38,19 @@ class Contrato(db.Model):
             'data_fim': self.data_fim.isoformat() if self.data_fim else None,
             'observacoes': self.observacoes,
             'nome_arquivo': self.nome_arquivo,
+            'hash_arquivo': self.hash_arquivo,
             'data_upload': self.data_upload.isoformat() if self.data_upload else None
         }
 
+
+class ArquivoContrato(db.Model):
+    __tablename__ = 'arquivos_contrato'
+    
+    # Um registro por PDF armazenado; referencias = contratos que apontam para ele
+    hash = db.Column(db.String(64), primary_key=True)
+    tamanho = db.Column(db.Integer, nullable=False)
+    referencias = db.Column(db.Integer, nullable=False, default=0)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ArquivoContrato {self.hash} ({self.referencias})>'
@@ -0,0 +1,44 @@
+from src.models.user import db
+from datetime import datetime
+import json
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status_id', 'status', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, executando, concluido, erro
+    parametros = db.Column(db.Text, nullable=True)  # JSON
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processados = db.Column(db.Integer, nullable=False, default=0)
+    resultado = db.Column(db.String(500), nullable=True)  # caminho do arquivo gerado
+    erro = db.Column(db.Text, nullable=True)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_inicio = db.Column(db.DateTime, nullable=True)
+    data_fim = db.Column(db.DateTime, nullable=True)
+    heartbeat = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.tipo} - {self.status}>'
+    
+    def obter_parametros(self):
+        return json.loads(self.parametros) if self.parametros else {}
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'parametros': self.obter_parametros(),
+            'total': self.total,
+            'processados': self.processados,
+            'progresso': round(self.processados / self.total * 100, 1) if self.total else 0,
+            'erro': self.erro,
+            'disponivel': self.status == 'concluido' and self.resultado is not None,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
+            'data_fim': self.data_fim.isoformat() if self.data_fim else None
+        }
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class Lancamento(db.Model):
     __tablename__ = 'lancamentos'
+    __table_args__ = (
+        db.Index('ix_lancamentos_data_id', 'data', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     tipo = db.Column(db.String(20), nullable=False)  # 'entrada' ou 'saida'
@@ -26,3 +29,16 @@ class Lancamento(db.Model):
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None
         }
 
+
+class LancamentoRollupDiario(db.Model):
+    __tablename__ = 'lancamentos_rollup_diario'
+    
+    # Totais diários pré-agregados por (data, categoria, tipo)
+    data = db.Column(db.Date, primary_key=True)
+    categoria = db.Column(db.String(100), primary_key=True)
+    tipo = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Float, nullable=False, default=0)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<LancamentoRollupDiario {self.data} {self.categoria} {self.tipo}: R$ {self.total}>'
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Orcamento(db.Model):
     __tablename__ = 'orcamentos'
+    __table_args__ = (
+        db.Index('ix_orcamentos_data_criacao_id', 'data_criacao', 'id'),
+        db.Index('ix_orcamentos_status_data_criacao_id', 'status', 'data_criacao', 'id'),
+        db.Index('ix_orcamentos_cliente', 'cliente'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
@@ -32,12 +37,15 @@ class Orcamento(db.Model):
             'prazo_entrega': self.prazo_entrega.isoformat() if self.prazo_entrega else None,
             'status': self.status,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
-            'valor_total': self.calcular_total(),
+            'valor_total': self.valor_total,
             'servicos': [servico.to_dict() for servico in self.servicos]
         }
 
 class ServicoOrcamento(db.Model):
     __tablename__ = 'servicos_orcamento'
+    __table_args__ = (
+        db.Index('ix_servicos_orcamento_orcamento_id', 'orcamento_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     orcamento_id = db.Column(db.Integer, db.ForeignKey('orcamentos.id'), nullable=False)
@@ -57,3 +65,11 @@ class ServicoOrcamento(db.Model):
             'subtotal': self.quantidade * self.preco_unitario
         }
 
+# Total do orçamento calculado pelo SQLite (sem carregar os serviços),
+# utilizável em filtros e ordenação
+Orcamento.valor_total = db.column_property(
+    db.select(db.func.coalesce(db.func.sum(ServicoOrcamento.quantidade * ServicoOrcamento.preco_unitario), 0.0))
+    .where(ServicoOrcamento.orcamento_id == Orcamento.id)
+    .correlate_except(ServicoOrcamento)
+    .scalar_subquery()
+)
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Tarefa(db.Model):
     __tablename__ = 'tarefas'
+    __table_args__ = (
+        db.Index('ix_tarefas_data_horario_id', 'data', 'horario', 'id'),
+        db.Index('ix_tarefas_tipo_data_horario', 'tipo', 'data', 'horario'),
+        db.Index('ix_tarefas_concluida_data_horario', 'concluida', 'data', 'horario'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
@@ -0,0 +1,11 @@
+from src.models.user import db
+
+class VersaoTabela(db.Model):
+    __tablename__ = 'versoes_tabelas'
+    
+    # Contador incrementado a cada commit que altera a tabela (ver services/versoes.py)
+    tabela = db.Column(db.String(100), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VersaoTabela {self.tabela}: {self.versao}>'
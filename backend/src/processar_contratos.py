@@ -0,0 +1,20 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import create_app
+from src.models.user import db
+from src.models.contrato import Contrato
+from src.services.jobs import enfileirar
+
+# Enfileira extração de texto e miniatura para os contratos ainda não processados
+# (ex.: enviados antes do pós-processamento existir). Os jobs rodam no worker do servidor.
+app = create_app()
+with app.app_context():
+    try:
+        ids = [linha[0] for linha in db.session.query(Contrato.id).filter(Contrato.texto_extraido.is_(None))]
+        for contrato_id in ids:
+            enfileirar('processar_contrato', {'contrato_id': contrato_id})
+        print(f"✅ {len(ids)} contrato(s) enfileirado(s) para processamento.")
+    except Exception as e:
+        print("❌ Erro ao enfileirar contratos:", e)
@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import create_app
+from src.services.purga import RECURSOS_PURGA, MODOS_VACUUM, validar_filtros, contar, purgar
+
+# Remove orçamentos ou contratos por filtro, em lotes (mesma lógica da rota
+# POST /api/purga/<recurso>), apagando os PDFs órfãos e compactando o banco.
+#
+#   python src/purgar.py orcamentos --status rejeitado --data-fim 2023-12-31
+#   python src/purgar.py contratos --cliente Acme --simular
+#   python src/purgar.py orcamentos --todos
+parser = argparse.ArgumentParser(description='Remove registros em lotes por filtro.')
+parser.add_argument('recurso', choices=RECURSOS_PURGA)
+parser.add_argument('--data-inicio', help='AAAA-MM-DD')
+parser.add_argument('--data-fim', help='AAAA-MM-DD')
+parser.add_argument('--status', help='somente orçamentos')
+parser.add_argument('--cliente')
+parser.add_argument('--todos', action='store_true', help='confirma a remoção sem filtros')
+parser.add_argument('--vacuum', choices=MODOS_VACUUM, default='incremental')
+parser.add_argument('--simular', action='store_true', help='só conta os registros')
+args = parser.parse_args()
+
+app = create_app()
+with app.app_context():
+    try:
+        filtros = validar_filtros(args.recurso, {
+            'data_inicio': args.data_inicio, 'data_fim': args.data_fim,
+            'status': args.status, 'cliente': args.cliente,
+            'todos': args.todos, 'vacuum': args.vacuum
+        })
+        total = contar(args.recurso, filtros)
+        if args.simular:
+            print(f"{total} registro(s) de {args.recurso} seriam removidos.")
+        else:
+            resultado = purgar(args.recurso, filtros)
+            print(f"✅ {resultado['removidos']} registro(s) de {args.recurso} removidos, "
+                  f"{resultado['arquivos_removidos']} arquivo(s) apagados.")
+    except ValueError as e:
+        print("❌", e)
+        sys.exit(2)
+    except Exception as e:
+        print("❌ Erro ao remover dados:", e)
+        sys.exit(1)
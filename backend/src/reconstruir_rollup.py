@@ -0,0 +1,15 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import create_app
+from src.services.rollup_lancamentos import reconstruir_rollup
+
+# Recalcula a tabela lancamentos_rollup_diario a partir de todos os lançamentos
+app = create_app()
+with app.app_context():
+    try:
+        linhas = reconstruir_rollup()
+        print(f"✅ Rollup diário reconstruído ({linhas} linhas).")
+    except Exception as e:
+        print("❌ Erro ao reconstruir rollup:", e)
@@ -1,3 +1,4 @@
+from functools import wraps
 from flask import Blueprint, request, jsonify, session
 
 auth_bp = Blueprint('auth', __name__)
@@ -6,6 +7,15 @@ auth_bp = Blueprint('auth', __name__)
 USUARIO_FIXO = 'eighmen'
 SENHA_FIXA = 'Eighmen8'
 
+def login_obrigatorio(funcao):
+    # Rotas que exigem sessão autenticada (ver /login)
+    @wraps(funcao)
+    def verificar(*args, **kwargs):
+        if not session.get('authenticated'):
+            return jsonify({'error': 'Autenticação necessária'}), 401
+        return funcao(*args, **kwargs)
+    return verificar
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     try:
@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify
+from src.services.busca import buscar
+
+busca_bp = Blueprint('busca', __name__)
+
+LIMITE_MAXIMO_BUSCA = 100
+
+@busca_bp.route('/busca', methods=['GET'])
+def busca_unificada():
+    try:
+        texto = request.args.get('q', '').strip()
+        tipo = request.args.get('tipo')
+        
+        if not texto:
+            return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+        
+        if tipo and tipo not in ['orcamento', 'contrato']:
+            return jsonify({'error': 'Tipo deve ser "orcamento" ou "contrato"'}), 400
+        
+        try:
+            limite = min(int(request.args.get('limite', 20)), LIMITE_MAXIMO_BUSCA)
+        except ValueError:
+            return jsonify({'error': 'Limite inválido'}), 400
+        
+        if limite <= 0:
+            return jsonify({'error': 'Limite inválido'}), 400
+        
+        resultados = buscar(texto, limite, [tipo] if tipo else None)
+        
+        return jsonify({
+            'q': texto,
+            'resultados': resultados
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
@@ -1,40 +1,48 @@
-from flask import Blueprint, request, jsonify, send_file
+import logging
+from flask import Blueprint, request, jsonify
 from datetime import datetime
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-import os
 from src.models.user import db
 from src.models.contrato import Contrato
+from src.services.armazenamento import armazenar, adicionar_referencia, hash_do_upload
+from src.services.entrega_arquivos import enviar_arquivo
+from src.services.jobs import enfileirar
+from src.services.processamento_contratos import chave_arquivo, caminho_miniatura
+from src.services.busca import montar_consulta, ids_correspondentes
+from src.services.projecao import ler_projecao
+from src.services.paginacao import ler_parametros, paginar, ordenar, resposta_ndjson
 
 contratos_bp = Blueprint('contratos', __name__)
 
-# Configurações de upload
-UPLOAD_FOLDER = 'uploads/contratos'
+logger = logging.getLogger(__name__)
+
+# Configurações de upload (armazenamento em services/armazenamento.py)
 ALLOWED_EXTENSIONS = {'pdf'}
-MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def create_upload_folder():
-    upload_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), UPLOAD_FOLDER)
-    if not os.path.exists(upload_path):
-        os.makedirs(upload_path)
-    return upload_path
-
 @contratos_bp.route('/contratos', methods=['GET'])
 def listar_contratos():
     try:
         # Filtros opcionais
         cliente = request.args.get('cliente')
+        texto = request.args.get('texto')
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
         
         query = Contrato.query
         
-        # Aplicar filtros
+        # Aplicar filtros (texto usa o índice FTS)
         if cliente:
             query = query.filter(Contrato.cliente.ilike(f'%{cliente}%'))
         
+        if texto:
+            consulta = montar_consulta(texto)
+            if consulta:
+                query = query.filter(Contrato.id.in_(ids_correspondentes('contratos_fts', consulta)))
+        
         if data_inicio:
             try:
                 data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
@@ -49,10 +57,34 @@ def listar_contratos():
             except ValueError:
                 return jsonify({'error': 'Formato de data inválido para data_fim'}), 400
         
-        contratos = query.order_by(Contrato.data_upload.desc()).all()
+        ordenacao = [(Contrato.data_upload, True), (Contrato.id, True)]
+        
+        # Projeção de colunas (?fields=...): tuplas do Core em vez de entidades
+        try:
+            projecao = ler_projecao(request.args, Contrato)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if projecao:
+            query = projecao.aplicar(query, ordenacao)
+        serializar = projecao.serializar if projecao else Contrato.to_dict
+        
+        # Exportação completa em NDJSON, lida do banco em lotes
+        if request.args.get('stream') == '1':
+            return resposta_ndjson(query, ordenacao, serializar)
+        
+        # Paginação por cursor (keyset), opcional
+        try:
+            paginado, cursor, limite = ler_parametros(request.args)
+            if paginado:
+                contratos, next_cursor = paginar(query, ordenacao, cursor, limite)
+            else:
+                contratos, next_cursor = ordenar(query, ordenacao).all(), None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'contratos': [contrato.to_dict() for contrato in contratos]
+            'contratos': [serializar(contrato) for contrato in contratos],
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -61,11 +93,18 @@ def listar_contratos():
 @contratos_bp.route('/contratos', methods=['POST'])
 def criar_contrato():
     try:
+        # O arquivo é gravado em disco e tem o SHA-256 calculado durante o
+        # parsing do multipart (RequisicaoUpload); acima de 16MB o upload é abortado
+        try:
+            arquivos = request.files
+        except RequestEntityTooLarge:
+            return jsonify({'error': 'Arquivo muito grande. Máximo 16MB'}), 413
+        
         # Verificar se há arquivo no request
-        if 'arquivo' not in request.files:
+        if 'arquivo' not in arquivos:
             return jsonify({'error': 'Arquivo PDF é obrigatório'}), 400
         
-        arquivo = request.files['arquivo']
+        arquivo = arquivos['arquivo']
         
         if arquivo.filename == '':
             return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
@@ -73,14 +112,6 @@ def criar_contrato():
         if not allowed_file(arquivo.filename):
             return jsonify({'error': 'Apenas arquivos PDF são permitidos'}), 400
         
-        # Verificar tamanho do arquivo
-        arquivo.seek(0, os.SEEK_END)
-        file_size = arquivo.tell()
-        arquivo.seek(0)
-        
-        if file_size > MAX_FILE_SIZE:
-            return jsonify({'error': 'Arquivo muito grande. Máximo 16MB'}), 400
-        
         # Obter dados do formulário
         titulo = request.form.get('titulo', '').strip()
         cliente = request.form.get('cliente', '').strip()
@@ -115,16 +146,10 @@ def criar_contrato():
         if data_fim_obj <= data_inicio_obj:
             return jsonify({'error': 'Data de fim deve ser posterior à data de início'}), 400
         
-        # Salvar arquivo
-        upload_path = create_upload_folder()
+        # Arquivo em uploads/contratos/ab/cd/<sha256>.pdf (sem duplicatas)
         filename = secure_filename(arquivo.filename)
-        
-        # Gerar nome único para evitar conflitos
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        nome_arquivo = f"{timestamp}_{filename}"
-        caminho_completo = os.path.join(upload_path, nome_arquivo)
-        
-        arquivo.save(caminho_completo)
+        tamanho = arquivo.stream.tamanho
+        hash_arquivo, caminho_completo = hash_do_upload(arquivo.stream)
         
         # Criar novo contrato
         novo_contrato = Contrato(
@@ -135,12 +160,26 @@ def criar_contrato():
             data_fim=data_fim_obj,
             observacoes=observacoes,
             nome_arquivo=filename,
-            caminho_arquivo=caminho_completo
+            caminho_arquivo=caminho_completo,
+            hash_arquivo=hash_arquivo
         )
         
         db.session.add(novo_contrato)
+        adicionar_referencia(hash_arquivo, tamanho)
         db.session.commit()
         
+        # Só com a referência gravada o arquivo entra no armazenamento
+        armazenar(arquivo.stream)
+        
+        # Extração de texto e miniatura em segundo plano. O contrato já foi
+        # gravado: uma falha aqui só fica no log (src/processar_contratos.py
+        # reprocessa os pendentes)
+        try:
+            enfileirar('processar_contrato', {'contrato_id': novo_contrato.id})
+        except Exception:
+            db.session.rollback()
+            logger.exception('Não foi possível enfileirar o processamento do contrato %s', novo_contrato.id)
+        
         return jsonify({
             'success': True,
             'message': 'Contrato criado com sucesso',
@@ -151,23 +190,30 @@ def criar_contrato():
         db.session.rollback()
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+def _arquivo_contrato(contrato_id):
+    # Só as colunas necessárias para entregar o arquivo
+    return db.session.query(
+        Contrato.id, Contrato.caminho_arquivo, Contrato.hash_arquivo, Contrato.nome_arquivo
+    ).filter(Contrato.id == contrato_id).first()
+
 @contratos_bp.route('/contratos/<int:contrato_id>/download', methods=['GET'])
 def download_contrato(contrato_id):
     try:
-        contrato = Contrato.query.get(contrato_id)
+        contrato = _arquivo_contrato(contrato_id)
         
         if not contrato:
             return jsonify({'error': 'Contrato não encontrado'}), 404
         
-        if not contrato.caminho_arquivo or not os.path.exists(contrato.caminho_arquivo):
-            return jsonify({'error': 'Arquivo não encontrado'}), 404
-        
-        return send_file(
+        resposta = enviar_arquivo(
             contrato.caminho_arquivo,
-            as_attachment=True,
-            download_name=contrato.nome_arquivo,
-            mimetype='application/pdf'
+            etag=contrato.hash_arquivo,
+            nome=contrato.nome_arquivo,
+            anexo=True
         )
+        if resposta is None:
+            return jsonify({'error': 'Arquivo não encontrado'}), 404
+        
+        return resposta
         
     except Exception as e:
         return jsonify({'error': 'Erro interno do servidor'}), 500
@@ -175,18 +221,38 @@ def download_contrato(contrato_id):
 @contratos_bp.route('/contratos/<int:contrato_id>/view', methods=['GET'])
 def visualizar_contrato(contrato_id):
     try:
-        contrato = Contrato.query.get(contrato_id)
+        contrato = _arquivo_contrato(contrato_id)
         
         if not contrato:
             return jsonify({'error': 'Contrato não encontrado'}), 404
         
-        if not contrato.caminho_arquivo or not os.path.exists(contrato.caminho_arquivo):
-            return jsonify({'error': 'Arquivo não encontrado'}), 404
-        
-        return send_file(
+        resposta = enviar_arquivo(
             contrato.caminho_arquivo,
-            mimetype='application/pdf'
+            etag=contrato.hash_arquivo,
+            nome=contrato.nome_arquivo
         )
+        if resposta is None:
+            return jsonify({'error': 'Arquivo não encontrado'}), 404
+        
+        return resposta
+        
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@contratos_bp.route('/contratos/<int:contrato_id>/thumb', methods=['GET'])
+def miniatura_contrato(contrato_id):
+    try:
+        contrato = _arquivo_contrato(contrato_id)
+        
+        if not contrato:
+            return jsonify({'error': 'Contrato não encontrado'}), 404
+        
+        chave = chave_arquivo(contrato)
+        resposta = enviar_arquivo(caminho_miniatura(chave), etag=f'{chave}-thumb', mimetype='image/png')
+        if resposta is None:
+            return jsonify({'error': 'Miniatura ainda não gerada'}), 404
+        
+        return resposta
         
     except Exception as e:
         return jsonify({'error': 'Erro interno do servidor'}), 500
@@ -0,0 +1,109 @@
+from flask import Blueprint, request, jsonify, current_app
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime, date, timedelta
+from sqlalchemy import func
+import time
+from src.models.user import db
+from src.models.orcamento import Orcamento
+from src.models.contrato import Contrato
+from src.services.agregacao_lancamentos import calcular_resumo
+from src.services.tarefas import calcular_estatisticas
+from src.services.perfilador import acompanhar_thread
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# Pool pequeno e compartilhado: cada seção roda em sua própria thread,
+# com seu próprio app context (e portanto sua própria sessão/conexão)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='dashboard')
+
+LIMITE_CONTRATOS_VENCENDO = 20
+MAX_DIAS_VENCIMENTO = 3650  # janela de vencimento: até 10 anos
+
+def contar_orcamentos_por_status():
+    linhas = db.session.query(Orcamento.status, func.count(Orcamento.id)).group_by(Orcamento.status).all()
+    por_status = {'pendente': 0, 'enviado': 0, 'aceito': 0, 'rejeitado': 0}
+    for status, quantidade in linhas:
+        por_status[status] = quantidade
+    return {
+        'total': sum(por_status.values()),
+        'por_status': por_status
+    }
+
+def contratos_vencendo(dias):
+    hoje = date.today()
+    query = Contrato.query.filter(
+        Contrato.data_fim >= hoje,
+        Contrato.data_fim <= hoje + timedelta(days=dias)
+    )
+    contratos = query.order_by(Contrato.data_fim.asc()).limit(LIMITE_CONTRATOS_VENCENDO).all()
+    return {
+        'dias': dias,
+        'quantidade': query.count(),
+        'contratos': [contrato.to_dict() for contrato in contratos]
+    }
+
+def _executar_secao(app, funcao, args):
+    inicio = time.perf_counter()
+    with app.app_context(), acompanhar_thread():
+        resultado = funcao(*args)
+    return resultado, round((time.perf_counter() - inicio) * 1000, 2)
+
+@dashboard_bp.route('/dashboard', methods=['GET'])
+def obter_dashboard():
+    try:
+        inicio = time.perf_counter()
+        
+        # Filtros opcionais
+        data_inicio = request.args.get('data_inicio')
+        data_fim = request.args.get('data_fim')
+        
+        data_inicio_obj = None
+        data_fim_obj = None
+        
+        if data_inicio:
+            try:
+                data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'Formato de data inválido para data_inicio'}), 400
+        
+        if data_fim:
+            try:
+                data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'Formato de data inválido para data_fim'}), 400
+        
+        try:
+            dias_vencimento = int(request.args.get('dias_vencimento', 30))
+        except ValueError:
+            return jsonify({'error': 'dias_vencimento inválido'}), 400
+        if not 1 <= dias_vencimento <= MAX_DIAS_VENCIMENTO:
+            return jsonify({'error': f'dias_vencimento deve estar entre 1 e {MAX_DIAS_VENCIMENTO}'}), 400
+        
+        secoes = {
+            'financeiro': (calcular_resumo, (data_inicio_obj, data_fim_obj)),
+            'tarefas': (calcular_estatisticas, (data_inicio_obj, data_fim_obj)),
+            'orcamentos': (contar_orcamentos_por_status, ()),
+            'contratos_vencendo': (contratos_vencendo, (dias_vencimento,))
+        }
+        
+        # Consultas independentes executadas em paralelo; o contexto copiado
+        # leva junto a medição da requisição (services/instrumentacao.py)
+        app = current_app._get_current_object()
+        futuros = {
+            nome: _executor.submit(copy_context().run, _executar_secao, app, funcao, args)
+            for nome, (funcao, args) in secoes.items()
+        }
+        
+        resposta = {}
+        tempos = {}
+        for nome, futuro in futuros.items():
+            resposta[nome], tempos[nome] = futuro.result()
+        
+        tempos['total'] = round((time.perf_counter() - inicio) * 1000, 2)
+        resposta['tempos_ms'] = tempos
+        
+        return jsonify(resposta), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
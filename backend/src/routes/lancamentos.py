@@ -1,43 +1,111 @@
 from flask import Blueprint, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime, date
 from src.models.user import db
 from src.models.lancamento import Lancamento
+from src.services.agregacao_lancamentos import AGRUPAMENTOS, calcular_resumo, calcular_fluxo
+from src.services.rollup_lancamentos import registrar_lancamento, aplicar_no_rollup
+from src.services.lancamentos import validar_lancamento, validar_alteracao_lancamento, deltas_do_lote
+from src.services.lotes import ler_lote, validar_lote, aplicar_lote
+from src.services.importacao_lancamentos import (
+    CATEGORIA_PADRAO, ler_csv, ler_ofx, importar_lancamentos, novo_resultado
+)
+from src.services.projecao import ler_projecao
+from src.services.paginacao import ler_parametros, paginar, ordenar, resposta_ndjson
+from src.services.exportacao import FORMATOS_EXPORTACAO, resposta_exportacao, linhas_consulta
 
 lancamentos_bp = Blueprint('lancamentos', __name__)
 
+def filtrar_lancamentos(args):
+    # Filtros da listagem, reaproveitados pela exportação.
+    # Devolve (query, ordenacao) ou levanta ValueError com a mensagem de erro
+    data_inicio = args.get('data_inicio')
+    data_fim = args.get('data_fim')
+    
+    query = Lancamento.query
+    
+    # Aplicar filtros de data se fornecidos
+    if data_inicio:
+        try:
+            data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('Formato de data inválido para data_inicio')
+        query = query.filter(Lancamento.data >= data_inicio_obj)
+    
+    if data_fim:
+        try:
+            data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('Formato de data inválido para data_fim')
+        query = query.filter(Lancamento.data <= data_fim_obj)
+    
+    ordenacao = [(Lancamento.data, True), (Lancamento.id, True)]
+    return query, ordenacao
+
 @lancamentos_bp.route('/lancamentos', methods=['GET'])
 def listar_lancamentos():
     try:
         # Filtros opcionais
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
+        try:
+            query, ordenacao = filtrar_lancamentos(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        query = Lancamento.query
+        # Projeção de colunas (?fields=...): tuplas do Core em vez de entidades
+        try:
+            projecao = ler_projecao(request.args, Lancamento)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if projecao:
+            query = projecao.aplicar(query, ordenacao)
+        serializar = projecao.serializar if projecao else Lancamento.to_dict
         
-        # Aplicar filtros de data se fornecidos
-        if data_inicio:
-            try:
-                data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                query = query.filter(Lancamento.data >= data_inicio_obj)
-            except ValueError:
-                return jsonify({'error': 'Formato de data inválido para data_inicio'}), 400
+        # Exportação completa em NDJSON, lida do banco em lotes
+        if request.args.get('stream') == '1':
+            return resposta_ndjson(query, ordenacao, serializar)
         
-        if data_fim:
-            try:
-                data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                query = query.filter(Lancamento.data <= data_fim_obj)
-            except ValueError:
-                return jsonify({'error': 'Formato de data inválido para data_fim'}), 400
-        
-        lancamentos = query.order_by(Lancamento.data.desc()).all()
+        # Paginação por cursor (keyset), opcional
+        try:
+            paginado, cursor, limite = ler_parametros(request.args)
+            if paginado:
+                lancamentos, next_cursor = paginar(query, ordenacao, cursor, limite)
+            else:
+                lancamentos, next_cursor = ordenar(query, ordenacao).all(), None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'lancamentos': [lancamento.to_dict() for lancamento in lancamentos]
+            'lancamentos': [serializar(lancamento) for lancamento in lancamentos],
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+@lancamentos_bp.route('/lancamentos/export', methods=['GET'])
+def exportar_lancamentos():
+    try:
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACAO:
+            return jsonify({'error': 'Formato inválido. Use csv ou xlsx'}), 400
+        
+        try:
+            query, ordenacao = filtrar_lancamentos(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        colunas = [
+            ('id', Lancamento.id), ('data', Lancamento.data), ('tipo', Lancamento.tipo),
+            ('categoria', Lancamento.categoria), ('descricao', Lancamento.descricao),
+            ('valor', Lancamento.valor), ('data_criacao', Lancamento.data_criacao)
+        ]
+        query = ordenar(query, ordenacao).with_entities(*[coluna for _, coluna in colunas])
+        
+        return resposta_exportacao(formato, 'lancamentos', [nome for nome, _ in colunas], linhas_consulta(query))
+        
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
 @lancamentos_bp.route('/lancamentos', methods=['POST'])
 def criar_lancamento():
     try:
@@ -46,41 +114,17 @@ def criar_lancamento():
         if not data:
             return jsonify({'error': 'Dados não fornecidos'}), 400
         
-        # Validações obrigatórias
-        tipo = data.get('tipo', '').strip()
-        valor = data.get('valor')
-        data_lancamento = data.get('data', '').strip()
-        categoria = data.get('categoria', '').strip()
-        descricao = data.get('descricao', '').strip()
-        
-        if not tipo or tipo not in ['entrada', 'saida']:
-            return jsonify({'error': 'Tipo deve ser "entrada" ou "saida"'}), 400
-        
-        if not valor or valor <= 0:
-            return jsonify({'error': 'Valor deve ser maior que zero'}), 400
-        
-        if not data_lancamento:
-            return jsonify({'error': 'Data é obrigatória'}), 400
-        
-        if not categoria:
-            return jsonify({'error': 'Categoria é obrigatória'}), 400
-        
-        # Converter data
+        # Validações obrigatórias (mesmas da importação em lote)
         try:
-            data_obj = datetime.strptime(data_lancamento, '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'error': 'Formato de data inválido'}), 400
+            campos = validar_lancamento(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Criar novo lançamento
-        novo_lancamento = Lancamento(
-            tipo=tipo,
-            valor=float(valor),
-            data=data_obj,
-            categoria=categoria,
-            descricao=descricao
-        )
+        novo_lancamento = Lancamento(**campos)
         
         db.session.add(novo_lancamento)
+        registrar_lancamento(novo_lancamento)
         db.session.commit()
         
         return jsonify({
@@ -93,6 +137,78 @@ def criar_lancamento():
         db.session.rollback()
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+@lancamentos_bp.route('/lancamentos/lote', methods=['POST'])
+def lote_lancamentos():
+    try:
+        try:
+            lote = ler_lote(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Tudo validado antes de gravar: com qualquer erro, nada é aplicado
+        plano, erros = validar_lote(
+            lote, Lancamento,
+            [Lancamento.tipo, Lancamento.valor, Lancamento.data, Lancamento.categoria, Lancamento.descricao],
+            validar_lancamento, validar_alteracao_lancamento, 'Lançamento não encontrado'
+        )
+        if erros:
+            return jsonify({'error': 'Lote inválido: nenhuma operação foi aplicada', 'erros': erros}), 400
+        
+        resultado = aplicar_lote(Lancamento, plano)
+        aplicar_no_rollup(deltas_do_lote(plano))
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Lote aplicado com sucesso',
+            **resultado
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@lancamentos_bp.route('/lancamentos/importar', methods=['POST'])
+def importar_extrato():
+    resultado = novo_resultado()
+    try:
+        try:
+            arquivos = request.files
+        except RequestEntityTooLarge:
+            return jsonify({'error': 'Arquivo muito grande. Máximo 16MB'}), 413
+        
+        if 'arquivo' not in arquivos or arquivos['arquivo'].filename == '':
+            return jsonify({'error': 'Arquivo CSV ou OFX é obrigatório'}), 400
+        
+        arquivo = arquivos['arquivo']
+        formato = request.form.get('formato') or arquivo.filename.rsplit('.', 1)[-1]
+        formato = formato.strip().lower()
+        if formato not in ['csv', 'ofx']:
+            return jsonify({'error': 'Formato deve ser "csv" ou "ofx"'}), 400
+        
+        categoria = request.form.get('categoria', '').strip() or CATEGORIA_PADRAO
+        encoding = request.form.get('encoding') or ('utf-8-sig' if formato == 'csv' else 'latin-1')
+        
+        leitor = ler_csv if formato == 'csv' else ler_ofx
+        try:
+            importar_lancamentos(leitor(arquivo.stream, categoria, encoding), resultado)
+        except (UnicodeDecodeError, LookupError):
+            # Lotes anteriores ao erro já foram gravados e estão contados no resultado
+            return jsonify({
+                'error': 'Não foi possível ler o arquivo com esse encoding (ex.: use encoding=latin-1)',
+                **resultado
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'Importação concluída',
+            **resultado
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
 @lancamentos_bp.route('/lancamentos/<int:lancamento_id>', methods=['DELETE'])
 def deletar_lancamento(lancamento_id):
     try:
@@ -101,6 +217,7 @@ def deletar_lancamento(lancamento_id):
         if not lancamento:
             return jsonify({'error': 'Lançamento não encontrado'}), 404
         
+        registrar_lancamento(lancamento, -1)
         db.session.delete(lancamento)
         db.session.commit()
         
@@ -119,44 +236,34 @@ def resumo_financeiro():
         # Filtros opcionais
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
+        group_by = request.args.get('group_by')
         
-        query = Lancamento.query
+        data_inicio_obj = None
+        data_fim_obj = None
         
-        # Aplicar filtros de data se fornecidos
+        # Validar filtros de data se fornecidos
         if data_inicio:
             try:
                 data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                query = query.filter(Lancamento.data >= data_inicio_obj)
             except ValueError:
                 return jsonify({'error': 'Formato de data inválido para data_inicio'}), 400
         
         if data_fim:
             try:
                 data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                query = query.filter(Lancamento.data <= data_fim_obj)
             except ValueError:
                 return jsonify({'error': 'Formato de data inválido para data_fim'}), 400
         
-        lancamentos = query.all()
+        if group_by and group_by not in AGRUPAMENTOS:
+            return jsonify({'error': 'Agrupamento inválido. Use mes, semana ou dia'}), 400
         
-        # Calcular totais
-        total_entradas = sum(l.valor for l in lancamentos if l.tipo == 'entrada')
-        total_saidas = sum(l.valor for l in lancamentos if l.tipo == 'saida')
-        total_caixa = total_entradas - total_saidas
+        resumo = calcular_resumo(data_inicio_obj, data_fim_obj)
         
-        # Agrupar por categoria
-        categorias = {}
-        for lancamento in lancamentos:
-            if lancamento.categoria not in categorias:
-                categorias[lancamento.categoria] = {'entrada': 0, 'saida': 0}
-            categorias[lancamento.categoria][lancamento.tipo] += lancamento.valor
+        # Fluxo de caixa agrupado por período, se solicitado
+        if group_by:
+            resumo['fluxo'] = calcular_fluxo(group_by, data_inicio_obj, data_fim_obj)
         
-        return jsonify({
-            'total_entradas': total_entradas,
-            'total_saidas': total_saidas,
-            'total_caixa': total_caixa,
-            'categorias': categorias
-        }), 200
+        return jsonify(resumo), 200
         
     except Exception as e:
         return jsonify({'error': 'Erro interno do servidor'}), 500
@@ -0,0 +1,24 @@
+import hmac
+from flask import Blueprint, request, jsonify, current_app
+from src.services.instrumentacao import formatar_prometheus
+
+metricas_bp = Blueprint('metricas', __name__)
+
+@metricas_bp.route('/_metrics', methods=['GET'])
+def exportar_metricas():
+    try:
+        if not current_app.config['INSTRUMENTACAO']:
+            return jsonify({'error': 'Instrumentação desativada'}), 404
+
+        token = current_app.config['METRICAS_TOKEN']
+        if token:
+            enviado = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+            if not hmac.compare_digest(enviado.encode('utf-8'), token.encode('utf-8')):
+                return jsonify({'error': 'Autenticação necessária'}), 401
+
+        return current_app.response_class(
+            formatar_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
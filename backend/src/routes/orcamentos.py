@@ -1,45 +1,133 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 from src.models.user import db
 from src.models.orcamento import Orcamento, ServicoOrcamento
+from src.services.busca import montar_consulta, ids_correspondentes
+from src.services.pdf import obter_pdf_orcamento
+from src.services.projecao import ler_projecao
+from src.services.paginacao import ler_parametros, paginar, ordenar, resposta_ndjson
+from src.services.exportacao import FORMATOS_EXPORTACAO, resposta_exportacao, linhas_consulta
 
 orcamentos_bp = Blueprint("orcamentos", __name__)
 
+def filtrar_orcamentos(args):
+    # Filtros da listagem, reaproveitados pela exportação.
+    # Devolve (query, ordenacao) ou levanta ValueError com a mensagem de erro
+    status = args.get("status")
+    cliente = args.get("cliente")
+    texto = args.get("texto")
+    valor_min = args.get("valor_min")
+    valor_max = args.get("valor_max")
+    ordenar_por = args.get("ordenar_por", "data_criacao")
+    
+    query = Orcamento.query
+    
+    # Aplicar filtros
+    if status:
+        query = query.filter(Orcamento.status == status)
+    
+    if cliente:
+        query = query.filter(Orcamento.cliente.ilike(f"%{cliente}%"))
+    
+    # Busca textual pelo índice FTS (título, cliente, descrição e serviços)
+    if texto:
+        consulta = montar_consulta(texto)
+        if consulta:
+            query = query.filter(Orcamento.id.in_(ids_correspondentes("orcamentos_fts", consulta)))
+    
+    # Filtros por valor total usam a coluna calculada no SQL
+    try:
+        if valor_min:
+            query = query.filter(Orcamento.valor_total >= float(valor_min))
+        if valor_max:
+            query = query.filter(Orcamento.valor_total <= float(valor_max))
+    except ValueError:
+        raise ValueError("Valor inválido para filtro de valor total")
+    
+    if ordenar_por == "valor_total":
+        ordenacao = [(Orcamento.valor_total, True), (Orcamento.id, True)]
+    elif ordenar_por == "data_criacao":
+        ordenacao = [(Orcamento.data_criacao, True), (Orcamento.id, True)]
+    else:
+        raise ValueError("Ordenação inválida. Use data_criacao ou valor_total")
+    
+    return query, ordenacao
+
 @orcamentos_bp.route("/orcamentos", methods=["GET"])
 def listar_orcamentos():
     try:
         # Filtros opcionais
-        status = request.args.get("status")
-        cliente = request.args.get("cliente")
-        texto = request.args.get("texto")
-        
-        query = Orcamento.query
-        
-        # Aplicar filtros
-        if status:
-            query = query.filter(Orcamento.status == status)
-        
-        if cliente:
-            query = query.filter(Orcamento.cliente.ilike(f"%{cliente}%"))
-        
-        if texto:
-            query = query.filter(
-                db.or_(
-                    Orcamento.titulo.ilike(f"%{texto}%"),
-                    Orcamento.cliente.ilike(f"%{texto}%"),
-                    Orcamento.descricao.ilike(f"%{texto}%")
-                )
-            )
-        
-        orcamentos = query.order_by(Orcamento.data_criacao.desc()).all()
+        try:
+            query, ordenacao = filtrar_orcamentos(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Projeção de colunas (?fields=...): tuplas do Core em vez de entidades
+        try:
+            projecao = ler_projecao(request.args, Orcamento)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if projecao:
+            query = projecao.aplicar(query, ordenacao)
+            serializar = projecao.serializar
+        else:
+            # Serviços de todos os orçamentos da página carregados em uma única consulta
+            query = query.options(selectinload(Orcamento.servicos))
+            serializar = Orcamento.to_dict
+        
+        # Exportação completa em NDJSON, lida do banco em lotes
+        if request.args.get("stream") == "1":
+            return resposta_ndjson(query, ordenacao, serializar)
+        
+        # Paginação por cursor (keyset), opcional
+        try:
+            paginado, cursor, limite = ler_parametros(request.args)
+            if paginado:
+                orcamentos, next_cursor = paginar(query, ordenacao, cursor, limite)
+            else:
+                orcamentos, next_cursor = ordenar(query, ordenacao).all(), None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
-            "orcamentos": [orcamento.to_dict() for orcamento in orcamentos]
+            "orcamentos": [serializar(orcamento) for orcamento in orcamentos],
+            "next_cursor": next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({"error": "Erro interno do servidor"}), 500
 
+@orcamentos_bp.route("/orcamentos/export", methods=["GET"])
+def exportar_orcamentos():
+    try:
+        formato = request.args.get("formato", "csv")
+        if formato not in FORMATOS_EXPORTACAO:
+            return jsonify({"error": "Formato inválido. Use csv ou xlsx"}), 400
+        
+        try:
+            query, ordenacao = filtrar_orcamentos(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Uma linha por serviço (orçamentos sem serviço saem em uma linha só)
+        colunas = [
+            ("id", Orcamento.id), ("titulo", Orcamento.titulo), ("cliente", Orcamento.cliente),
+            ("status", Orcamento.status), ("data_criacao", Orcamento.data_criacao),
+            ("prazo_entrega", Orcamento.prazo_entrega), ("forma_pagamento", Orcamento.forma_pagamento),
+            ("valor_total", Orcamento.valor_total), ("servico", ServicoOrcamento.nome),
+            ("quantidade", ServicoOrcamento.quantidade), ("preco_unitario", ServicoOrcamento.preco_unitario),
+            ("subtotal", ServicoOrcamento.quantidade * ServicoOrcamento.preco_unitario)
+        ]
+        query = ordenar(query, ordenacao).outerjoin(
+            ServicoOrcamento, ServicoOrcamento.orcamento_id == Orcamento.id
+        ).order_by(ServicoOrcamento.id).with_entities(*[coluna for _, coluna in colunas])
+        
+        return resposta_exportacao(formato, "orcamentos", [nome for nome, _ in colunas], linhas_consulta(query))
+        
+    except Exception as e:
+        return jsonify({"error": "Erro interno do servidor"}), 500
+
 @orcamentos_bp.route("/orcamentos", methods=["POST"])
 def criar_orcamento():
     try:
@@ -155,7 +243,7 @@ def atualizar_status(orcamento_id):
 @orcamentos_bp.route("/orcamentos/<int:orcamento_id>", methods=["GET"])
 def obter_orcamento(orcamento_id):
     try:
-        orcamento = Orcamento.query.get(orcamento_id)
+        orcamento = Orcamento.query.options(selectinload(Orcamento.servicos)).get(orcamento_id)
         
         if not orcamento:
             return jsonify({"error": "Orçamento não encontrado"}), 404
@@ -167,6 +255,27 @@ def obter_orcamento(orcamento_id):
     except Exception as e:
         return jsonify({"error": "Erro interno do servidor"}), 500
 
+@orcamentos_bp.route("/orcamentos/<int:orcamento_id>/pdf", methods=["GET"])
+def gerar_pdf_orcamento(orcamento_id):
+    try:
+        orcamento = Orcamento.query.options(selectinload(Orcamento.servicos)).get(orcamento_id)
+        
+        if not orcamento:
+            return jsonify({"error": "Orçamento não encontrado"}), 404
+        
+        # PDF em cache por hash do conteúdo; só renderiza quando o orçamento muda
+        caminho = obter_pdf_orcamento(orcamento.to_dict())
+        
+        return send_file(
+            caminho,
+            as_attachment=True,
+            download_name=f"orcamento_{orcamento_id}.pdf",
+            mimetype="application/pdf"
+        )
+        
+    except Exception as e:
+        return jsonify({"error": "Erro interno do servidor"}), 500
+
 @orcamentos_bp.route("/orcamentos/clientes", methods=["GET"])
 def listar_clientes():
     try:
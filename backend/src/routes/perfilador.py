@@ -0,0 +1,75 @@
+from flask import Blueprint, request, jsonify, current_app
+from src.routes.auth import login_obrigatorio
+from src.services.perfilador import armar, desarmar, ler_estado, obter_resultado, contar_amostras
+
+perfilador_bp = Blueprint('perfilador', __name__)
+
+@perfilador_bp.before_request
+def verificar_perfilador():
+    if not current_app.config['PERFILADOR']:
+        return jsonify({'error': 'Perfilador desativado'}), 404
+    return None
+
+@perfilador_bp.route('/_perfilador', methods=['POST'])
+@login_obrigatorio
+def armar_perfilador():
+    try:
+        data = request.get_json(silent=True) or {}
+
+        try:
+            estado = armar(
+                (data.get('rota') or '').strip(),
+                int(data.get('requisicoes', 10)),
+                int(data.get('intervalo_ms', current_app.config['PERFILADOR_INTERVALO_MS']))
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e) or 'Parâmetros inválidos'}), 400
+
+        return jsonify({
+            'success': True,
+            'message': 'Perfilador armado',
+            'perfil': estado
+        }), 201
+
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@perfilador_bp.route('/_perfilador', methods=['GET'])
+@login_obrigatorio
+def status_perfilador():
+    try:
+        estado = ler_estado()
+        if estado is None:
+            return jsonify({'perfil': None}), 200
+
+        estado['amostras'] = contar_amostras(estado['id'])
+        return jsonify({'perfil': estado}), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@perfilador_bp.route('/_perfilador', methods=['DELETE'])
+@login_obrigatorio
+def desarmar_perfilador():
+    try:
+        desarmar()
+        return jsonify({'success': True, 'message': 'Perfilador desarmado'}), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@perfilador_bp.route('/_perfilador/<perfil_id>.folded', methods=['GET'])
+@login_obrigatorio
+def download_perfil(perfil_id):
+    try:
+        conteudo = obter_resultado(perfil_id)
+        if conteudo is None:
+            return jsonify({'error': 'Perfil não encontrado'}), 404
+
+        # Pilhas colapsadas: flamegraph.pl perfil.folded > perfil.svg, ou abrir no speedscope
+        resposta = current_app.response_class(conteudo, mimetype='text/plain')
+        resposta.headers['Content-Disposition'] = f'attachment; filename=perfil_{perfil_id}.folded'
+        return resposta
+
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from src.models.user import db
+from src.routes.auth import login_obrigatorio
+from src.services.jobs import enfileirar
+from src.services.purga import validar_filtros, contar
+
+purga_bp = Blueprint('purga', __name__)
+
+@purga_bp.route('/purga/<recurso>', methods=['POST'])
+@login_obrigatorio
+def purgar_recurso(recurso):
+    try:
+        data = request.get_json(silent=True) or {}
+
+        try:
+            filtros = validar_filtros(recurso, data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Simulação: só informa quantos registros seriam removidos
+        if data.get('simular'):
+            return jsonify({'recurso': recurso, 'total': contar(recurso, filtros)}), 200
+
+        job = enfileirar('purga', {'recurso': recurso, 'filtros': filtros})
+
+        return jsonify({
+            'success': True,
+            'message': 'Purga enfileirada',
+            'job': job.to_dict()
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Erro interno do servidor'}), 500
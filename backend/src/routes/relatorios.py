@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify, send_file
+from datetime import datetime
+import os
+from src.models.user import db
+from src.models.job import Job
+from src.services.jobs import enfileirar
+import src.services.relatorios  # registra o tipo de job relatorio_lote
+
+relatorios_bp = Blueprint('relatorios', __name__)
+
+@relatorios_bp.route('/relatorios/lote', methods=['POST'])
+def criar_relatorio_lote():
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        data_inicio = (data.get('data_inicio') or '').strip()
+        data_fim = (data.get('data_fim') or '').strip()
+        status = (data.get('status') or 'aceito').strip()
+        incluir_extrato = bool(data.get('incluir_extrato', True))
+        
+        if status not in ['pendente', 'enviado', 'aceito', 'rejeitado']:
+            return jsonify({'error': 'Status inválido'}), 400
+        
+        # Validar datas antes de enfileirar
+        try:
+            data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date() if data_inicio else None
+            data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date() if data_fim else None
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido'}), 400
+        
+        if data_inicio_obj and data_fim_obj and data_fim_obj < data_inicio_obj:
+            return jsonify({'error': 'Data de fim deve ser posterior à data de início'}), 400
+        
+        job = enfileirar('relatorio_lote', {
+            'data_inicio': data_inicio or None,
+            'data_fim': data_fim or None,
+            'status': status,
+            'incluir_extrato': incluir_extrato
+        })
+        
+        return jsonify({
+            'success': True,
+            'message': 'Relatório enfileirado',
+            'job': job.to_dict()
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@relatorios_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def obter_job(job_id):
+    try:
+        job = Job.query.get(job_id)
+        
+        if not job:
+            return jsonify({'error': 'Job não encontrado'}), 404
+        
+        return jsonify({
+            'job': job.to_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@relatorios_bp.route('/jobs/<int:job_id>/download', methods=['GET'])
+def download_job(job_id):
+    try:
+        job = Job.query.get(job_id)
+        
+        if not job:
+            return jsonify({'error': 'Job não encontrado'}), 404
+        
+        if job.status != 'concluido':
+            return jsonify({'error': 'Job ainda não concluído', 'job': job.to_dict()}), 409
+        
+        if not job.resultado or not os.path.exists(job.resultado):
+            return jsonify({'error': 'Arquivo não encontrado'}), 404
+        
+        # Enviado do disco em blocos, sem carregar o ZIP em memória
+        return send_file(
+            job.resultado,
+            as_attachment=True,
+            download_name=f'relatorio_{job.id}.zip',
+            mimetype='application/zip'
+        )
+        
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
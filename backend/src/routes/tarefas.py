@@ -1,48 +1,112 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime, date
+from datetime import datetime
 from src.models.user import db
 from src.models.tarefa import Tarefa
+from src.services.tarefas import (
+    calcular_estatisticas, obter_calendario, invalidar_calendario, validar_tarefa, datas_do_lote
+)
+from src.services.lotes import ler_lote, validar_lote, aplicar_lote
+from src.services.projecao import ler_projecao
+from src.services.paginacao import ler_parametros, paginar, ordenar, resposta_ndjson
+from src.services.exportacao import FORMATOS_EXPORTACAO, resposta_exportacao, linhas_consulta
 
 tarefas_bp = Blueprint('tarefas', __name__)
 
+def filtrar_tarefas(args):
+    # Filtros da listagem, reaproveitados pela exportação.
+    # Devolve (query, ordenacao) ou levanta ValueError com a mensagem de erro
+    data_inicio = args.get('data_inicio')
+    data_fim = args.get('data_fim')
+    tipo = args.get('tipo')
+    concluida = args.get('concluida')
+    
+    query = Tarefa.query
+    
+    # Aplicar filtros
+    if data_inicio:
+        try:
+            data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('Formato de data inválido para data_inicio')
+        query = query.filter(Tarefa.data >= data_inicio_obj)
+    
+    if data_fim:
+        try:
+            data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('Formato de data inválido para data_fim')
+        query = query.filter(Tarefa.data <= data_fim_obj)
+    
+    if tipo:
+        query = query.filter(Tarefa.tipo == tipo)
+    
+    if concluida is not None:
+        concluida_bool = concluida.lower() == 'true'
+        query = query.filter(Tarefa.concluida == concluida_bool)
+    
+    ordenacao = [(Tarefa.data, False), (Tarefa.horario, False), (Tarefa.id, False)]
+    return query, ordenacao
+
 @tarefas_bp.route('/tarefas', methods=['GET'])
 def listar_tarefas():
     try:
         # Filtros opcionais
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
-        tipo = request.args.get('tipo')
-        concluida = request.args.get('concluida')
-        
-        query = Tarefa.query
+        try:
+            query, ordenacao = filtrar_tarefas(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Aplicar filtros
-        if data_inicio:
-            try:
-                data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                query = query.filter(Tarefa.data >= data_inicio_obj)
-            except ValueError:
-                return jsonify({'error': 'Formato de data inválido para data_inicio'}), 400
+        # Projeção de colunas (?fields=...): tuplas do Core em vez de entidades
+        try:
+            projecao = ler_projecao(request.args, Tarefa)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if projecao:
+            query = projecao.aplicar(query, ordenacao)
+        serializar = projecao.serializar if projecao else Tarefa.to_dict
+        
+        # Exportação completa em NDJSON, lida do banco em lotes
+        if request.args.get('stream') == '1':
+            return resposta_ndjson(query, ordenacao, serializar)
+        
+        # Paginação por cursor (keyset), opcional
+        try:
+            paginado, cursor, limite = ler_parametros(request.args)
+            if paginado:
+                tarefas, next_cursor = paginar(query, ordenacao, cursor, limite)
+            else:
+                tarefas, next_cursor = ordenar(query, ordenacao).all(), None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if data_fim:
-            try:
-                data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                query = query.filter(Tarefa.data <= data_fim_obj)
-            except ValueError:
-                return jsonify({'error': 'Formato de data inválido para data_fim'}), 400
+        return jsonify({
+            'tarefas': [serializar(tarefa) for tarefa in tarefas],
+            'next_cursor': next_cursor
+        }), 200
         
-        if tipo:
-            query = query.filter(Tarefa.tipo == tipo)
+    except Exception as e:
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@tarefas_bp.route('/tarefas/export', methods=['GET'])
+def exportar_tarefas():
+    try:
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACAO:
+            return jsonify({'error': 'Formato inválido. Use csv ou xlsx'}), 400
         
-        if concluida is not None:
-            concluida_bool = concluida.lower() == 'true'
-            query = query.filter(Tarefa.concluida == concluida_bool)
+        try:
+            query, ordenacao = filtrar_tarefas(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        tarefas = query.order_by(Tarefa.data.asc(), Tarefa.horario.asc()).all()
+        colunas = [
+            ('id', Tarefa.id), ('titulo', Tarefa.titulo), ('tipo', Tarefa.tipo), ('data', Tarefa.data),
+            ('horario', Tarefa.horario), ('cliente', Tarefa.cliente), ('local', Tarefa.local),
+            ('descricao', Tarefa.descricao), ('concluida', Tarefa.concluida), ('data_criacao', Tarefa.data_criacao)
+        ]
+        query = ordenar(query, ordenacao).with_entities(*[coluna for _, coluna in colunas])
         
-        return jsonify({
-            'tarefas': [tarefa.to_dict() for tarefa in tarefas]
-        }), 200
+        return resposta_exportacao(formato, 'tarefas', [nome for nome, _ in colunas], linhas_consulta(query))
         
     except Exception as e:
         return jsonify({'error': 'Erro interno do servidor'}), 500
@@ -55,51 +119,18 @@ def criar_tarefa():
         if not data:
             return jsonify({'error': 'Dados não fornecidos'}), 400
         
-        # Validações obrigatórias
-        titulo = data.get('titulo', '').strip()
-        tipo = data.get('tipo', '').strip()
-        data_tarefa = data.get('data', '').strip()
-        horario = data.get('horario', '').strip()
-        cliente = data.get('cliente', '').strip()
-        local = data.get('local', '').strip()
-        descricao = data.get('descricao', '').strip()
-        
-        if not titulo:
-            return jsonify({'error': 'Título é obrigatório'}), 400
-        
-        if not tipo or tipo not in ['captacao', 'edicao', 'reuniao']:
-            return jsonify({'error': 'Tipo deve ser "captacao", "edicao" ou "reuniao"'}), 400
-        
-        if not data_tarefa:
-            return jsonify({'error': 'Data é obrigatória'}), 400
-        
-        # Converter data
+        # Validações obrigatórias (mesmas do lote)
         try:
-            data_obj = datetime.strptime(data_tarefa, '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'error': 'Formato de data inválido'}), 400
-        
-        # Converter horário se fornecido
-        horario_obj = None
-        if horario:
-            try:
-                horario_obj = datetime.strptime(horario, '%H:%M').time()
-            except ValueError:
-                return jsonify({'error': 'Formato de horário inválido (use HH:MM)'}), 400
+            campos = validar_tarefa(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Criar nova tarefa
-        nova_tarefa = Tarefa(
-            titulo=titulo,
-            tipo=tipo,
-            data=data_obj,
-            horario=horario_obj,
-            cliente=cliente,
-            local=local,
-            descricao=descricao
-        )
+        nova_tarefa = Tarefa(**campos)
         
         db.session.add(nova_tarefa)
         db.session.commit()
+        invalidar_calendario(nova_tarefa.data)
         
         return jsonify({
             'success': True,
@@ -111,6 +142,37 @@ def criar_tarefa():
         db.session.rollback()
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+@tarefas_bp.route('/tarefas/lote', methods=['POST'])
+def lote_tarefas():
+    try:
+        try:
+            lote = ler_lote(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Tudo validado antes de gravar: com qualquer erro, nada é aplicado
+        plano, erros = validar_lote(
+            lote, Tarefa, [Tarefa.data], validar_tarefa,
+            lambda dados, atual: validar_tarefa(dados, parcial=True),
+            'Tarefa não encontrada'
+        )
+        if erros:
+            return jsonify({'error': 'Lote inválido: nenhuma operação foi aplicada', 'erros': erros}), 400
+        
+        resultado = aplicar_lote(Tarefa, plano)
+        db.session.commit()
+        invalidar_calendario(*datas_do_lote(plano))
+        
+        return jsonify({
+            'success': True,
+            'message': 'Lote aplicado com sucesso',
+            **resultado
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
 @tarefas_bp.route('/tarefas/<int:tarefa_id>/concluir', methods=['PUT'])
 def marcar_concluida(tarefa_id):
     try:
@@ -128,6 +190,7 @@ def marcar_concluida(tarefa_id):
         
         tarefa.concluida = bool(concluida)
         db.session.commit()
+        invalidar_calendario(tarefa.data)
         
         return jsonify({
             'success': True,
@@ -147,8 +210,10 @@ def deletar_tarefa(tarefa_id):
         if not tarefa:
             return jsonify({'error': 'Tarefa não encontrada'}), 404
         
+        data_tarefa = tarefa.data
         db.session.delete(tarefa)
         db.session.commit()
+        invalidar_calendario(data_tarefa)
         
         return jsonify({
             'success': True,
@@ -169,27 +234,8 @@ def calendario_mes(ano, mes):
         if ano < 2000 or ano > 2100:
             return jsonify({'error': 'Ano inválido'}), 400
         
-        # Buscar tarefas do mês
-        data_inicio = date(ano, mes, 1)
-        
-        # Calcular último dia do mês
-        if mes == 12:
-            data_fim = date(ano + 1, 1, 1)
-        else:
-            data_fim = date(ano, mes + 1, 1)
-        
-        tarefas = Tarefa.query.filter(
-            Tarefa.data >= data_inicio,
-            Tarefa.data < data_fim
-        ).all()
-        
-        # Agrupar tarefas por dia
-        calendario = {}
-        for tarefa in tarefas:
-            dia = tarefa.data.day
-            if dia not in calendario:
-                calendario[dia] = []
-            calendario[dia].append(tarefa.to_dict())
+        # Servido do cache em memória quando o mês já foi carregado
+        calendario = obter_calendario(ano, mes)
         
         return jsonify({
             'ano': ano,
@@ -207,47 +253,24 @@ def estatisticas_tarefas():
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
         
-        query = Tarefa.query
+        data_inicio_obj = None
+        data_fim_obj = None
         
-        # Aplicar filtros de data se fornecidos
+        # Validar filtros de data se fornecidos
         if data_inicio:
             try:
                 data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                query = query.filter(Tarefa.data >= data_inicio_obj)
             except ValueError:
                 return jsonify({'error': 'Formato de data inválido para data_inicio'}), 400
         
         if data_fim:
             try:
                 data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                query = query.filter(Tarefa.data <= data_fim_obj)
             except ValueError:
                 return jsonify({'error': 'Formato de data inválido para data_fim'}), 400
         
-        tarefas = query.all()
-        
-        # Calcular estatísticas
-        total_tarefas = len(tarefas)
-        concluidas = len([t for t in tarefas if t.concluida])
-        pendentes = total_tarefas - concluidas
-        
-        # Agrupar por categoria
-        por_categoria = {
-            'captacao': len([t for t in tarefas if t.tipo == 'captacao']),
-            'edicao': len([t for t in tarefas if t.tipo == 'edicao']),
-            'reuniao': len([t for t in tarefas if t.tipo == 'reuniao'])
-        }
-        
-        # Calcular taxa de conclusão
-        taxa_conclusao = (concluidas / total_tarefas * 100) if total_tarefas > 0 else 0
-        
-        return jsonify({
-            'total_tarefas': total_tarefas,
-            'concluidas': concluidas,
-            'pendentes': pendentes,
-            'taxa_conclusao': round(taxa_conclusao, 1),
-            'por_categoria': por_categoria
-        }), 200
+        # Contagens calculadas pelo SQLite em uma única consulta agrupada
+        return jsonify(calcular_estatisticas(data_inicio_obj, data_fim_obj)), 200
         
     except Exception as e:
         return jsonify({'error': 'Erro interno do servidor'}), 500
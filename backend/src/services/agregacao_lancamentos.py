@@ -0,0 +1,64 @@
+from sqlalchemy import func, case
+from src.models.user import db
+from src.models.lancamento import LancamentoRollupDiario as Rollup
+
+# Formatos do strftime do SQLite usados para agrupar o fluxo de caixa
+AGRUPAMENTOS = {
+    'dia': '%Y-%m-%d',
+    'semana': '%Y-W%W',
+    'mes': '%Y-%m'
+}
+
+def _filtrar_periodo(query, coluna_data, data_inicio=None, data_fim=None):
+    if data_inicio:
+        query = query.filter(coluna_data >= data_inicio)
+    if data_fim:
+        query = query.filter(coluna_data <= data_fim)
+    return query
+
+def calcular_resumo(data_inicio=None, data_fim=None):
+    # Totais por (tipo, categoria) somados a partir do rollup diário
+    query = db.session.query(
+        Rollup.tipo,
+        Rollup.categoria,
+        func.sum(Rollup.total)
+    )
+    query = _filtrar_periodo(query, Rollup.data, data_inicio, data_fim)
+    linhas = query.group_by(Rollup.tipo, Rollup.categoria).all()
+
+    totais = {'entrada': 0, 'saida': 0}
+    categorias = {}
+    for tipo, categoria, total in linhas:
+        if tipo not in totais:
+            continue
+        if categoria not in categorias:
+            categorias[categoria] = {'entrada': 0, 'saida': 0}
+        categorias[categoria][tipo] += total
+        totais[tipo] += total
+
+    return {
+        'total_entradas': totais['entrada'],
+        'total_saidas': totais['saida'],
+        'total_caixa': totais['entrada'] - totais['saida'],
+        'categorias': categorias
+    }
+
+def calcular_fluxo(agrupamento, data_inicio=None, data_fim=None):
+    # Entradas e saídas por período (dia, semana ou mês), em ordem cronológica
+    periodo = func.strftime(AGRUPAMENTOS[agrupamento], Rollup.data).label('periodo')
+    entradas = func.sum(case((Rollup.tipo == 'entrada', Rollup.total), else_=0))
+    saidas = func.sum(case((Rollup.tipo == 'saida', Rollup.total), else_=0))
+
+    query = db.session.query(periodo, entradas, saidas)
+    query = _filtrar_periodo(query, Rollup.data, data_inicio, data_fim)
+    linhas = query.group_by(periodo).order_by(periodo).all()
+
+    return [
+        {
+            'periodo': periodo_linha,
+            'entrada': total_entradas,
+            'saida': total_saidas,
+            'saldo': total_entradas - total_saidas
+        }
+        for periodo_linha, total_entradas, total_saidas in linhas
+    ]
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import tempfile
+from flask import Request
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.exceptions import RequestEntityTooLarge
+from src.models.user import db
+from src.models.contrato import ArquivoContrato
+
+# Armazenamento endereçado por conteúdo dos PDFs de contratos:
+# uploads/contratos/ab/cd/<sha256>.pdf. Arquivos idênticos são gravados uma
+# única vez; arquivos_contrato guarda quantos contratos apontam para cada um.
+
+ARMAZENAMENTO_PADRAO = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'contratos')
+
+TAMANHO_MAXIMO_ARQUIVO = 16 * 1024 * 1024  # 16MB
+
+def pasta_armazenamento():
+    # ARMAZENAMENTO_CONTRATOS troca a raiz (gerar_dados.py e benchmark.py
+    # gravam fora do armazenamento real). Lida a cada chamada: vale também
+    # para os processos do pool e para o servidor iniciado pelo benchmark
+    return os.environ.get('ARMAZENAMENTO_CONTRATOS') or ARMAZENAMENTO_PADRAO
+
+def caminho_arquivo(sha256, extensao='pdf'):
+    return os.path.join(pasta_armazenamento(), sha256[:2], sha256[2:4], f'{sha256}.{extensao}')
+
+class ArquivoEmHash:
+    # Destino do upload durante o parsing do multipart: grava em um arquivo
+    # temporário, calcula o SHA-256 e conta os bytes à medida que chegam.
+    # Passou do limite, o upload é abortado sem ler o resto do corpo.
+    def __init__(self, limite):
+        temporarios = os.path.join(pasta_armazenamento(), 'tmp')
+        os.makedirs(temporarios, exist_ok=True)
+        self.arquivo = tempfile.NamedTemporaryFile(dir=temporarios, suffix='.part', delete=False)
+        self.caminho = self.arquivo.name
+        self.hash = hashlib.sha256()
+        self.tamanho = 0
+        self.limite = limite
+        self.movido = False
+
+    def write(self, dados):
+        self.tamanho += len(dados)
+        if self.tamanho > self.limite:
+            self.close()
+            raise RequestEntityTooLarge()
+        self.hash.update(dados)
+        return self.arquivo.write(dados)
+
+    def read(self, *args):
+        return self.arquivo.read(*args)
+
+    def readline(self, *args):
+        return self.arquivo.readline(*args)
+
+    def seek(self, *args):
+        return self.arquivo.seek(*args)
+
+    def __iter__(self):
+        return iter(self.arquivo)
+
+    def tell(self):
+        return self.arquivo.tell()
+
+    def flush(self):
+        return self.arquivo.flush()
+
+    @property
+    def closed(self):
+        return self.arquivo.closed
+
+    def close(self):
+        # Chamado pelo Flask ao fim da requisição: o temporário não armazenado é apagado
+        self.arquivo.close()
+        if not self.movido and os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+# Rotas cujos uploads vão direto para o armazenamento; as demais (ex.: a
+# importação de extratos) mantêm o destino padrão do Werkzeug
+ENDPOINTS_ARMAZENAMENTO = {'contratos.criar_contrato'}
+
+class RequisicaoUpload(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # A rota já foi resolvida quando o corpo é lido (request.files/form)
+        if self.endpoint not in ENDPOINTS_ARMAZENAMENTO:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return ArquivoEmHash(TAMANHO_MAXIMO_ARQUIVO)
+
+def hash_do_upload(arquivo_em_hash):
+    sha256 = arquivo_em_hash.hash.hexdigest()
+    return sha256, caminho_arquivo(sha256)
+
+def armazenar(arquivo_em_hash):
+    # Move o temporário para o caminho definitivo; se o conteúdo já existe, descarta
+    # a cópia. Chamar depois do commit da referência (adicionar_referencia): a
+    # purga só apaga arquivos sem referência, conferindo com o lock de escrita,
+    # e um commit que falhe não deixa arquivo órfão no armazenamento
+    sha256, destino = hash_do_upload(arquivo_em_hash)
+    arquivo_em_hash.arquivo.close()
+
+    if os.path.exists(destino):
+        os.remove(arquivo_em_hash.caminho)
+    else:
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(arquivo_em_hash.caminho, destino)
+    arquivo_em_hash.movido = True
+    return sha256, destino
+
+def adicionar_referencia(sha256, tamanho):
+    # Na mesma transação do contrato; chamar antes do commit
+    stmt = sqlite_insert(ArquivoContrato).values(hash=sha256, tamanho=tamanho, referencias=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['hash'],
+        set_={'referencias': ArquivoContrato.referencias + 1}
+    )
+    db.session.execute(stmt)
+
+def remover_referencia(sha256):
+    # Decrementa a contagem; devolve o caminho do arquivo se ele ficou órfão.
+    # O arquivo só deve ser apagado depois do commit.
+    db.session.execute(
+        db.update(ArquivoContrato)
+        .where(ArquivoContrato.hash == sha256)
+        .values(referencias=ArquivoContrato.referencias - 1)
+    )
+    orfao = db.session.execute(
+        db.delete(ArquivoContrato)
+        .where(ArquivoContrato.hash == sha256, ArquivoContrato.referencias <= 0)
+        .returning(ArquivoContrato.hash)
+    ).first()
+    return caminho_arquivo(sha256) if orfao else None
@@ -0,0 +1,217 @@
+import re
+from itertools import zip_longest
+from src.models.user import db
+
+# Índices FTS5 (rowid = id do registro de origem), mantidos por triggers.
+# remove_diacritics faz "orcamento" encontrar "orçamento" e vice-versa.
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+
+INDICES = {
+    'orcamentos_fts': {
+        'colunas': ['titulo', 'cliente', 'descricao', 'servicos'],
+        'pesos': [10.0, 5.0, 1.0, 2.0],
+        'origem': """
+            SELECT o.id, o.titulo, o.cliente, o.descricao,
+                   (SELECT group_concat(s.nome, ' ') FROM servicos_orcamento s WHERE s.orcamento_id = o.id)
+            FROM orcamentos o
+        """,
+        'triggers': {
+            'orcamentos_fts_ai': """
+                CREATE TRIGGER orcamentos_fts_ai AFTER INSERT ON orcamentos BEGIN
+                    INSERT INTO orcamentos_fts(rowid, titulo, cliente, descricao, servicos)
+                    VALUES (new.id, new.titulo, new.cliente, new.descricao,
+                            (SELECT group_concat(nome, ' ') FROM servicos_orcamento WHERE orcamento_id = new.id));
+                END
+            """,
+            'orcamentos_fts_au': """
+                CREATE TRIGGER orcamentos_fts_au AFTER UPDATE OF titulo, cliente, descricao ON orcamentos BEGIN
+                    UPDATE orcamentos_fts SET titulo = new.titulo, cliente = new.cliente, descricao = new.descricao
+                    WHERE rowid = new.id;
+                END
+            """,
+            'orcamentos_fts_ad': """
+                CREATE TRIGGER orcamentos_fts_ad AFTER DELETE ON orcamentos BEGIN
+                    DELETE FROM orcamentos_fts WHERE rowid = old.id;
+                END
+            """,
+            'servicos_fts_ai': """
+                CREATE TRIGGER servicos_fts_ai AFTER INSERT ON servicos_orcamento BEGIN
+                    UPDATE orcamentos_fts
+                    SET servicos = (SELECT group_concat(nome, ' ') FROM servicos_orcamento WHERE orcamento_id = new.orcamento_id)
+                    WHERE rowid = new.orcamento_id;
+                END
+            """,
+            'servicos_fts_au': """
+                CREATE TRIGGER servicos_fts_au AFTER UPDATE OF nome, orcamento_id ON servicos_orcamento BEGIN
+                    UPDATE orcamentos_fts
+                    SET servicos = (SELECT group_concat(nome, ' ') FROM servicos_orcamento WHERE orcamento_id = old.orcamento_id)
+                    WHERE rowid = old.orcamento_id;
+                    UPDATE orcamentos_fts
+                    SET servicos = (SELECT group_concat(nome, ' ') FROM servicos_orcamento WHERE orcamento_id = new.orcamento_id)
+                    WHERE rowid = new.orcamento_id;
+                END
+            """,
+            'servicos_fts_ad': """
+                CREATE TRIGGER servicos_fts_ad AFTER DELETE ON servicos_orcamento BEGIN
+                    UPDATE orcamentos_fts
+                    SET servicos = (SELECT group_concat(nome, ' ') FROM servicos_orcamento WHERE orcamento_id = old.orcamento_id)
+                    WHERE rowid = old.orcamento_id;
+                END
+            """
+        }
+    },
+    'contratos_fts': {
+        'colunas': ['titulo', 'cliente', 'observacoes', 'texto'],
+        'pesos': [10.0, 5.0, 1.0, 1.0],
+        'origem': """
+            SELECT c.id, c.titulo, c.cliente, c.observacoes, c.texto_extraido
+            FROM contratos c
+        """,
+        'triggers': {
+            'contratos_fts_ai': """
+                CREATE TRIGGER contratos_fts_ai AFTER INSERT ON contratos BEGIN
+                    INSERT INTO contratos_fts(rowid, titulo, cliente, observacoes, texto)
+                    VALUES (new.id, new.titulo, new.cliente, new.observacoes, new.texto_extraido);
+                END
+            """,
+            'contratos_fts_au': """
+                CREATE TRIGGER contratos_fts_au AFTER UPDATE OF titulo, cliente, observacoes, texto_extraido ON contratos BEGIN
+                    UPDATE contratos_fts SET titulo = new.titulo, cliente = new.cliente, observacoes = new.observacoes,
+                                             texto = new.texto_extraido
+                    WHERE rowid = new.id;
+                END
+            """,
+            'contratos_fts_ad': """
+                CREATE TRIGGER contratos_fts_ad AFTER DELETE ON contratos BEGIN
+                    DELETE FROM contratos_fts WHERE rowid = old.id;
+                END
+            """
+        }
+    }
+}
+
+def _colunas_existentes(conexao, tabela):
+    linhas = conexao.exec_driver_sql(f"PRAGMA table_info({tabela})").fetchall()
+    return [linha[1] for linha in linhas]
+
+def _normalizar(sql):
+    return ' '.join((sql or '').split())
+
+def _garantir_triggers(conexao, triggers):
+    # Recria os triggers cujo SQL gravado em sqlite_master difere do atual,
+    # para mudanças no corpo chegarem a bancos já existentes. Devolve se
+    # algum foi (re)criado
+    gravados = dict(conexao.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+    ).fetchall())
+    alterados = False
+    for nome, ddl in triggers.items():
+        if _normalizar(gravados.get(nome)) == _normalizar(ddl):
+            continue
+        conexao.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nome}")
+        conexao.exec_driver_sql(ddl)
+        alterados = True
+    return alterados
+
+def _popular(conexao, tabela, indice):
+    conexao.exec_driver_sql(f"DELETE FROM {tabela}")
+    conexao.exec_driver_sql(
+        f"INSERT INTO {tabela}(rowid, {', '.join(indice['colunas'])}) {indice['origem']}"
+    )
+
+def garantir_indice_busca():
+    # Cria (ou recria, se as colunas mudaram) os índices FTS e seus triggers.
+    # Se só os triggers mudaram, o índice é repopulado com a regra nova
+    with db.engine.begin() as conexao:
+        for tabela, indice in INDICES.items():
+            colunas = indice['colunas']
+            existentes = _colunas_existentes(conexao, tabela)
+
+            if existentes == colunas:
+                if _garantir_triggers(conexao, indice['triggers']):
+                    _popular(conexao, tabela, indice)
+                continue
+
+            if existentes:
+                for nome in indice['triggers']:
+                    conexao.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nome}")
+                conexao.exec_driver_sql(f"DROP TABLE {tabela}")
+
+            conexao.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {tabela} USING fts5({', '.join(colunas)}, tokenize='{TOKENIZADOR}')"
+            )
+            _popular(conexao, tabela, indice)
+            _garantir_triggers(conexao, indice['triggers'])
+
+def reconstruir_indice_busca():
+    with db.engine.begin() as conexao:
+        for tabela, indice in INDICES.items():
+            _popular(conexao, tabela, indice)
+
+def montar_consulta(texto, coluna=None):
+    # Cada palavra vira um prefixo entre aspas ("ana"*), combinados com AND;
+    # as aspas impedem que a entrada do usuário seja lida como sintaxe FTS
+    termos = re.findall(r'\w+', texto or '', re.UNICODE)
+    if not termos:
+        return None
+    consulta = ' '.join(f'"{termo}"*' for termo in termos)
+    if coluna:
+        consulta = f'{coluna} : ({consulta})'
+    return consulta
+
+def ids_correspondentes(tabela, consulta):
+    # Subconsulta com os ids que batem com a busca, para uso em filtros IN (...)
+    return db.text(
+        f"SELECT rowid FROM {tabela} WHERE {tabela} MATCH :consulta"
+    ).bindparams(consulta=consulta).columns(rowid=db.Integer)
+
+def buscar(texto, limite=20, tipos=None):
+    consulta = montar_consulta(texto)
+    if not consulta:
+        return []
+
+    fontes = {
+        'orcamento': ('orcamentos_fts', 'orcamentos'),
+        'contrato': ('contratos_fts', 'contratos')
+    }
+
+    grupos = []
+    for tipo, (tabela, origem) in fontes.items():
+        if tipos and tipo not in tipos:
+            continue
+
+        pesos = ', '.join(str(peso) for peso in INDICES[tabela]['pesos'])
+        linhas = db.session.execute(db.text(f"""
+            SELECT {tabela}.rowid, o.titulo, o.cliente,
+                   snippet({tabela}, -1, '[', ']', '…', 12) AS trecho,
+                   bm25({tabela}, {pesos}) AS pontuacao
+            FROM {tabela}
+            JOIN {origem} o ON o.id = {tabela}.rowid
+            WHERE {tabela} MATCH :consulta
+            ORDER BY pontuacao
+            LIMIT :limite
+        """), {'consulta': consulta, 'limite': limite}).all()
+
+        # bm25 é negativo: quanto menor, mais relevante
+        grupos.append([
+            {
+                'tipo': tipo,
+                'id': rowid,
+                'titulo': titulo,
+                'cliente': cliente,
+                'trecho': trecho,
+                'relevancia': -pontuacao
+            }
+            for rowid, titulo, cliente, trecho, pontuacao in linhas
+        ])
+
+    # O bm25 depende das estatísticas de cada tabela (número de documentos,
+    # tamanho médio das colunas), então pontuações de índices diferentes não
+    # são comparáveis: cada grupo mantém sua ordem e os grupos são intercalados
+    resultados = [
+        resultado
+        for rodada in zip_longest(*grupos)
+        for resultado in rodada
+        if resultado is not None
+    ]
+    return resultados[:limite]
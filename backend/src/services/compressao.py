@@ -0,0 +1,121 @@
+import gzip
+import mimetypes
+import os
+import tempfile
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # opcional: sem o pacote Brotli, só gzip
+    brotli = None
+
+# Compressão das respostas JSON da API e dos assets do frontend.
+# Os assets em static/assets têm hash no nome (gerados pelo Vite), então
+# podem ser pré-comprimidos uma vez e cacheados pelo navegador para sempre.
+
+LIMIAR_COMPRESSAO = 1024  # bytes; abaixo disso o cabeçalho gzip não compensa
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 4  # respostas dinâmicas: rápido o bastante por requisição
+
+EXTENSOES_COMPRIMIVEIS = ('.js', '.css', '.html', '.svg', '.json', '.map', '.txt')
+PASTA_ASSETS = 'assets'
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+def codificacoes_disponiveis():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def escolher_codificacao(accept_encodings, disponiveis=None):
+    # Maior qualidade pedida pelo cliente; em empate, a ordem de preferência (br antes de gzip)
+    melhor, melhor_qualidade = None, 0
+    for codificacao in disponiveis or codificacoes_disponiveis():
+        qualidade = accept_encodings[codificacao]
+        if qualidade > melhor_qualidade:
+            melhor, melhor_qualidade = codificacao, qualidade
+    return melhor
+
+def comprimir(dados, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=QUALIDADE_BROTLI)
+    return gzip.compress(dados, compresslevel=NIVEL_GZIP, mtime=0)
+
+def registrar_compressao(app):
+    limiar = app.config.get('COMPRESSAO_LIMIAR', LIMIAR_COMPRESSAO)
+
+    @app.after_request
+    def comprimir_resposta(resposta):
+        if resposta.mimetype != 'application/json':
+            return resposta
+        resposta.vary.add('Accept-Encoding')
+
+        # Arquivos (send_file), streams NDJSON e 304 ficam como estão
+        if (resposta.status_code != 200 or resposta.direct_passthrough or resposta.is_streamed
+                or 'Content-Encoding' in resposta.headers):
+            return resposta
+
+        dados = resposta.get_data()
+        if len(dados) < limiar:
+            return resposta
+
+        codificacao = escolher_codificacao(request.accept_encodings)
+        if codificacao is None:
+            return resposta
+
+        resposta.set_data(comprimir(dados, codificacao))
+        resposta.headers['Content-Encoding'] = codificacao
+        return resposta
+
+def _gravar_atomico(caminho, conteudo):
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    with os.fdopen(descritor, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+def precomprimir_assets(static_folder):
+    # Gera <arquivo>.gz e <arquivo>.br ao lado de cada asset; só refaz se o original for mais novo
+    pasta = os.path.join(static_folder or '', PASTA_ASSETS)
+    if not os.path.isdir(pasta):
+        return 0
+
+    gerados = 0
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            if not nome.endswith(EXTENSOES_COMPRIMIVEIS):
+                continue
+            origem = os.path.join(raiz, nome)
+            conteudo = None
+            for codificacao, extensao in (('gzip', '.gz'), ('br', '.br')):
+                if codificacao not in codificacoes_disponiveis():
+                    continue
+                destino = origem + extensao
+                if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(origem):
+                    continue
+                if conteudo is None:
+                    with open(origem, 'rb') as arquivo:
+                        conteudo = arquivo.read()
+                if codificacao == 'br':
+                    comprimido = brotli.compress(conteudo, quality=11)
+                else:
+                    comprimido = gzip.compress(conteudo, compresslevel=9, mtime=0)
+                _gravar_atomico(destino, comprimido)
+                gerados += 1
+    return gerados
+
+def enviar_asset(static_folder, path):
+    # Serve a variante pré-comprimida aceita pelo cliente, com cache imutável
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    disponiveis = [
+        codificacao for codificacao, extensao in (('br', '.br'), ('gzip', '.gz'))
+        if os.path.exists(os.path.join(static_folder, path + extensao))
+    ]
+    codificacao = escolher_codificacao(request.accept_encodings, disponiveis) if disponiveis else None
+
+    if codificacao:
+        extensao = '.br' if codificacao == 'br' else '.gz'
+        resposta = send_from_directory(static_folder, path + extensao, mimetype=mimetype)
+        resposta.headers['Content-Encoding'] = codificacao
+    else:
+        resposta = send_from_directory(static_folder, path, mimetype=mimetype)
+
+    resposta.vary.add('Accept-Encoding')
+    resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+    return resposta
@@ -0,0 +1,124 @@
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from urllib.parse import quote
+from flask import current_app, request, send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from src.services.armazenamento import pasta_armazenamento
+
+# Entrega dos PDFs de contratos: Range (206) para o visualizador do navegador,
+# ETag forte (hash do conteúdo) e Last-Modified para 304, e, com um proxy na
+# frente, delegação do envio via X-Accel-Redirect (nginx) ou X-Sendfile.
+#
+# ENTREGA_ARQUIVOS = 'flask' (padrão) | 'x-accel' | 'x-sendfile'
+
+STAT_CACHE_MAX = 1024
+
+# caminho -> (tamanho, mtime). Arquivos endereçados por conteúdo nunca mudam,
+# então a entrada só sai por LRU ou quando o arquivo some (esquecer_stat).
+_stat_cache = OrderedDict()
+_stat_lock = threading.Lock()
+
+def obter_stat(caminho):
+    with _stat_lock:
+        info = _stat_cache.get(caminho)
+        if info is not None:
+            _stat_cache.move_to_end(caminho)
+            return info
+
+    try:
+        stat = os.stat(caminho)
+    except OSError:
+        return None
+    info = (stat.st_size, stat.st_mtime)
+
+    with _stat_lock:
+        _stat_cache[caminho] = info
+        while len(_stat_cache) > STAT_CACHE_MAX:
+            _stat_cache.popitem(last=False)
+    return info
+
+def esquecer_stat(*caminhos):
+    with _stat_lock:
+        for caminho in caminhos:
+            _stat_cache.pop(caminho, None)
+
+def _disposicao(resposta, nome, anexo):
+    tipo = 'attachment' if anexo else 'inline'
+    if not nome:
+        resposta.headers['Content-Disposition'] = tipo
+        return
+    simples = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    if simples == nome:
+        resposta.headers.set('Content-Disposition', tipo, filename=nome)
+    else:
+        resposta.headers.set(
+            'Content-Disposition', tipo,
+            filename=simples, **{'filename*': "UTF-8''" + quote(nome, safe="!#$&+-.^_`|~")}
+        )
+
+def _caminho_interno(caminho):
+    # Caminho do arquivo visto pelo nginx (location internal), ou None se
+    # o arquivo estiver fora da pasta de armazenamento
+    relativo = os.path.relpath(os.path.abspath(caminho), pasta_armazenamento())
+    if relativo.startswith('..'):
+        return None
+    prefixo = current_app.config['X_ACCEL_PREFIXO'].rstrip('/')
+    return f"{prefixo}/{relativo.replace(os.sep, '/')}"
+
+def enviar_arquivo(caminho, etag=None, nome=None, anexo=False, mimetype='application/pdf'):
+    # Devolve None se o arquivo não existe (a rota responde 404)
+    if not caminho:
+        return None
+    info = obter_stat(caminho)
+    if info is None:
+        return None
+    tamanho, mtime = info
+    if etag is None:
+        etag = f'{int(mtime)}-{tamanho}'
+
+    modo = current_app.config['ENTREGA_ARQUIVOS']
+
+    if modo == 'x-accel':
+        interno = _caminho_interno(caminho)
+        if interno is not None:
+            # O nginx envia o arquivo (com Range e sendfile); o worker só responde cabeçalhos
+            resposta = current_app.response_class(mimetype=mimetype)
+            resposta.headers['X-Accel-Redirect'] = quote(interno)
+            _disposicao(resposta, nome, anexo)
+            resposta.set_etag(etag)
+            resposta.last_modified = mtime
+            resposta.cache_control.private = True
+            resposta.cache_control.no_cache = True
+            return resposta
+
+    if modo == 'x-sendfile':
+        # USE_X_SENDFILE: o send_file do Flask devolve só o cabeçalho X-Sendfile
+        resposta = send_file(
+            caminho, mimetype=mimetype, as_attachment=anexo, download_name=nome,
+            etag=etag, last_modified=mtime, conditional=True
+        )
+        resposta.cache_control.private = True
+        return resposta
+
+    try:
+        arquivo = open(caminho, 'rb')
+    except OSError:
+        esquecer_stat(caminho)
+        return None
+
+    # Com arquivo aberto o send_file não faz stat; tamanho e mtime vêm do cache.
+    # O corpo usa wsgi.file_wrapper (sendfile no gunicorn) quando disponível.
+    resposta = send_file(
+        arquivo, mimetype=mimetype, as_attachment=anexo, download_name=nome or os.path.basename(caminho),
+        etag=etag, last_modified=mtime, conditional=False
+    )
+    resposta.content_length = tamanho
+    resposta.accept_ranges = 'bytes'
+    resposta.cache_control.private = True
+    try:
+        return resposta.make_conditional(request.environ, accept_ranges=True, complete_length=tamanho)
+    except RequestedRangeNotSatisfiable as e:
+        arquivo.close()
+        return e.get_response()
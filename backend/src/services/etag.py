@@ -0,0 +1,60 @@
+import hashlib
+from datetime import date
+from flask import request, g
+from src.services.versoes import TABELAS_VERSIONADAS, obter_versoes
+
+# GET condicional: o ETag de uma rota é derivado das versões das tabelas que
+# ela lê (services/versoes.py) mais caminho e query string. Se o cliente
+# mandar If-None-Match igual, responde 304 antes de qualquer consulta aos dados.
+
+# prefixo da rota -> tabelas de que a resposta depende
+TABELAS_POR_ROTA = [
+    ('/api/lancamentos', ('lancamentos',)),
+    ('/api/orcamentos', ('orcamentos', 'servicos_orcamento')),
+    ('/api/contratos', ('contratos',)),
+    ('/api/tarefas', ('tarefas',)),
+    ('/api/busca', ('orcamentos', 'servicos_orcamento', 'contratos')),
+    ('/api/dashboard', TABELAS_VERSIONADAS)
+]
+
+def tabelas_da_rota(caminho):
+    for prefixo, tabelas in TABELAS_POR_ROTA:
+        if caminho == prefixo or caminho.startswith(prefixo + '/'):
+            return tabelas
+    return None
+
+def calcular_etag(caminho, query_string, tabelas):
+    versoes = obter_versoes(tabelas)
+    partes = [caminho, query_string]
+    partes.extend(f'{tabela}={versoes.get(tabela, 0)}' for tabela in sorted(tabelas))
+    # A data entra na chave porque há respostas relativas a "hoje"
+    # (contratos vencendo, vencidos)
+    partes.append(date.today().isoformat())
+    return hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()
+
+def registrar_etag(app):
+    @app.before_request
+    def verificar_etag():
+        if request.method != 'GET':
+            return None
+        tabelas = tabelas_da_rota(request.path)
+        if tabelas is None:
+            return None
+
+        etag = calcular_etag(request.path, request.query_string.decode('latin-1'), tabelas)
+        g.etag = etag
+        if request.if_none_match.contains_weak(etag):
+            resposta = app.response_class(status=304)
+            resposta.set_etag(etag, weak=True)
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return None
+
+    @app.after_request
+    def definir_etag(resposta):
+        etag = g.pop('etag', None)
+        # Só respostas JSON completas; arquivos (send_file) e streams têm tratamento próprio
+        if etag and resposta.status_code == 200 and resposta.mimetype == 'application/json':
+            resposta.set_etag(etag, weak=True)
+            resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
@@ -0,0 +1,168 @@
+import csv
+import re
+import zipfile
+from datetime import date, datetime, time
+from xml.sax.saxutils import escape
+from flask import Response, stream_with_context
+from src.models.user import db
+
+# Exportação CSV/XLSX em fluxo: as linhas saem do cursor do SQLite em lotes
+# (yield_per) e são escritas direto na resposta HTTP (chunked), sem montar
+# a lista completa nem objetos ORM. A memória não cresce com o tamanho da tabela.
+
+FORMATOS_EXPORTACAO = ['csv', 'xlsx']
+TAMANHO_LOTE_EXPORTACAO = 500
+
+MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+# Caracteres de controle não são permitidos em XML 1.0
+CONTROLE_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+class _Saida:
+    # Destino de escrita que acumula bytes até o gerador repassá-los ao cliente
+    def __init__(self):
+        self.partes = []
+
+    def write(self, dados):
+        self.partes.append(dados.encode('utf-8') if isinstance(dados, str) else dados)
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b''.join(self.partes)
+        self.partes = []
+        return dados
+
+def linhas_consulta(query):
+    # Tuplas lidas do cursor em lotes; query deve projetar colunas (with_entities).
+    # Gerador: a consulta só roda quando a resposta começa a ser enviada
+    yield from db.session.execute(
+        query.statement.execution_options(yield_per=TAMANHO_LOTE_EXPORTACAO)
+    ).tuples()
+
+def _texto_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'sim' if valor else 'não'
+    if isinstance(valor, float):
+        # Vírgula decimal: o arquivo abre direto no Excel em pt-BR
+        return f'{valor:.2f}'.replace('.', ',')
+    if isinstance(valor, time):
+        return valor.strftime('%H:%M')
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+def gerar_csv(cabecalho, linhas):
+    saida = _Saida()
+    saida.write('\ufeff')  # BOM para o Excel reconhecer UTF-8
+    escritor = csv.writer(saida, delimiter=';')
+    escritor.writerow(cabecalho)
+    for numero, linha in enumerate(linhas, start=1):
+        escritor.writerow([_texto_csv(valor) for valor in linha])
+        if numero % TAMANHO_LOTE_EXPORTACAO == 0:
+            yield saida.drenar()
+    yield saida.drenar()
+
+def _coluna_xlsx(indice):
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+def _celula_xlsx(referencia, valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)):
+        return f'<c r="{referencia}"><v>{valor}</v></c>'
+    if isinstance(valor, time):
+        valor = valor.strftime('%H:%M')
+    elif isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    texto = escape(CONTROLE_XML.sub('', str(valor)))
+    return f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+def _linha_xlsx(numero, valores):
+    celulas = ''.join(_celula_xlsx(f'{_coluna_xlsx(i)}{numero}', valor) for i, valor in enumerate(valores))
+    return f'<row r="{numero}">{celulas}</row>'
+
+PARTES_XLSX = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    )
+}
+
+def _workbook_xlsx(nome_planilha):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(nome_planilha[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+def gerar_xlsx(cabecalho, linhas, nome_planilha):
+    # XLSX mínimo (uma planilha, strings inline) escrito em um ZIP em fluxo:
+    # sem seek, o zipfile usa descritores de dados após cada arquivo
+    saida = _Saida()
+    with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for nome, conteudo in PARTES_XLSX.items():
+            arquivo_zip.writestr(nome, conteudo)
+        arquivo_zip.writestr('xl/workbook.xml', _workbook_xlsx(nome_planilha))
+        yield saida.drenar()
+
+        with arquivo_zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            planilha.write(_linha_xlsx(1, cabecalho).encode('utf-8'))
+            for numero, linha in enumerate(linhas, start=2):
+                planilha.write(_linha_xlsx(numero, linha).encode('utf-8'))
+                if numero % TAMANHO_LOTE_EXPORTACAO == 0:
+                    yield saida.drenar()
+            planilha.write(b'</sheetData></worksheet>')
+    yield saida.drenar()
+
+def resposta_exportacao(formato, nome, cabecalho, linhas):
+    # formato já validado (FORMATOS_EXPORTACAO); linhas: iterável de tuplas
+    if formato == 'xlsx':
+        corpo = gerar_xlsx(cabecalho, linhas, nome)
+    else:
+        corpo = gerar_csv(cabecalho, linhas)
+
+    resposta = Response(stream_with_context(corpo), mimetype=MIMETYPES[formato])
+    resposta.headers['Content-Disposition'] = f'attachment; filename={nome}_{date.today().isoformat()}.{formato}'
+    return resposta
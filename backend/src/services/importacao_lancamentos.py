@@ -0,0 +1,177 @@
+import codecs
+import csv
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from itertools import chain
+from sqlalchemy import func, insert, tuple_
+from src.models.user import db
+from src.models.lancamento import Lancamento
+from src.services.lancamentos import validar_lancamento
+from src.services.rollup_lancamentos import aplicar_no_rollup
+
+# Importação de extratos bancários (CSV ou OFX). O arquivo é lido em fluxo,
+# cada linha passa pelas mesmas validações de criar_lancamento e as linhas
+# aceitas são gravadas em lotes (um INSERT executemany e um commit por lote).
+# Linhas que já existem no banco com mesma (data, valor, descricao) são puladas,
+# então reimportar o mesmo extrato não duplica lançamentos.
+
+TAMANHO_LOTE_IMPORTACAO = 1000
+MAX_ERROS_RELATADOS = 100
+CATEGORIA_PADRAO = 'Importação'
+
+# Cabeçalhos aceitos no CSV (sem acento, minúsculos) -> campo
+COLUNAS_CSV = {
+    'data': 'data', 'date': 'data', 'data lancamento': 'data',
+    'tipo': 'tipo', 'type': 'tipo',
+    'valor': 'valor', 'value': 'valor', 'amount': 'valor', 'valor (r$)': 'valor',
+    'categoria': 'categoria', 'category': 'categoria',
+    'descricao': 'descricao', 'historico': 'descricao', 'description': 'descricao', 'memo': 'descricao'
+}
+
+TRANSACAO_OFX = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.S | re.I)
+CAMPO_OFX = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+def _normalizar_cabecalho(nome):
+    nome = unicodedata.normalize('NFKD', nome or '').encode('ascii', 'ignore').decode('ascii')
+    return nome.strip().lower()
+
+def _valor(texto):
+    # Aceita "1234.56", "1.234,56", "-50,00" e "R$ 10,00"; devolve None se inválido
+    texto = (texto or '').replace('R$', '').replace(' ', '').strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+def _data_iso(texto):
+    texto = (texto or '').strip()
+    if len(texto) == 10 and texto[4] == '-':
+        return texto  # já no formato da API
+    for formato in ('%d/%m/%Y', '%Y%m%d'):
+        try:
+            return datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            continue
+    return texto  # o validador devolve "Formato de data inválido"
+
+def _montar(data, valor_texto, tipo, categoria, descricao):
+    valor = _valor(valor_texto)
+    tipo = (tipo or '').strip().lower()
+    # Extratos costumam trazer saídas como valores negativos, sem coluna de tipo
+    if not tipo and valor is not None:
+        tipo = 'saida' if valor < 0 else 'entrada'
+    return {
+        'tipo': tipo,
+        'valor': abs(valor) if valor is not None else None,
+        'data': _data_iso(data),
+        'categoria': (categoria or '').strip(),
+        'descricao': (descricao or '').strip()
+    }
+
+def ler_csv(fluxo, categoria_padrao=CATEGORIA_PADRAO, encoding='utf-8-sig'):
+    # fluxo: iterável de linhas em bytes. Gera (numero_linha, dados)
+    linhas = codecs.iterdecode(fluxo, encoding)
+    cabecalho = next(linhas, '')
+    delimitador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    leitor = csv.reader(chain([cabecalho], linhas), delimiter=delimitador)
+
+    campos = [COLUNAS_CSV.get(_normalizar_cabecalho(nome)) for nome in next(leitor, [])]
+    for numero, colunas in enumerate(leitor, start=2):
+        if not any(coluna.strip() for coluna in colunas):
+            continue
+        linha = {campo: valor for campo, valor in zip(campos, colunas) if campo}
+        yield numero, _montar(
+            linha.get('data'), linha.get('valor'), linha.get('tipo'),
+            linha.get('categoria') or categoria_padrao, linha.get('descricao')
+        )
+
+def ler_ofx(fluxo, categoria_padrao=CATEGORIA_PADRAO, encoding='latin-1'):
+    # OFX (SGML ou XML): processa cada <STMTTRN> assim que o bloco fecha
+    pendente = ''
+    numero = 0
+    for trecho in codecs.iterdecode(fluxo, encoding):
+        pendente += trecho
+        fim = 0
+        for transacao in TRANSACAO_OFX.finditer(pendente):
+            numero += 1
+            fim = transacao.end()
+            campos = {nome.upper(): valor.strip() for nome, valor in CAMPO_OFX.findall(transacao.group(1))}
+            yield numero, _montar(
+                campos.get('DTPOSTED', '')[:8], campos.get('TRNAMT'), None,
+                categoria_padrao, campos.get('MEMO') or campos.get('NAME')
+            )
+        pendente = pendente[fim:]
+
+def _chave(data, valor, descricao):
+    return (data, round(valor, 2), descricao or '')
+
+def novo_resultado():
+    return {'aceitos': 0, 'duplicados': 0, 'rejeitados': 0, 'erros': []}
+
+def _gravar_lote(lote, estado, resultado):
+    preexistentes, vistos = estado['preexistentes'], estado['vistos']
+
+    # Quantas vezes cada chave nova já existia no banco antes desta importação
+    novas = {_chave(c['data'], c['valor'], c['descricao']) for c in lote} - preexistentes.keys()
+    if novas:
+        # Só os (data, valor) do lote: o índice por data resolve cada par e
+        # o banco devolve apenas as linhas que batem, já contadas
+        pares = {(c['data'], c['valor']) for c in lote}
+        descricao = func.coalesce(Lancamento.descricao, '')
+        contagem = Counter()
+        for data, valor, texto, quantidade in db.session.query(
+            Lancamento.data, Lancamento.valor, descricao, func.count()
+        ).filter(tuple_(Lancamento.data, Lancamento.valor).in_(pares)).group_by(
+            Lancamento.data, Lancamento.valor, descricao
+        ):
+            contagem[_chave(data, valor, texto)] += quantidade
+        for chave in novas:
+            preexistentes[chave] = contagem[chave]
+
+    # A n-ésima ocorrência de uma chave no arquivo é duplicata se o banco já tinha n ou mais
+    inserir = []
+    for campos in lote:
+        chave = _chave(campos['data'], campos['valor'], campos['descricao'])
+        vistos[chave] += 1
+        if vistos[chave] <= preexistentes[chave]:
+            resultado['duplicados'] += 1
+        else:
+            inserir.append(campos)
+
+    if inserir:
+        db.session.execute(insert(Lancamento), inserir)
+        aplicar_no_rollup((c['data'], c['categoria'], c['tipo'], c['valor'], 1) for c in inserir)
+    db.session.commit()
+    resultado['aceitos'] += len(inserir)
+
+def importar_lancamentos(registros, resultado=None):
+    # registros: iterável de (numero_linha, dados) vindo de ler_csv/ler_ofx
+    resultado = resultado if resultado is not None else novo_resultado()
+    estado = {'preexistentes': {}, 'vistos': Counter()}
+    lote = []
+
+    try:
+        for numero, dados in registros:
+            try:
+                lote.append(validar_lancamento(dados))
+            except ValueError as e:
+                resultado['rejeitados'] += 1
+                if len(resultado['erros']) < MAX_ERROS_RELATADOS:
+                    resultado['erros'].append({'linha': numero, 'error': str(e)})
+                continue
+
+            if len(lote) >= TAMANHO_LOTE_IMPORTACAO:
+                _gravar_lote(lote, estado, resultado)
+                lote = []
+
+        if lote:
+            _gravar_lote(lote, estado, resultado)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return resultado
@@ -0,0 +1,410 @@
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.services.json_rapido import ProvedorJSONRapido
+
+logger = logging.getLogger(__name__)
+logger_desempenho = logging.getLogger('src.desempenho')
+
+# Instrumentação por requisição: quantidade de consultas e tempo de banco
+# (eventos do engine), tempo de serialização JSON (json provider), tamanho
+# da resposta e tempo total. Cada requisição devolve o cabeçalho
+# Server-Timing e gera uma linha de log JSON; os números também alimentam
+# histogramas por rota expostos em /api/_metrics no formato do Prometheus.
+#
+# Os histogramas são cumulativos desde a subida do servidor, como pede o
+# Prometheus (janelas saem de rate() no servidor de métricas). Para quem lê
+# o endpoint direto, a duração também tem uma janela móvel: um anel de
+# histogramas por minuto dos últimos JANELA_MINUTOS, exposto como summary
+# com p50/p95/p99 (http_duracao_janela_segundos).
+#
+# Com gunicorn cada worker tem seus contadores: eles são gravados
+# periodicamente em METRICAS_FOLDER e somados na hora da coleta. Uma
+# gravação adiada pelo intervalo fica agendada num timer, e o worker grava
+# de novo ao sair, para o snapshot não parar no meio de uma rajada.
+
+METRICAS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'metricas')
+INTERVALO_GRAVACAO_METRICAS = 5.0  # segundos entre gravações do snapshot do processo
+JANELA_MINUTOS = 5  # minutos cobertos pelos quantis da janela móvel
+QUANTIS_JANELA = (0.5, 0.95, 0.99)
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 250)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# (nome, descrição, buckets) dos histogramas por rota
+HISTOGRAMAS = {
+    'duracao': ('http_duracao_segundos', 'Tempo total da requisição', BUCKETS_SEGUNDOS),
+    'db': ('http_db_segundos', 'Tempo gasto em consultas SQL', BUCKETS_SEGUNDOS),
+    'serializacao': ('http_serializacao_segundos', 'Tempo de serialização JSON', BUCKETS_SEGUNDOS),
+    'consultas': ('http_consultas_sql', 'Consultas SQL por requisição', BUCKETS_CONSULTAS),
+    'bytes': ('http_resposta_bytes', 'Tamanho do corpo da resposta', BUCKETS_BYTES)
+}
+
+# Normalização para o detector de N+1: mesma instrução com listas IN de
+# tamanhos diferentes ou literais diferentes conta como a mesma
+LISTA_PARAMETROS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+LITERAL_NUMERICO = re.compile(r'\b\d+\b')
+ESPACOS = re.compile(r'\s+')
+
+# Estado da requisição corrente. ContextVar (e não g) para poder ser levado
+# a outras threads com contextvars.copy_context(), como no dashboard
+_estado = ContextVar('desempenho', default=None)
+
+class EstadoRequisicao:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.tempo_serializacao = 0.0
+        self.bytes = None
+        self.instrucoes = Counter()
+        self.lock = threading.Lock()
+
+    def registrar_consulta(self, instrucao, duracao):
+        normalizada = ESPACOS.sub(' ', LISTA_PARAMETROS.sub('(?)', LITERAL_NUMERICO.sub('?', instrucao))).strip()
+        with self.lock:
+            self.consultas += 1
+            self.tempo_db += duracao
+            self.instrucoes[normalizada] += 1
+
+def estado_atual():
+    return _estado.get()
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for indice, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[indice] += 1
+                break
+        self.soma += valor
+        self.total += 1
+
+    def to_dict(self):
+        return {'contagens': self.contagens, 'soma': self.soma, 'total': self.total}
+
+    def somar(self, dados):
+        for indice, contagem in enumerate(dados['contagens'][:len(self.contagens)]):
+            self.contagens[indice] += contagem
+        self.soma += dados['soma']
+        self.total += dados['total']
+
+    def quantil(self, q):
+        # Interpolação linear dentro do bucket, como o histogram_quantile do
+        # Prometheus; acima do último limite devolve o próprio limite
+        if not self.total:
+            return 0.0
+        alvo = q * self.total
+        acumulado = 0
+        inferior = 0.0
+        for limite, contagem in zip(self.buckets, self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                return inferior + (limite - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+            inferior = limite
+        return float(self.buckets[-1])
+
+class MetricasRota:
+    def __init__(self):
+        self.status = Counter()
+        self.n_mais_1 = 0
+        self.histogramas = {nome: Histograma(buckets) for nome, (_, _, buckets) in HISTOGRAMAS.items()}
+        self.janela = {}  # minuto (epoch // 60) -> Histograma da duração
+
+    def observar_janela(self, duracao):
+        minuto = int(time.time() // 60)
+        histograma = self.janela.get(minuto)
+        if histograma is None:
+            histograma = self.janela[minuto] = Histograma(BUCKETS_SEGUNDOS)
+            for antigo in [m for m in self.janela if m <= minuto - JANELA_MINUTOS]:
+                del self.janela[antigo]
+        histograma.observar(duracao)
+
+    def duracao_recente(self):
+        # Soma dos minutos ainda dentro da janela
+        recente = Histograma(BUCKETS_SEGUNDOS)
+        inicio = int(time.time() // 60) - JANELA_MINUTOS
+        for minuto, histograma in self.janela.items():
+            if minuto > inicio:
+                recente.somar(histograma.to_dict())
+        return recente
+
+    def to_dict(self):
+        return {
+            'status': dict(self.status),
+            'n_mais_1': self.n_mais_1,
+            'histogramas': {nome: histograma.to_dict() for nome, histograma in self.histogramas.items()},
+            'janela': {str(minuto): histograma.to_dict() for minuto, histograma in self.janela.items()}
+        }
+
+    def somar(self, dados):
+        self.status.update(dados['status'])
+        self.n_mais_1 += dados['n_mais_1']
+        for nome, histograma in dados['histogramas'].items():
+            if nome in self.histogramas:
+                self.histogramas[nome].somar(histograma)
+        for minuto, histograma in dados.get('janela', {}).items():
+            self.janela.setdefault(int(minuto), Histograma(BUCKETS_SEGUNDOS)).somar(histograma)
+
+# "METODO rota" -> MetricasRota, do processo atual
+_metricas = {}
+_metricas_lock = threading.Lock()
+_gravacao = {'ultima': 0.0, 'timer': None}
+_gravacao_lock = threading.Lock()
+
+def _antes_da_consulta(conexao, cursor, instrucao, parametros, contexto, executemany):
+    if _estado.get() is not None:
+        conexao.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+def _depois_da_consulta(conexao, cursor, instrucao, parametros, contexto, executemany):
+    estado = _estado.get()
+    inicios = conexao.info.get('inicio_consultas')
+    if estado is None or not inicios:
+        return
+    estado.registrar_consulta(instrucao, time.perf_counter() - inicios.pop())
+
+def _escutar_engine():
+    # Eventos na classe Engine: valem para o engine criado depois pelo Flask-SQLAlchemy
+    if not event.contains(Engine, 'before_cursor_execute', _antes_da_consulta):
+        event.listen(Engine, 'before_cursor_execute', _antes_da_consulta)
+        event.listen(Engine, 'after_cursor_execute', _depois_da_consulta)
+
+class ProvedorJSON(ProvedorJSONRapido):
+    # Codificador da aplicação (services/json_rapido.py), cronometrando cada dumps
+    def dumps(self, obj, **kwargs):
+        estado = _estado.get()
+        if estado is None:
+            return super().dumps(obj, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            estado.tempo_serializacao += time.perf_counter() - inicio
+
+def _contar_bytes(corpo, estado):
+    estado.bytes = 0
+    for parte in corpo:
+        estado.bytes += len(parte)
+        yield parte
+
+def _server_timing(estado, total):
+    db_ms = estado.tempo_db * 1000
+    serializacao_ms = estado.tempo_serializacao * 1000
+    app_ms = max(total * 1000 - db_ms - serializacao_ms, 0)
+    return (
+        f'db;dur={db_ms:.2f};desc="{estado.consultas} consultas", '
+        f'serializacao;dur={serializacao_ms:.2f}, app;dur={app_ms:.2f}, total;dur={total * 1000:.2f}'
+    )
+
+def _gravar_metricas(forcar=False):
+    agora = time.monotonic()
+    with _gravacao_lock:
+        espera = INTERVALO_GRAVACAO_METRICAS - (agora - _gravacao['ultima'])
+        if not forcar and espera > 0:
+            if _gravacao['timer'] is None:
+                timer = threading.Timer(espera, gravar_metricas)
+                timer.daemon = True
+                _gravacao['timer'] = timer
+                timer.start()
+            return
+        _gravacao['ultima'] = agora
+    with _metricas_lock:
+        if not _metricas:
+            return
+        dados = {chave: metricas.to_dict() for chave, metricas in _metricas.items()}
+
+    os.makedirs(METRICAS_FOLDER, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=METRICAS_FOLDER, suffix='.tmp')
+    with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo)
+    os.replace(temporario, os.path.join(METRICAS_FOLDER, f'{os.getpid()}.json'))
+
+def gravar_metricas():
+    # Grava já o snapshot do processo (timer da gravação adiada e saída do worker)
+    with _gravacao_lock:
+        timer = _gravacao['timer']
+        _gravacao['timer'] = None
+    if timer is not None:
+        timer.cancel()
+    try:
+        _gravar_metricas(forcar=True)
+    except OSError:
+        logger.warning('Não foi possível gravar as métricas em %s', METRICAS_FOLDER)
+
+def limpar_metricas():
+    # Chamado na subida do servidor: contadores recomeçam do zero
+    if os.path.isdir(METRICAS_FOLDER):
+        for nome in os.listdir(METRICAS_FOLDER):
+            os.remove(os.path.join(METRICAS_FOLDER, nome))
+
+def _finalizar(app, estado, metodo, rota, caminho, status):
+    _estado.set(None)
+    duracao = time.perf_counter() - estado.inicio
+
+    chave = f'{metodo} {rota}'
+    repetida, repeticoes = estado.instrucoes.most_common(1)[0] if estado.instrucoes else (None, 0)
+    n_mais_1 = repeticoes > app.config['N_MAIS_1_LIMITE']
+    if n_mais_1:
+        logger.warning(
+            'Possível N+1 em %s %s: %d execuções de %s', metodo, caminho, repeticoes, repetida[:200]
+        )
+
+    with _metricas_lock:
+        metricas = _metricas.get(chave)
+        if metricas is None:
+            metricas = _metricas[chave] = MetricasRota()
+        metricas.status[str(status)] += 1
+        metricas.n_mais_1 += int(n_mais_1)
+        metricas.histogramas['duracao'].observar(duracao)
+        metricas.observar_janela(duracao)
+        metricas.histogramas['db'].observar(estado.tempo_db)
+        metricas.histogramas['serializacao'].observar(estado.tempo_serializacao)
+        metricas.histogramas['consultas'].observar(estado.consultas)
+        if estado.bytes is not None:
+            metricas.histogramas['bytes'].observar(estado.bytes)
+
+    if app.config['LOG_DESEMPENHO']:
+        logger_desempenho.info(json.dumps({
+            'metodo': metodo, 'rota': rota, 'caminho': caminho, 'status': status,
+            'duracao_ms': round(duracao * 1000, 2),
+            'db_ms': round(estado.tempo_db * 1000, 2),
+            'consultas': estado.consultas,
+            'serializacao_ms': round(estado.tempo_serializacao * 1000, 2),
+            'bytes': estado.bytes,
+            'n_mais_1': repeticoes if n_mais_1 else None
+        }, ensure_ascii=False))
+
+    try:
+        _gravar_metricas()
+    except OSError:
+        logger.warning('Não foi possível gravar as métricas em %s', METRICAS_FOLDER)
+
+def registrar_instrumentacao(app):
+    # Registrar antes dos outros hooks: o before_request roda primeiro e o
+    # after_request por último (depois da compressão, que muda o tamanho)
+    if not app.config['INSTRUMENTACAO']:
+        return
+    _escutar_engine()
+    app.json = ProvedorJSON(app)
+
+    if app.config['LOG_DESEMPENHO'] and not logger_desempenho.handlers:
+        manipulador = logging.StreamHandler(sys.stderr)
+        manipulador.setFormatter(logging.Formatter('%(message)s'))
+        logger_desempenho.addHandler(manipulador)
+        logger_desempenho.setLevel(logging.INFO)
+        logger_desempenho.propagate = False
+
+    @app.before_request
+    def iniciar_medicao():
+        _estado.set(EstadoRequisicao())
+
+    @app.after_request
+    def finalizar_medicao(resposta):
+        estado = _estado.get()
+        if estado is None:
+            return resposta
+        resposta.headers['Server-Timing'] = _server_timing(estado, time.perf_counter() - estado.inicio)
+
+        # Corpo em fluxo: tamanho contado enquanto é enviado. Arquivos
+        # (direct_passthrough) não são embrulhados para manter o sendfile
+        if resposta.is_streamed and not resposta.direct_passthrough:
+            resposta.response = _contar_bytes(resposta.response, estado)
+        else:
+            estado.bytes = resposta.calculate_content_length()
+
+        # Log e histogramas só quando o corpo terminou de ser enviado
+        # (consultas feitas durante o streaming também contam)
+        metodo, caminho = request.method, request.path
+        rota = request.url_rule.rule if request.url_rule is not None else 'desconhecida'
+        status = resposta.status_code
+        resposta.call_on_close(lambda: _finalizar(app, estado, metodo, rota, caminho, status))
+        return resposta
+
+def _ler_snapshots():
+    # Soma o snapshot gravado por cada processo (o atual entra com os dados vivos)
+    total = {}
+    proprio = f'{os.getpid()}.json'
+    nomes = os.listdir(METRICAS_FOLDER) if os.path.isdir(METRICAS_FOLDER) else []
+    for nome in nomes:
+        if not nome.endswith('.json') or nome == proprio:
+            continue
+        try:
+            with open(os.path.join(METRICAS_FOLDER, nome), encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+        except (OSError, ValueError):
+            continue
+        for chave, metricas in dados.items():
+            total.setdefault(chave, MetricasRota()).somar(metricas)
+
+    with _metricas_lock:
+        for chave, metricas in _metricas.items():
+            total.setdefault(chave, MetricasRota()).somar(metricas.to_dict())
+    return total
+
+def _rotulo(texto):
+    return texto.replace('\\', '\\\\').replace('"', '\\"')
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def formatar_prometheus():
+    metricas = _ler_snapshots()
+    linhas = [
+        '# HELP http_requisicoes_total Requisições atendidas',
+        '# TYPE http_requisicoes_total counter'
+    ]
+    for chave in sorted(metricas):
+        metodo, rota = chave.split(' ', 1)
+        for status, quantidade in sorted(metricas[chave].status.items()):
+            linhas.append(
+                f'http_requisicoes_total{{metodo="{metodo}",rota="{_rotulo(rota)}",status="{status}"}} {quantidade}'
+            )
+
+    linhas += ['# HELP http_n_mais_1_total Requisições com suspeita de N+1', '# TYPE http_n_mais_1_total counter']
+    for chave in sorted(metricas):
+        metodo, rota = chave.split(' ', 1)
+        linhas.append(f'http_n_mais_1_total{{metodo="{metodo}",rota="{_rotulo(rota)}"}} {metricas[chave].n_mais_1}')
+
+    for nome_interno, (nome, descricao, buckets) in HISTOGRAMAS.items():
+        linhas += [f'# HELP {nome} {descricao}', f'# TYPE {nome} histogram']
+        for chave in sorted(metricas):
+            metodo, rota = chave.split(' ', 1)
+            rotulos = f'metodo="{metodo}",rota="{_rotulo(rota)}"'
+            histograma = metricas[chave].histogramas[nome_interno]
+            acumulado = 0
+            for limite, contagem in zip(buckets, histograma.contagens):
+                acumulado += contagem
+                linhas.append(f'{nome}_bucket{{{rotulos},le="{_numero(limite)}"}} {acumulado}')
+            linhas.append(f'{nome}_bucket{{{rotulos},le="+Inf"}} {histograma.total}')
+            linhas.append(f'{nome}_sum{{{rotulos}}} {_numero(histograma.soma)}')
+            linhas.append(f'{nome}_count{{{rotulos}}} {histograma.total}')
+
+    linhas += [
+        f'# HELP http_duracao_janela_segundos Tempo total da requisição nos últimos {JANELA_MINUTOS} minutos',
+        '# TYPE http_duracao_janela_segundos summary'
+    ]
+    for chave in sorted(metricas):
+        metodo, rota = chave.split(' ', 1)
+        rotulos = f'metodo="{metodo}",rota="{_rotulo(rota)}"'
+        recente = metricas[chave].duracao_recente()
+        for q in QUANTIS_JANELA:
+            linhas.append(f'http_duracao_janela_segundos{{{rotulos},quantile="{q}"}} {_numero(recente.quantil(q))}')
+        linhas.append(f'http_duracao_janela_segundos_sum{{{rotulos}}} {_numero(recente.soma)}')
+        linhas.append(f'http_duracao_janela_segundos_count{{{rotulos}}} {recente.total}')
+    return '\n'.join(linhas) + '\n'
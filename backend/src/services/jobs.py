@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Fila de jobs persistida no SQLite (tabela jobs): sobrevive a reinícios e
+# dispensa broker externo. Cada processo web roda um worker em thread que
+# reivindica jobs pendentes; o trabalho pesado vai para um ProcessPoolExecutor.
+
+INTERVALO_POLLING = 2  # segundos
+LEASE_JOB = timedelta(minutes=5)  # job "executando" sem heartbeat há mais que isso é retomado
+INTERVALO_HEARTBEAT = 1.0  # segundos entre atualizações de progresso
+INTERVALO_ESPERA = 10  # segundos de espera no pool entre heartbeats
+
+RESULTADOS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'jobs')
+
+# tipo -> função(job, progresso) que retorna o caminho do arquivo gerado (ou None)
+TIPOS_JOB = {}
+
+_pool = {'executor': None, 'pid': None}
+_worker = {'thread': None}
+_lock = threading.Lock()
+
+def tipo_job(nome):
+    def registrar(funcao):
+        TIPOS_JOB[nome] = funcao
+        return funcao
+    return registrar
+
+def obter_pool():
+    # Pool criado sob demanda e nunca herdado entre processos
+    with _lock:
+        if _pool['executor'] is None or _pool['pid'] != os.getpid():
+            from src.services.pdf import registrar_recursos
+            _pool['executor'] = ProcessPoolExecutor(
+                max_workers=int(os.environ.get('JOBS_PROCESSOS', os.cpu_count() or 2)),
+                initializer=registrar_recursos
+            )
+            _pool['pid'] = os.getpid()
+        return _pool['executor']
+
+def enfileirar(tipo, parametros=None):
+    if tipo not in TIPOS_JOB:
+        raise ValueError(f'Tipo de job desconhecido: {tipo}')
+    job = Job(tipo=tipo, parametros=json.dumps(parametros or {}))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def reivindicar_proximo():
+    # UPDATE ... RETURNING é atômico: dois workers nunca pegam o mesmo job.
+    # Um job 'executando' com heartbeat vencido recomeça do zero: o progresso
+    # da execução interrompida é descartado
+    agora = datetime.utcnow()
+    linha = db.session.execute(db.text("""
+        UPDATE jobs
+        SET status = 'executando', data_inicio = :agora, heartbeat = :agora, erro = NULL,
+            total = 0, processados = 0
+        WHERE id = (
+            SELECT id FROM jobs
+            WHERE status = 'pendente' OR (status = 'executando' AND heartbeat < :expirado)
+            ORDER BY id
+            LIMIT 1
+        )
+        RETURNING id
+    """), {'agora': agora, 'expirado': agora - LEASE_JOB}).first()
+    db.session.commit()
+    return db.session.get(Job, linha[0]) if linha else None
+
+class Progresso:
+    # Atualiza processados/heartbeat no banco com no máximo uma escrita por intervalo
+    def __init__(self, job):
+        self.job = job
+        self.ultimo = 0
+
+    def definir_total(self, total):
+        self.job.total = total
+        self.job.heartbeat = datetime.utcnow()
+        db.session.commit()
+
+    def avancar(self, quantidade=1):
+        self.job.processados += quantidade
+        self.pulsar(forcar=self.job.processados >= self.job.total)
+
+    def pulsar(self, forcar=False):
+        # Heartbeat sem avanço: mantém o lease durante esperas longas
+        agora = time.monotonic()
+        if forcar or agora - self.ultimo >= INTERVALO_HEARTBEAT:
+            self.job.heartbeat = datetime.utcnow()
+            db.session.commit()
+            self.ultimo = agora
+
+def aguardar(futuros, progresso, return_when=FIRST_COMPLETED):
+    # wait() do pool com timeout: a cada INTERVALO_ESPERA sem resultado o
+    # heartbeat é renovado, para um PDF demorado não deixar o job parecer
+    # abandonado e ser reivindicado por outro worker
+    while True:
+        feitos, _ = wait(futuros, timeout=INTERVALO_ESPERA, return_when=return_when)
+        if feitos:
+            return feitos
+        progresso.pulsar()
+
+def executar_job(job):
+    funcao = TIPOS_JOB.get(job.tipo)
+    try:
+        if funcao is None:
+            raise ValueError(f'Tipo de job desconhecido: {job.tipo}')
+        job.resultado = funcao(job, Progresso(job))
+        job.status = 'concluido'
+    except Exception as e:
+        db.session.rollback()
+        logger.error('Job %s falhou:\n%s', job.id, traceback.format_exc())
+        job.status = 'erro'
+        job.erro = str(e)
+    job.data_fim = datetime.utcnow()
+    db.session.commit()
+
+def _loop_worker(app):
+    while True:
+        try:
+            with app.app_context():
+                job = reivindicar_proximo()
+                if job is not None:
+                    executar_job(job)
+                    continue
+        except Exception:
+            logger.error('Erro no worker de jobs:\n%s', traceback.format_exc())
+        time.sleep(INTERVALO_POLLING)
+
+def iniciar_worker(app):
+    # Uma thread por processo; chamadas repetidas não criam outra
+    with _lock:
+        thread = _worker['thread']
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=_loop_worker, args=(app,), name='jobs-worker', daemon=True)
+        thread.start()
+        _worker['thread'] = thread
+
+def caminho_resultado(job_id, extensao):
+    os.makedirs(RESULTADOS_FOLDER, exist_ok=True)
+    return os.path.join(RESULTADOS_FOLDER, f'job_{job_id}.{extensao}')
+
+def temporario_resultado(job_id, extensao):
+    # Nome único por tentativa: uma execução retomada não escreve no mesmo
+    # arquivo que a anterior, se esta ainda estiver rodando
+    os.makedirs(RESULTADOS_FOLDER, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(
+        dir=RESULTADOS_FOLDER, prefix=f'job_{job_id}_', suffix=f'.{extensao}.tmp'
+    )
+    os.close(descritor)
+    return temporario
@@ -0,0 +1,39 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # opcional: sem o pacote, json da biblioteca padrão
+    orjson = None
+
+# Codificador JSON da aplicação (app.json, usado por jsonify e pelo NDJSON).
+# Com JSON_CODIFICADOR=orjson e o pacote instalado, dumps roda no orjson;
+# caso contrário, ou quando pedem formatação (indent em modo debug), usa o
+# json da biblioteca padrão como o provider do Flask.
+#
+# O resultado é o mesmo JSON do Flask: chaves ordenadas e datas/horários
+# entregues ao mesmo default (OPT_PASSTHROUGH_DATETIME), que as converte
+# para o formato HTTP. Só muda o escape de caracteres não ASCII, enviados
+# em UTF-8.
+
+class ProvedorJSONRapido(DefaultJSONProvider):
+    def __init__(self, app):
+        super().__init__(app)
+        self.rapido = orjson is not None and app.config['JSON_CODIFICADOR'] == 'orjson'
+        self.opcoes = 0
+        if orjson is not None:
+            self.opcoes = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                self.opcoes |= orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj, **kwargs):
+        # separators compactos é o que o jsonify pede fora do modo debug
+        if not self.rapido or any(chave != 'separators' for chave in kwargs):
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self.opcoes).decode('utf-8')
+        except TypeError:
+            # Inteiros fora de 64 bits e afins: o json padrão resolve
+            return super().dumps(obj, **kwargs)
+
+def registrar_json(app):
+    app.json = ProvedorJSONRapido(app)
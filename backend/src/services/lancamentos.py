@@ -0,0 +1,74 @@
+from datetime import datetime
+
+TIPOS_LANCAMENTO = ['entrada', 'saida']
+
+def _texto(dados, campo):
+    valor = dados.get(campo)
+    return valor.strip() if isinstance(valor, str) else ''
+
+def validar_lancamento(dados):
+    # Regras de criação de um lançamento (API, importação e lote).
+    # Devolve os campos prontos para o modelo ou levanta ValueError com a mensagem.
+    tipo = _texto(dados, 'tipo')
+    valor = dados.get('valor')
+    data_lancamento = _texto(dados, 'data')
+    categoria = _texto(dados, 'categoria')
+    descricao = _texto(dados, 'descricao')
+    
+    if not tipo or tipo not in TIPOS_LANCAMENTO:
+        raise ValueError('Tipo deve ser "entrada" ou "saida"')
+    
+    try:
+        valor = float(valor) if valor not in (None, '') else None
+    except (TypeError, ValueError):
+        valor = None
+    if not valor or valor <= 0:
+        raise ValueError('Valor deve ser maior que zero')
+    
+    if not data_lancamento:
+        raise ValueError('Data é obrigatória')
+    
+    if not categoria:
+        raise ValueError('Categoria é obrigatória')
+    
+    try:
+        data_obj = datetime.strptime(data_lancamento, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Formato de data inválido')
+    
+    return {
+        'tipo': tipo,
+        'valor': valor,
+        'data': data_obj,
+        'categoria': categoria,
+        'descricao': descricao
+    }
+
+def validar_alteracao_lancamento(dados, atual):
+    # Alteração em lote: os campos enviados sobre os atuais passam pelas mesmas
+    # regras da criação. Devolve só os campos alterados.
+    mesclado = {
+        'tipo': atual.tipo,
+        'valor': atual.valor,
+        'data': atual.data.isoformat(),
+        'categoria': atual.categoria,
+        'descricao': atual.descricao,
+        **dados
+    }
+    campos = validar_lancamento(mesclado)
+    alteracoes = {campo: valor for campo, valor in campos.items() if campo in dados}
+    if not alteracoes:
+        raise ValueError('Nenhum campo para alterar')
+    return alteracoes
+
+def deltas_do_lote(plano):
+    # Deltas do rollup diário para aplicar_no_rollup: criações somam, remoções
+    # subtraem e alterações movem o valor do dia/categoria/tipo antigo para o novo
+    for campos in plano['criar']:
+        yield campos['data'], campos['categoria'], campos['tipo'], campos['valor'], 1
+    for _, alteracoes, atual in plano['atualizar']:
+        yield atual.data, atual.categoria, atual.tipo, -atual.valor, -1
+        novo = {**atual._mapping, **alteracoes}
+        yield novo['data'], novo['categoria'], novo['tipo'], novo['valor'], 1
+    for _, atual in plano['remover']:
+        yield atual.data, atual.categoria, atual.tipo, -atual.valor, -1
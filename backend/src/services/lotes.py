@@ -0,0 +1,141 @@
+from collections import defaultdict
+from sqlalchemy import delete, insert, update
+from src.models.user import db
+
+# Escrita em lote (POST /api/tarefas/lote e /api/lancamentos/lote):
+#
+#   {"criar": [{...}], "atualizar": [{"id": 1, ...}], "remover": [2, 3]}
+#
+# Todas as operações são validadas antes de qualquer escrita, com uma única
+# consulta para os registros alterados/removidos; se alguma falhar nada é
+# gravado e a resposta lista os erros por item. Um lote válido vira um único
+# INSERT com todas as linhas, um UPDATE ... WHERE id IN por grupo de alterações iguais e um
+# DELETE ... WHERE id IN, todos na mesma transação (um commit, um fsync).
+
+MAX_OPERACOES_LOTE = 1000
+OPERACOES_LOTE = ['criar', 'atualizar', 'remover']
+
+def ler_lote(dados):
+    # Formato do corpo; devolve {operacao: itens} ou levanta ValueError
+    if not isinstance(dados, dict):
+        raise ValueError('Dados não fornecidos')
+
+    lote = {}
+    for operacao in OPERACOES_LOTE:
+        itens = dados.get(operacao) or []
+        if not isinstance(itens, list):
+            raise ValueError(f'"{operacao}" deve ser uma lista')
+        lote[operacao] = itens
+
+    total = sum(len(itens) for itens in lote.values())
+    if total == 0:
+        raise ValueError('Nenhuma operação informada')
+    if total > MAX_OPERACOES_LOTE:
+        raise ValueError(f'Máximo de {MAX_OPERACOES_LOTE} operações por lote')
+    return lote
+
+def _ler_id(valor):
+    if isinstance(valor, bool) or not isinstance(valor, int) or valor <= 0:
+        raise ValueError('id inválido')
+    return valor
+
+def _erro(erros, operacao, indice, mensagem):
+    erros.append({'operacao': operacao, 'indice': indice, 'error': mensagem})
+
+def validar_lote(lote, modelo, colunas, validar_criacao, validar_alteracao, nao_encontrado):
+    # validar_criacao(dados) -> campos; validar_alteracao(dados, atual) -> campos
+    # alterados, onde atual é a linha (id + colunas) lida do banco.
+    # Devolve (plano, erros); o plano só deve ser aplicado sem erros
+    erros = []
+    plano = {'criar': [], 'atualizar': [], 'remover': []}
+
+    for indice, dados in enumerate(lote['criar']):
+        try:
+            if not isinstance(dados, dict):
+                raise ValueError('Item deve ser um objeto')
+            plano['criar'].append(validar_criacao(dados))
+        except ValueError as e:
+            _erro(erros, 'criar', indice, str(e))
+
+    # ids de atualizar/remover, sem repetição no lote
+    alvos = []
+    vistos = set()
+    for operacao in ('atualizar', 'remover'):
+        for indice, item in enumerate(lote[operacao]):
+            try:
+                if operacao == 'atualizar' and not isinstance(item, dict):
+                    raise ValueError('Item deve ser um objeto com id')
+                item_id = _ler_id(item.get('id') if isinstance(item, dict) else item)
+                if item_id in vistos:
+                    raise ValueError('Registro repetido no lote')
+            except ValueError as e:
+                _erro(erros, operacao, indice, str(e))
+                continue
+            vistos.add(item_id)
+            alvos.append((operacao, indice, item_id, item))
+
+    atuais = {}
+    if vistos:
+        atuais = {
+            linha.id: linha
+            for linha in db.session.query(modelo.id, *colunas).filter(modelo.id.in_(vistos))
+        }
+
+    for operacao, indice, item_id, item in alvos:
+        atual = atuais.get(item_id)
+        if atual is None:
+            _erro(erros, operacao, indice, nao_encontrado)
+        elif operacao == 'remover':
+            plano['remover'].append((item_id, atual))
+        else:
+            dados = {campo: valor for campo, valor in item.items() if campo != 'id'}
+            try:
+                plano['atualizar'].append((item_id, validar_alteracao(dados, atual), atual))
+            except ValueError as e:
+                _erro(erros, operacao, indice, str(e))
+
+    erros.sort(key=lambda erro: (OPERACOES_LOTE.index(erro['operacao']), erro['indice']))
+    return plano, erros
+
+def aplicar_lote(modelo, plano):
+    # Executa o plano na sessão atual, sem commit. Os registros do resultado
+    # são serializados aqui, antes do commit expirar os objetos
+    criados = []
+    if plano['criar']:
+        # Um único INSERT ... VALUES (...), (...) RETURNING. O SQLite não garante
+        # a ordem do RETURNING, mas numera as linhas na ordem do VALUES: ordenar
+        # por id devolve a ordem do pedido (sort_by_parameter_order cairia para
+        # um INSERT por linha no SQLite)
+        criados = sorted(
+            db.session.scalars(insert(modelo).returning(modelo), plano['criar']).all(),
+            key=lambda registro: registro.id
+        )
+
+    # Alterações iguais (ex.: concluida=true em várias tarefas) num único UPDATE
+    grupos = defaultdict(list)
+    for item_id, alteracoes, _ in plano['atualizar']:
+        grupos[tuple(sorted(alteracoes.items()))].append(item_id)
+    for alteracoes, ids in grupos.items():
+        db.session.execute(
+            update(modelo).where(modelo.id.in_(ids)).values(dict(alteracoes)),
+            execution_options={'synchronize_session': False}
+        )
+
+    atualizados = []
+    if plano['atualizar']:
+        ids = [item_id for item_id, _, _ in plano['atualizar']]
+        por_id = {registro.id: registro for registro in modelo.query.filter(modelo.id.in_(ids))}
+        atualizados = [por_id[item_id] for item_id in ids if item_id in por_id]
+
+    removidos = [item_id for item_id, _ in plano['remover']]
+    if removidos:
+        db.session.execute(
+            delete(modelo).where(modelo.id.in_(removidos)),
+            execution_options={'synchronize_session': False}
+        )
+
+    return {
+        'criados': [registro.to_dict() for registro in criados],
+        'atualizados': [registro.to_dict() for registro in atualizados],
+        'removidos': removidos
+    }
@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import date, datetime, time
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import and_, or_
+
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 1000
+TAMANHO_LOTE_STREAM = 500
+
+def ler_parametros(args):
+    # Paginação é opcional: sem cursor/limite a listagem continua completa
+    cursor = args.get('cursor')
+    limite = args.get('limite')
+
+    if not cursor and not limite:
+        return False, None, None
+
+    if limite:
+        try:
+            limite = int(limite)
+        except ValueError:
+            raise ValueError('Limite inválido')
+        if limite <= 0:
+            raise ValueError('Limite inválido')
+        limite = min(limite, LIMITE_MAXIMO)
+    else:
+        limite = LIMITE_PADRAO
+
+    return True, cursor, limite
+
+def codificar_cursor(valores):
+    valores = [v.isoformat() if isinstance(v, (date, datetime, time)) else v for v in valores]
+    bruto = json.dumps(valores, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, ordenacao):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+        if not isinstance(valores, list) or len(valores) != len(ordenacao):
+            raise ValueError
+
+        convertidos = []
+        for (coluna, _), valor in zip(ordenacao, valores):
+            tipo = coluna.type.python_type
+            if valor is not None and tipo in (date, datetime, time):
+                valor = tipo.fromisoformat(valor)
+            convertidos.append(valor)
+        return convertidos
+    except (ValueError, TypeError, NotImplementedError):
+        raise ValueError('Cursor inválido')
+
+def _igual(coluna, valor):
+    return coluna.is_(None) if valor is None else coluna == valor
+
+def _depois_de(coluna, descendente, valor):
+    # No SQLite NULL vem antes de qualquer valor em ASC e depois em DESC
+    anulavel = getattr(coluna, 'nullable', True)
+    if valor is None:
+        return None if descendente else coluna.isnot(None)
+    if descendente:
+        return or_(coluna < valor, coluna.is_(None)) if anulavel else coluna < valor
+    return coluna > valor
+
+def filtro_keyset(ordenacao, valores):
+    # (a, b, c) "depois de" (x, y, z) expandido coluna a coluna
+    condicoes = []
+    for i, (coluna, descendente) in enumerate(ordenacao):
+        depois = _depois_de(coluna, descendente, valores[i])
+        if depois is None:
+            continue
+        iguais = [_igual(c, v) for (c, _), v in zip(ordenacao[:i], valores[:i])]
+        condicoes.append(and_(*iguais, depois))
+    return or_(*condicoes)
+
+def ordenar(query, ordenacao):
+    return query.order_by(*[c.desc() if descendente else c.asc() for c, descendente in ordenacao])
+
+def paginar(query, ordenacao, cursor=None, limite=LIMITE_PADRAO):
+    query = ordenar(query, ordenacao)
+    if cursor:
+        query = query.filter(filtro_keyset(ordenacao, decodificar_cursor(cursor, ordenacao)))
+
+    itens = query.limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo_cursor = codificar_cursor([getattr(itens[-1], c.key) for c, _ in ordenacao])
+
+    return itens, proximo_cursor
+
+def resposta_ndjson(query, ordenacao, serializar):
+    # Uma linha JSON por registro, lida do cursor em lotes (memória constante)
+    query = ordenar(query, ordenacao)
+
+    def gerar():
+        for item in query.yield_per(TAMANHO_LOTE_STREAM):
+            yield current_app.json.dumps(serializar(item)) + '\n'
+
+    return Response(stream_with_context(gerar()), mimetype='application/x-ndjson')
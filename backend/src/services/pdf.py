@@ -0,0 +1,322 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from xml.sax.saxutils import escape
+from PIL import Image
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Incrementar quando o layout mudar, para invalidar os PDFs em cache
+VERSAO_LAYOUT = '1'
+
+CACHE_PDF_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'pdf')
+CACHE_PDF_LIMITE_BYTES = int(os.environ.get('CACHE_PDF_LIMITE_MB', 256)) * 1024 * 1024
+CACHE_PDF_IDADE_MINIMA = 3600  # segundos: PDFs usados há menos tempo que isso não são podados
+INTERVALO_PODA_CACHE = 60  # segundos entre podas do cache no mesmo processo
+
+FONTES_TTF = [
+    ('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'),
+    ('/usr/share/fonts/dejavu/DejaVuSans.ttf', '/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf')
+]
+
+COR_DESTAQUE = colors.HexColor('#7c3aed')
+
+LINHAS_POR_TABELA = 50  # lançamentos por tabela no extrato (cerca de uma página)
+
+_poda = {'ultima': 0.0}
+
+# Recursos registrados uma única vez por processo
+_recursos = {
+    'registrados': False,
+    'fonte': 'Helvetica',
+    'fonte_negrito': 'Helvetica-Bold',
+    'logo': None
+}
+
+def registrar_recursos(static_folder=None):
+    if _recursos['registrados']:
+        return
+
+    # Fontes TrueType do sistema, se houver; senão as fontes padrão do PDF
+    for regular, negrito in FONTES_TTF:
+        if os.path.exists(regular) and os.path.exists(negrito):
+            pdfmetrics.registerFont(TTFont('OrbisX', regular))
+            pdfmetrics.registerFont(TTFont('OrbisX-Bold', negrito))
+            _recursos['fonte'] = 'OrbisX'
+            _recursos['fonte_negrito'] = 'OrbisX-Bold'
+            break
+
+    # Logo decodificado uma vez e reaproveitado em todos os PDFs
+    if static_folder is None:
+        static_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+    for nome in ('logo.png', 'favicon.ico'):
+        caminho = os.path.join(static_folder, nome)
+        if os.path.exists(caminho):
+            with Image.open(caminho) as imagem:
+                _recursos['logo'] = ImageReader(imagem.convert('RGBA'))
+            break
+
+    _recursos['registrados'] = True
+
+def formatar_moeda(valor):
+    texto = f'{valor or 0:,.2f}'
+    return 'R$ ' + texto.replace(',', '_').replace('.', ',').replace('_', '.')
+
+def formatar_data(valor_iso):
+    if not valor_iso:
+        return '-'
+    return datetime.fromisoformat(valor_iso).strftime('%d/%m/%Y')
+
+def _texto(valor):
+    # Paragraph interpreta marcação; textos do usuário precisam ser escapados
+    return escape(str(valor))
+
+def _estilos():
+    fonte = _recursos['fonte']
+    fonte_negrito = _recursos['fonte_negrito']
+    return {
+        'titulo': ParagraphStyle('titulo', fontName=fonte_negrito, fontSize=18, leading=22, textColor=COR_DESTAQUE),
+        'subtitulo': ParagraphStyle('subtitulo', fontName=fonte_negrito, fontSize=11, leading=14, spaceBefore=6),
+        'texto': ParagraphStyle('texto', fontName=fonte, fontSize=10, leading=13),
+        'celula': ParagraphStyle('celula', fontName=fonte, fontSize=9, leading=11)
+    }
+
+def _desenhar_logo(canvas, documento):
+    logo = _recursos['logo']
+    if logo is None:
+        return
+    largura, altura = documento.pagesize
+    tamanho = 14 * mm
+    canvas.drawImage(
+        logo, largura - documento.rightMargin - tamanho, altura - documento.topMargin - tamanho + 4 * mm,
+        width=tamanho, height=tamanho, mask='auto'
+    )
+
+def _tabela_estilo(fonte_negrito):
+    return TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), fonte_negrito),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BACKGROUND', (0, 0), (-1, 0), COR_DESTAQUE),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f3f0fb')]),
+        ('LINEBELOW', (0, -1), (-1, -1), 0.5, colors.grey)
+    ])
+
+def renderizar_orcamento(dados):
+    # dados: resultado de Orcamento.to_dict(); função pura para poder rodar em outro processo
+    registrar_recursos()
+    estilos = _estilos()
+    buffer = io.BytesIO()
+    documento = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=18 * mm, rightMargin=18 * mm, topMargin=16 * mm, bottomMargin=16 * mm,
+        title=f"Orçamento {dados['id']}"
+    )
+
+    elementos = [Paragraph(f"Orçamento #{dados['id']}", estilos['titulo'])]
+    elementos.append(Spacer(1, 6 * mm))
+    elementos.append(Paragraph(_texto(dados['titulo']), estilos['subtitulo']))
+    elementos.append(Paragraph(f"Cliente: {_texto(dados['cliente'])}", estilos['texto']))
+    elementos.append(Paragraph(f"Data: {formatar_data(dados['data_criacao'])}", estilos['texto']))
+    if dados.get('prazo_entrega'):
+        elementos.append(Paragraph(f"Prazo de entrega: {formatar_data(dados['prazo_entrega'])}", estilos['texto']))
+    if dados.get('forma_pagamento'):
+        elementos.append(Paragraph(f"Forma de pagamento: {_texto(dados['forma_pagamento'])}", estilos['texto']))
+    if dados.get('descricao'):
+        elementos.append(Spacer(1, 3 * mm))
+        elementos.append(Paragraph(_texto(dados['descricao']), estilos['texto']))
+
+    elementos.append(Spacer(1, 6 * mm))
+    linhas = [['Serviço', 'Qtd.', 'Preço unitário', 'Subtotal']]
+    for servico in dados['servicos']:
+        linhas.append([
+            Paragraph(_texto(servico['nome']), estilos['celula']),
+            servico['quantidade'],
+            formatar_moeda(servico['preco_unitario']),
+            formatar_moeda(servico['subtotal'])
+        ])
+    linhas.append(['', '', 'Total', formatar_moeda(dados['valor_total'])])
+
+    tabela = Table(linhas, colWidths=[None, 15 * mm, 35 * mm, 35 * mm], repeatRows=1)
+    estilo = _tabela_estilo(_recursos['fonte_negrito'])
+    estilo.add('FONTNAME', (0, 1), (-1, -1), _recursos['fonte'])
+    estilo.add('FONTNAME', (2, -1), (-1, -1), _recursos['fonte_negrito'])
+    tabela.setStyle(estilo)
+    elementos.append(tabela)
+
+    documento.build(elementos, onFirstPage=_desenhar_logo, onLaterPages=_desenhar_logo)
+    return buffer.getvalue()
+
+def renderizar_extrato(dados):
+    # dados: {'data_inicio', 'data_fim', 'resumo': calcular_resumo(...), 'lancamentos': iterável}
+    registrar_recursos()
+    estilos = _estilos()
+    buffer = io.BytesIO()
+    documento = _DocumentoEmFluxo(
+        buffer, pagesize=A4,
+        leftMargin=18 * mm, rightMargin=18 * mm, topMargin=16 * mm, bottomMargin=16 * mm,
+        title='Extrato financeiro'
+    )
+
+    resumo = dados['resumo']
+    elementos = [Paragraph('Extrato financeiro', estilos['titulo'])]
+    elementos.append(Spacer(1, 4 * mm))
+    elementos.append(Paragraph(
+        f"Período: {formatar_data(dados.get('data_inicio'))} a {formatar_data(dados.get('data_fim'))}",
+        estilos['texto']
+    ))
+    elementos.append(Paragraph(f"Entradas: {formatar_moeda(resumo['total_entradas'])}", estilos['texto']))
+    elementos.append(Paragraph(f"Saídas: {formatar_moeda(resumo['total_saidas'])}", estilos['texto']))
+    elementos.append(Paragraph(f"Saldo: {formatar_moeda(resumo['total_caixa'])}", estilos['subtitulo']))
+
+    elementos.append(Spacer(1, 6 * mm))
+    elementos.append(Paragraph('Por categoria', estilos['subtitulo']))
+    linhas = [['Categoria', 'Entradas', 'Saídas']]
+    for categoria, valores in sorted(resumo['categorias'].items()):
+        linhas.append([
+            Paragraph(_texto(categoria), estilos['celula']),
+            formatar_moeda(valores['entrada']),
+            formatar_moeda(valores['saida'])
+        ])
+    tabela = Table(linhas, colWidths=[None, 35 * mm, 35 * mm], repeatRows=1)
+    tabela.setStyle(_tabela_estilo(_recursos['fonte_negrito']))
+    elementos.append(tabela)
+
+    elementos.append(Spacer(1, 6 * mm))
+    elementos.append(Paragraph('Lançamentos', estilos['subtitulo']))
+
+    documento.restantes = _tabelas_lancamentos(dados['lancamentos'], estilos)
+    documento.build(elementos, onFirstPage=_desenhar_logo, onLaterPages=_desenhar_logo)
+    return buffer.getvalue()
+
+def _tabelas_lancamentos(lancamentos, estilos):
+    # Uma tabela, com cabeçalho, a cada LINHAS_POR_TABELA lançamentos
+    estilo = _tabela_estilo(_recursos['fonte_negrito'])
+    estilo.add('FONTNAME', (0, 1), (-1, -1), _recursos['fonte'])
+    estilo.add('ALIGN', (1, 0), (2, -1), 'LEFT')
+    cabecalho = ['Data', 'Categoria', 'Descrição', 'Valor']
+    linhas = [cabecalho]
+    vazio = True
+    for lancamento in lancamentos:
+        sinal = '-' if lancamento['tipo'] == 'saida' else ''
+        linhas.append([
+            formatar_data(lancamento['data']),
+            Paragraph(_texto(lancamento['categoria']), estilos['celula']),
+            Paragraph(_texto(lancamento['descricao'] or ''), estilos['celula']),
+            sinal + formatar_moeda(lancamento['valor'])
+        ])
+        if len(linhas) > LINHAS_POR_TABELA:
+            yield _tabela_lancamentos(linhas, estilo)
+            linhas = [cabecalho]
+            vazio = False
+    if len(linhas) > 1 or vazio:
+        yield _tabela_lancamentos(linhas, estilo)
+
+def _tabela_lancamentos(linhas, estilo):
+    tabela = Table(linhas, colWidths=[22 * mm, 40 * mm, None, 32 * mm], repeatRows=1)
+    tabela.setStyle(estilo)
+    return tabela
+
+class _DocumentoEmFluxo(SimpleDocTemplate):
+    # O ReportLab consome a story pela frente e chama filterFlowables antes
+    # de cada flowable: quando só resta o último, a próxima tabela é puxada
+    # de restantes. Só a tabela da vez fica em memória, não o período inteiro.
+    # (_hanging é a fila interna de ações de página, que passa pelo mesmo método)
+    restantes = iter(())
+
+    def filterFlowables(self, flowables):
+        if flowables is not self._hanging and len(flowables) <= 1:
+            proxima = next(self.restantes, None)
+            if proxima is not None:
+                flowables.append(proxima)
+
+def chave_cache(tipo, dados):
+    conteudo = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f'{tipo}:{VERSAO_LAYOUT}:{conteudo}'.encode('utf-8')).hexdigest()
+
+def caminho_cache(chave):
+    return os.path.join(CACHE_PDF_FOLDER, f'{chave}.pdf')
+
+def usar_cache(chave):
+    # Caminho do PDF em cache, ou None. O acerto atualiza o mtime, que é a
+    # ordem de uso considerada pela poda (LRU)
+    caminho = caminho_cache(chave)
+    try:
+        os.utime(caminho)
+    except OSError:
+        return None
+    return caminho
+
+def salvar_cache(chave, conteudo):
+    # Escrita atômica: outro worker nunca lê um PDF pela metade
+    os.makedirs(CACHE_PDF_FOLDER, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=CACHE_PDF_FOLDER, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, caminho_cache(chave))
+    except Exception:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+    agora = time.monotonic()
+    if agora - _poda['ultima'] >= INTERVALO_PODA_CACHE:
+        _poda['ultima'] = agora
+        podar_cache()
+    return caminho_cache(chave)
+
+def podar_cache():
+    # Cada orçamento editado gera um PDF novo (a chave é o hash do conteúdo):
+    # passando de CACHE_PDF_LIMITE_BYTES, os usados há mais tempo são
+    # apagados, nunca os usados na última CACHE_PDF_IDADE_MINIMA (podem estar
+    # sendo enviados). Temporários de escritas interrompidas também saem
+    agora = time.time()
+    arquivos = []
+    total = 0
+    for entrada in os.scandir(CACHE_PDF_FOLDER):
+        try:
+            info = entrada.stat()
+        except OSError:
+            continue
+        if entrada.name.endswith('.tmp'):
+            if agora - info.st_mtime > CACHE_PDF_IDADE_MINIMA:
+                _remover(entrada.path)
+            continue
+        arquivos.append((info.st_mtime, info.st_size, entrada.path))
+        total += info.st_size
+
+    removidos = 0
+    arquivos.sort()
+    for modificado, tamanho, caminho in arquivos:
+        if total <= CACHE_PDF_LIMITE_BYTES or agora - modificado < CACHE_PDF_IDADE_MINIMA:
+            break
+        _remover(caminho)
+        total -= tamanho
+        removidos += 1
+    return removidos
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+def obter_pdf_orcamento(dados):
+    # Reaproveita o PDF se o conteúdo serializado do orçamento não mudou
+    chave = chave_cache('orcamento', dados)
+    return usar_cache(chave) or salvar_cache(chave, renderizar_orcamento(dados))
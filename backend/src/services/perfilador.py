@@ -0,0 +1,223 @@
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request
+
+# Perfilador por amostragem sob demanda: uma vez armado (POST /api/_perfilador),
+# as próximas N requisições de uma rota são amostradas por uma thread que lê a
+# pilha da thread da requisição a cada intervalo. O resultado é um arquivo de
+# pilhas colapsadas ("f1;f2;f3 contagem"), aceito por flamegraph.pl e speedscope.
+#
+# O estado fica em arquivo (com flock) para valer em todos os workers do
+# gunicorn: qualquer worker pode armar, atender as requisições e baixar o
+# resultado. Com PERFILADOR desligado nenhum hook é registrado.
+
+PERFILADOR_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'perfilador')
+ARQUIVO_ESTADO = os.path.join(PERFILADOR_FOLDER, 'armado.json')
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+MAX_REQUISICOES_PERFIL = 1000
+INTERVALO_VERIFICACAO = 1.0  # segundos entre leituras do arquivo de estado por processo
+
+# Estado lido do arquivo, reaproveitado por até INTERVALO_VERIFICACAO
+_cache = {'estado': None, 'lido_em': 0.0}
+
+# Amostrador da requisição corrente; chega às threads auxiliares (dashboard)
+# pelo contexto copiado com contextvars.copy_context()
+_amostrador = ContextVar('amostrador', default=None)
+
+def _arquivo_codigo(caminho):
+    if caminho.startswith(BACKEND_DIR):
+        return os.path.relpath(caminho, BACKEND_DIR)
+    _, separador, resto = caminho.partition('site-packages' + os.sep)
+    return resto if separador else os.path.basename(caminho)
+
+class Amostrador(threading.Thread):
+    def __init__(self, thread_alvo, intervalo):
+        super().__init__(name='perfilador', daemon=True)
+        self.threads = {thread_alvo}
+        self.intervalo = intervalo
+        self.amostras = Counter()
+        self.parar = threading.Event()
+
+    def run(self):
+        while not self.parar.wait(self.intervalo):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                pilha = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    pilha.append(f'{codigo.co_name} ({_arquivo_codigo(codigo.co_filename)}:{codigo.co_firstlineno})')
+                    frame = frame.f_back
+                if pilha:
+                    self.amostras[';'.join(reversed(pilha))] += 1
+
+    def encerrar(self):
+        self.parar.set()
+        self.join()
+        return self.amostras
+
+@contextmanager
+def acompanhar_thread():
+    # Inclui a thread atual na amostragem da requisição que a disparou
+    amostrador = _amostrador.get()
+    if amostrador is None:
+        yield
+        return
+    ident = threading.get_ident()
+    amostrador.threads.add(ident)
+    try:
+        yield
+    finally:
+        amostrador.threads.discard(ident)
+
+def _caminho_resultado(perfil_id):
+    return os.path.join(PERFILADOR_FOLDER, f'{perfil_id}.folded')
+
+def ler_estado():
+    try:
+        with open(ARQUIVO_ESTADO, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+def armar(rota, requisicoes, intervalo_ms):
+    if not rota.startswith('/'):
+        raise ValueError('Rota inválida')
+    if not 1 <= requisicoes <= MAX_REQUISICOES_PERFIL:
+        raise ValueError(f'requisicoes deve estar entre 1 e {MAX_REQUISICOES_PERFIL}')
+    if not 1 <= intervalo_ms <= 1000:
+        raise ValueError('intervalo_ms deve estar entre 1 e 1000')
+
+    estado = {
+        'id': uuid.uuid4().hex[:12],
+        'rota': rota,
+        'requisicoes': requisicoes,
+        'restantes': requisicoes,
+        'intervalo_ms': intervalo_ms,
+        'data_criacao': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    os.makedirs(PERFILADOR_FOLDER, exist_ok=True)
+    with open(ARQUIVO_ESTADO, 'a+', encoding='utf-8') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        arquivo.seek(0)
+        arquivo.truncate()
+        json.dump(estado, arquivo)
+    _cache['estado'] = estado
+    return estado
+
+def desarmar():
+    try:
+        os.remove(ARQUIVO_ESTADO)
+    except FileNotFoundError:
+        pass
+    _cache['estado'] = None
+
+def _estado_em_cache():
+    agora = time.monotonic()
+    if agora - _cache['lido_em'] >= INTERVALO_VERIFICACAO:
+        _cache['estado'] = ler_estado()
+        _cache['lido_em'] = agora
+    return _cache['estado']
+
+def _reivindicar(rota, caminho):
+    # Decrementa "restantes" sob flock; devolve o estado se esta requisição será amostrada
+    try:
+        arquivo = open(ARQUIVO_ESTADO, 'r+', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    with arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            estado = json.load(arquivo)
+        except ValueError:
+            return None
+        if estado['restantes'] <= 0 or estado['rota'] not in (rota, caminho):
+            _cache['estado'] = estado
+            return None
+        estado['restantes'] -= 1
+        arquivo.seek(0)
+        arquivo.truncate()
+        json.dump(estado, arquivo)
+    _cache['estado'] = estado
+    return estado
+
+def _gravar_amostras(perfil_id, amostras):
+    if not amostras:
+        return
+    with open(_caminho_resultado(perfil_id), 'a', encoding='utf-8') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        arquivo.writelines(f'{pilha} {contagem}\n' for pilha, contagem in amostras.items())
+
+def obter_resultado(perfil_id):
+    # Junta as linhas gravadas por todos os workers; None se o perfil não existe
+    caminho = _caminho_resultado(perfil_id)
+    if not perfil_id.isalnum() or not os.path.exists(caminho):
+        return None
+    total = Counter()
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            pilha, _, contagem = linha.rstrip('\n').rpartition(' ')
+            if pilha and contagem.isdigit():
+                total[pilha] += int(contagem)
+    return ''.join(f'{pilha} {contagem}\n' for pilha, contagem in sorted(total.items()))
+
+def contar_amostras(perfil_id):
+    caminho = _caminho_resultado(perfil_id)
+    if not os.path.exists(caminho):
+        return 0
+    with open(caminho, encoding='utf-8') as arquivo:
+        return sum(int(linha.rsplit(' ', 1)[1]) for linha in arquivo if linha.strip())
+
+def registrar_perfilador(app):
+    if not app.config['PERFILADOR']:
+        return
+
+    @app.before_request
+    def iniciar_perfil():
+        estado = _estado_em_cache()
+        if estado is None or estado['restantes'] <= 0 or request.path.startswith('/api/_perfilador'):
+            return None
+        rota = request.url_rule.rule if request.url_rule is not None else None
+        if estado['rota'] not in (rota, request.path):
+            return None
+
+        estado = _reivindicar(rota, request.path)
+        if estado is None:
+            return None
+        amostrador = Amostrador(threading.get_ident(), estado['intervalo_ms'] / 1000)
+        amostrador.start()
+        _amostrador.set(amostrador)
+        request.environ['perfilador'] = (estado['id'], amostrador)
+        return None
+
+    @app.after_request
+    def encerrar_perfil(resposta):
+        perfil = request.environ.pop('perfilador', None)
+        if perfil is None:
+            return resposta
+        perfil_id, amostrador = perfil
+
+        def finalizar():
+            # Quando o corpo termina de ser enviado (inclui streaming)
+            _amostrador.set(None)
+            _gravar_amostras(perfil_id, amostrador.encerrar())
+
+        resposta.call_on_close(finalizar)
+        return resposta
+
+    @app.teardown_request
+    def descartar_perfil(erro):
+        # Exceção sem resposta (after_request não rodou): só para a thread
+        perfil = request.environ.pop('perfilador', None)
+        if perfil is not None:
+            _amostrador.set(None)
+            perfil[1].encerrar()
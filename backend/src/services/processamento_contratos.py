@@ -0,0 +1,91 @@
+import io
+import os
+import tempfile
+import pypdfium2 as pdfium
+from src.models.user import db
+from src.models.contrato import Contrato
+from src.services.jobs import tipo_job, obter_pool, aguardar
+
+# Pós-processamento dos PDFs de contratos, executado pela fila de jobs:
+# texto extraído (indexado em contratos_fts) e miniatura PNG da primeira
+# página. Os resultados ficam em cache em disco pela chave do arquivo
+# (SHA-256), então PDFs idênticos são processados uma única vez.
+
+CACHE_CONTRATOS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'contratos')
+
+LIMITE_TEXTO = 200000  # caracteres guardados por contrato
+LARGURA_MINIATURA = 240
+
+def chave_arquivo(contrato):
+    # Contratos anteriores ao armazenamento por hash usam o id como chave
+    return contrato.hash_arquivo or f'contrato_{contrato.id}'
+
+def caminho_texto(chave):
+    return os.path.join(CACHE_CONTRATOS_FOLDER, f'{chave}.txt')
+
+def caminho_miniatura(chave):
+    return os.path.join(CACHE_CONTRATOS_FOLDER, f'{chave}.png')
+
+def _gravar(caminho, conteudo):
+    os.makedirs(CACHE_CONTRATOS_FOLDER, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=CACHE_CONTRATOS_FOLDER, suffix='.tmp')
+    with os.fdopen(descritor, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+def _processar_com_pdfium(caminho):
+    documento = pdfium.PdfDocument(caminho)
+    try:
+        partes = []
+        imagem = None
+        for indice in range(len(documento)):
+            pagina = documento[indice]
+            pagina_texto = pagina.get_textpage()
+            partes.append(pagina_texto.get_text_bounded())
+            pagina_texto.close()
+            if indice == 0:
+                escala = LARGURA_MINIATURA / pagina.get_width()
+                imagem = pagina.render(scale=escala).to_pil().convert('RGB')
+            pagina.close()
+            if sum(len(parte) for parte in partes) >= LIMITE_TEXTO:
+                break
+        if imagem is None:
+            raise ValueError('PDF sem páginas')
+        return '\n'.join(partes), imagem
+    finally:
+        documento.close()
+
+def processar_pdf(caminho, chave):
+    # Função pura (roda no ProcessPoolExecutor); devolve o texto extraído
+    destino_texto = caminho_texto(chave)
+    destino_miniatura = caminho_miniatura(chave)
+    if os.path.exists(destino_texto) and os.path.exists(destino_miniatura):
+        with open(destino_texto, encoding='utf-8') as arquivo:
+            return arquivo.read()
+
+    # PDF que o pdfium não abre faz o job falhar (status 'erro')
+    texto, imagem = _processar_com_pdfium(caminho)
+
+    texto = texto[:LIMITE_TEXTO]
+    buffer = io.BytesIO()
+    imagem.save(buffer, format='PNG', optimize=True)
+    _gravar(destino_miniatura, buffer.getvalue())
+    _gravar(destino_texto, texto.encode('utf-8'))
+    return texto
+
+@tipo_job('processar_contrato')
+def processar_contrato(job, progresso):
+    contrato = db.session.get(Contrato, job.obter_parametros().get('contrato_id'))
+    if contrato is None or not contrato.caminho_arquivo or not os.path.exists(contrato.caminho_arquivo):
+        raise ValueError('Contrato ou arquivo não encontrado')
+
+    progresso.definir_total(1)
+    chave = chave_arquivo(contrato)
+    futuro = obter_pool().submit(processar_pdf, contrato.caminho_arquivo, chave)
+    aguardar([futuro], progresso)
+    texto = futuro.result()
+
+    # O trigger de contratos_fts indexa o texto junto com o commit do progresso
+    contrato.texto_extraido = texto
+    progresso.avancar()
+    return caminho_miniatura(chave)
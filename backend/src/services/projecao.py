@@ -0,0 +1,114 @@
+from src.models.lancamento import Lancamento
+from src.models.orcamento import Orcamento
+from src.models.contrato import Contrato
+from src.models.tarefa import Tarefa
+
+# Projeção de colunas nas listagens (?fields=id,titulo,cliente): só as
+# colunas pedidas vão para o SELECT e cada linha (tupla do Core, sem montar
+# a entidade do ORM) vira um dict pela tabela de chaves e conversores
+# pré-calculada para aquela combinação de campos. O custo de leitura e de
+# serialização cresce com o número de campos pedidos, não com o modelo.
+#
+# As chaves e formatos são os mesmos do to_dict() de cada modelo. Os
+# serviços do orçamento (relação) ficam de fora: para eles, liste sem fields.
+
+def _iso(valor):
+    return valor.isoformat()
+
+def _hora_minuto(valor):
+    return valor.strftime('%H:%M')
+
+# campo -> (coluna, conversor ou None), na ordem do to_dict()
+CAMPOS = {
+    Lancamento: {
+        'id': (Lancamento.id, None),
+        'tipo': (Lancamento.tipo, None),
+        'valor': (Lancamento.valor, None),
+        'data': (Lancamento.data, _iso),
+        'categoria': (Lancamento.categoria, None),
+        'descricao': (Lancamento.descricao, None),
+        'data_criacao': (Lancamento.data_criacao, _iso)
+    },
+    Orcamento: {
+        'id': (Orcamento.id, None),
+        'titulo': (Orcamento.titulo, None),
+        'cliente': (Orcamento.cliente, None),
+        'descricao': (Orcamento.descricao, None),
+        'forma_pagamento': (Orcamento.forma_pagamento, None),
+        'prazo_entrega': (Orcamento.prazo_entrega, _iso),
+        'status': (Orcamento.status, None),
+        'data_criacao': (Orcamento.data_criacao, _iso),
+        'valor_total': (Orcamento.valor_total, None)
+    },
+    Contrato: {
+        'id': (Contrato.id, None),
+        'titulo': (Contrato.titulo, None),
+        'cliente': (Contrato.cliente, None),
+        'valor': (Contrato.valor, None),
+        'data_inicio': (Contrato.data_inicio, _iso),
+        'data_fim': (Contrato.data_fim, _iso),
+        'observacoes': (Contrato.observacoes, None),
+        'nome_arquivo': (Contrato.nome_arquivo, None),
+        'hash_arquivo': (Contrato.hash_arquivo, None),
+        'data_upload': (Contrato.data_upload, _iso)
+    },
+    Tarefa: {
+        'id': (Tarefa.id, None),
+        'titulo': (Tarefa.titulo, None),
+        'tipo': (Tarefa.tipo, None),
+        'data': (Tarefa.data, _iso),
+        'horario': (Tarefa.horario, _hora_minuto),
+        'cliente': (Tarefa.cliente, None),
+        'local': (Tarefa.local, None),
+        'descricao': (Tarefa.descricao, None),
+        'concluida': (Tarefa.concluida, None),
+        'data_criacao': (Tarefa.data_criacao, _iso)
+    }
+}
+
+# Projeções já montadas, por (modelo, campos)
+_projecoes = {}
+
+class Projecao:
+    def __init__(self, modelo, campos):
+        tabela = CAMPOS[modelo]
+        self.chaves = campos
+        self.colunas = [tabela[campo][0] for campo in campos]
+        self.conversores = [(campo, tabela[campo][1]) for campo in campos if tabela[campo][1] is not None]
+
+    def aplicar(self, query, ordenacao):
+        # Colunas da ordenação entram no SELECT (depois das pedidas) para o
+        # cursor do keyset; a serialização para nas chaves pedidas
+        extras = [coluna for coluna, _ in ordenacao if coluna.key not in self.chaves]
+        return query.with_entities(*self.colunas, *extras)
+
+    def serializar(self, linha):
+        registro = dict(zip(self.chaves, linha))
+        for campo, conversor in self.conversores:
+            valor = registro[campo]
+            if valor is not None:
+                registro[campo] = conversor(valor)
+        return registro
+
+def ler_projecao(args, modelo):
+    # Devolve a Projecao pedida em fields, None sem o parâmetro,
+    # ou levanta ValueError com a mensagem de erro
+    bruto = args.get('fields')
+    if bruto is None:
+        return None
+
+    pedidos = {campo.strip() for campo in bruto.split(',') if campo.strip()}
+    if not pedidos:
+        raise ValueError('Nenhum campo informado em fields')
+    invalidos = sorted(pedidos - CAMPOS[modelo].keys())
+    if invalidos:
+        raise ValueError(f'Campos inválidos: {", ".join(invalidos)}')
+
+    # Ordem do modelo: no máximo uma projeção por subconjunto de campos
+    campos = tuple(campo for campo in CAMPOS[modelo] if campo in pedidos)
+
+    chave = (modelo, campos)
+    projecao = _projecoes.get(chave)
+    if projecao is None:
+        projecao = _projecoes[chave] = Projecao(modelo, campos)
+    return projecao
@@ -0,0 +1,237 @@
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy.exc import OperationalError
+from src.database import AUTO_VACUUM_INCREMENTAL
+from src.models.user import db
+from src.models.orcamento import Orcamento, ServicoOrcamento
+from src.models.contrato import Contrato, ArquivoContrato
+from src.services.armazenamento import caminho_arquivo
+from src.services.entrega_arquivos import esquecer_stat
+from src.services.jobs import tipo_job
+from src.services.processamento_contratos import caminho_texto, caminho_miniatura
+
+logger = logging.getLogger(__name__)
+
+# Remoção em massa de orçamentos e contratos por filtro. Cada lote é uma
+# transação curta (o lock de escrita do SQLite fica livre entre lotes); os
+# DELETEs passam pela sessão, então versoes_tabelas e os triggers de FTS
+# acompanham. Arquivos de contratos que ficam sem referência são apagados
+# depois do commit do lote. No fim, o espaço livre é devolvido ao disco.
+
+TAMANHO_LOTE_PURGA = 500
+RECURSOS_PURGA = ['orcamentos', 'contratos']
+STATUS_ORCAMENTO = ['pendente', 'enviado', 'aceito', 'rejeitado']
+MODOS_VACUUM = ['incremental', 'nenhum']
+
+def _data(valor, campo):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+    except ValueError:
+        raise ValueError(f'Formato de data inválido para {campo}')
+
+def validar_filtros(recurso, dados):
+    # Devolve os filtros normalizados (serializáveis em JSON) ou levanta ValueError
+    if recurso not in RECURSOS_PURGA:
+        raise ValueError('Recurso inválido')
+
+    filtros = {
+        'data_inicio': (dados.get('data_inicio') or '').strip() or None,
+        'data_fim': (dados.get('data_fim') or '').strip() or None,
+        'status': (dados.get('status') or '').strip() or None,
+        'cliente': (dados.get('cliente') or '').strip() or None
+    }
+    data_inicio = _data(filtros['data_inicio'], 'data_inicio')
+    data_fim = _data(filtros['data_fim'], 'data_fim')
+    if data_inicio and data_fim and data_fim < data_inicio:
+        raise ValueError('Data de fim deve ser posterior à data de início')
+
+    if filtros['status']:
+        if recurso != 'orcamentos':
+            raise ValueError('Filtro de status só se aplica a orçamentos')
+        if filtros['status'] not in STATUS_ORCAMENTO:
+            raise ValueError('Status inválido')
+
+    # Sem nenhum filtro a purga apaga a tabela inteira: só com confirmação explícita
+    if not any(filtros.values()) and not dados.get('todos'):
+        raise ValueError('Informe ao menos um filtro ou "todos": true')
+
+    vacuum = dados.get('vacuum') or 'incremental'
+    if vacuum not in MODOS_VACUUM:
+        raise ValueError('Modo de vacuum inválido')
+    filtros['vacuum'] = vacuum
+    return filtros
+
+def _condicoes(recurso, filtros):
+    data_inicio = _data(filtros.get('data_inicio'), 'data_inicio')
+    data_fim = _data(filtros.get('data_fim'), 'data_fim')
+
+    if recurso == 'orcamentos':
+        condicoes = []
+        if data_inicio:
+            condicoes.append(Orcamento.data_criacao >= data_inicio)
+        if data_fim:
+            condicoes.append(Orcamento.data_criacao < data_fim + timedelta(days=1))
+        if filtros.get('status'):
+            condicoes.append(Orcamento.status == filtros['status'])
+        if filtros.get('cliente'):
+            condicoes.append(Orcamento.cliente.ilike(f"%{filtros['cliente']}%"))
+        return condicoes
+
+    # Contratos: mesmo critério de datas da listagem (vigência dentro do período)
+    condicoes = []
+    if data_inicio:
+        condicoes.append(Contrato.data_inicio >= data_inicio)
+    if data_fim:
+        condicoes.append(Contrato.data_fim <= data_fim)
+    if filtros.get('cliente'):
+        condicoes.append(Contrato.cliente.ilike(f"%{filtros['cliente']}%"))
+    return condicoes
+
+def contar(recurso, filtros):
+    modelo = Orcamento if recurso == 'orcamentos' else Contrato
+    return db.session.query(db.func.count(modelo.id)).filter(*_condicoes(recurso, filtros)).scalar()
+
+def _lote_orcamentos(condicoes):
+    ids = [linha[0] for linha in db.session.query(Orcamento.id).filter(*condicoes).order_by(Orcamento.id).limit(TAMANHO_LOTE_PURGA)]
+    if not ids:
+        return 0, [], []
+
+    # Mesmo efeito do cascade delete-orphan, sem carregar os objetos
+    db.session.execute(
+        db.delete(ServicoOrcamento).where(ServicoOrcamento.orcamento_id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.delete(Orcamento).where(Orcamento.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    return len(ids), [], []
+
+def _lote_contratos(condicoes):
+    linhas = db.session.query(Contrato.id, Contrato.hash_arquivo, Contrato.caminho_arquivo).filter(
+        *condicoes
+    ).order_by(Contrato.id).limit(TAMANHO_LOTE_PURGA).all()
+    if not linhas:
+        return 0, [], []
+
+    ids = [contrato_id for contrato_id, _, _ in linhas]
+    db.session.execute(
+        db.delete(Contrato).where(Contrato.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+
+    # Uma atualização por hash, descontando todas as referências do lote
+    # (equivalente a remover_referencia chamado uma vez por contrato)
+    referencias = Counter(hash_arquivo for _, hash_arquivo, _ in linhas if hash_arquivo)
+    for hash_arquivo, quantidade in referencias.items():
+        db.session.execute(
+            db.update(ArquivoContrato)
+            .where(ArquivoContrato.hash == hash_arquivo)
+            .values(referencias=ArquivoContrato.referencias - quantidade)
+        )
+    orfaos = []
+    if referencias:
+        orfaos = [linha[0] for linha in db.session.execute(
+            db.delete(ArquivoContrato)
+            .where(ArquivoContrato.hash.in_(list(referencias)), ArquivoContrato.referencias <= 0)
+            .returning(ArquivoContrato.hash)
+        )]
+
+    # Arquivos a apagar após o commit. Contratos antigos (sem hash) têm arquivo
+    # e cache exclusivos; os hashes órfãos passam por _apagar_orfaos
+    arquivos = []
+    for contrato_id, hash_arquivo, caminho in linhas:
+        if not hash_arquivo:
+            chave = f'contrato_{contrato_id}'
+            arquivos += [caminho, caminho_texto(chave), caminho_miniatura(chave)]
+    return len(ids), [arquivo for arquivo in arquivos if arquivo], orfaos
+
+def _apagar_arquivos(arquivos):
+    apagados = 0
+    for arquivo in arquivos:
+        try:
+            os.remove(arquivo)
+            apagados += 1
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.warning('Não foi possível apagar %s', arquivo)
+    esquecer_stat(*arquivos)
+    return apagados
+
+def _apagar_orfaos(hashes):
+    # PDFs sem referência e o cache derivado deles. Um upload do mesmo conteúdo
+    # pode ter recriado a referência depois do commit do lote: a contagem é
+    # conferida de novo com o lock de escrita (BEGIN IMMEDIATE) mantido até os
+    # arquivos serem apagados. O upload só move o arquivo depois do próprio
+    # commit, então ou ele aparece aqui ou já encontra o arquivo apagado.
+    if not hashes:
+        return 0
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        conexao.exec_driver_sql('BEGIN IMMEDIATE')
+        try:
+            referenciados = set(conexao.execute(
+                db.select(ArquivoContrato.hash).where(ArquivoContrato.hash.in_(hashes))
+            ).scalars())
+            arquivos = []
+            for hash_arquivo in hashes:
+                if hash_arquivo not in referenciados:
+                    arquivos += [caminho_arquivo(hash_arquivo), caminho_texto(hash_arquivo), caminho_miniatura(hash_arquivo)]
+            return _apagar_arquivos(arquivos)
+        finally:
+            conexao.exec_driver_sql('COMMIT')
+
+def compactar(modo='incremental'):
+    # Só o incremental_vacuum, que devolve as páginas livres sem reescrever o
+    # arquivo. A conversão para auto_vacuum=INCREMENTAL (VACUUM completo, lock
+    # de escrita durante toda a reescrita) fica em migrar_esquema; sem ela a
+    # purga não compacta. PRAGMA fora de transação: conexão em autocommit
+    if modo == 'nenhum':
+        return 'nenhum'
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        if conexao.exec_driver_sql('PRAGMA auto_vacuum').scalar() != AUTO_VACUUM_INCREMENTAL:
+            return 'nenhum'
+        conexao.exec_driver_sql('PRAGMA incremental_vacuum')
+        return 'incremental'
+
+def purgar(recurso, filtros, ao_avancar=None):
+    # filtros já validados por validar_filtros; ao_avancar(n) é chamado a cada lote
+    condicoes = _condicoes(recurso, filtros)
+    apagar_lote = _lote_orcamentos if recurso == 'orcamentos' else _lote_contratos
+    resultado = {'removidos': 0, 'arquivos_removidos': 0}
+
+    while True:
+        try:
+            quantidade, arquivos, orfaos = apagar_lote(condicoes)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if not quantidade:
+            break
+        resultado['removidos'] += quantidade
+        resultado['arquivos_removidos'] += _apagar_arquivos(arquivos) + _apagar_orfaos(orfaos)
+        if ao_avancar is not None:
+            ao_avancar(quantidade)
+
+    # A compactação é só um bônus: as linhas já foram apagadas e gravadas, então
+    # um VACUUM que esbarra em outra escrita ("database is locked") fica no log
+    # e não transforma a purga em erro
+    if resultado['removidos']:
+        try:
+            resultado['vacuum'] = compactar(filtros.get('vacuum', 'incremental'))
+        except OperationalError:
+            logger.warning('Compactação do banco após a purga falhou', exc_info=True)
+            resultado['vacuum'] = 'falhou'
+    return resultado
+
+@tipo_job('purga')
+def executar_purga(job, progresso):
+    parametros = job.obter_parametros()
+    recurso, filtros = parametros['recurso'], parametros['filtros']
+    progresso.definir_total(contar(recurso, filtros))
+    resultado = purgar(recurso, filtros, progresso.avancar)
+    logger.info('Purga de %s (job %s): %s', recurso, job.id, resultado)
+    return None
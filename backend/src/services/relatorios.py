@@ -0,0 +1,126 @@
+import os
+import zipfile
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import NullPool
+from src.models.user import db
+from src.models.lancamento import Lancamento
+from src.models.orcamento import Orcamento
+from src.services.agregacao_lancamentos import calcular_resumo
+from src.services.jobs import tipo_job, obter_pool, aguardar, caminho_resultado, temporario_resultado
+from src.services.pdf import (
+    renderizar_orcamento, renderizar_extrato, chave_cache, usar_cache, salvar_cache
+)
+
+TAMANHO_LOTE = 200  # orçamentos carregados do banco por vez
+JANELA_PROCESSOS = 32  # PDFs em renderização simultânea no pool
+
+def _data(valor):
+    return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+
+def _drenar(pendentes, arquivo_zip, progresso, todos=False):
+    # Grava no ZIP os PDFs já renderizados, à medida que ficam prontos
+    while pendentes:
+        feitos = aguardar(list(pendentes), progresso)
+        for futuro in feitos:
+            chave, nome = pendentes.pop(futuro)
+            conteudo = futuro.result()
+            if chave:
+                salvar_cache(chave, conteudo)
+            arquivo_zip.writestr(nome, conteudo)
+            progresso.avancar()
+        if not todos:
+            return
+
+def _renderizar_extrato_periodo(url_banco, data_inicio, data_fim, resumo):
+    # Roda no processo do pool: recebe só os filtros e lê os lançamentos do
+    # banco em lotes (yield_per), sem a lista inteira passar pelo pickle
+    consulta = select(
+        Lancamento.data, Lancamento.tipo, Lancamento.categoria, Lancamento.descricao, Lancamento.valor
+    )
+    if data_inicio:
+        consulta = consulta.where(Lancamento.data >= data_inicio)
+    if data_fim:
+        consulta = consulta.where(Lancamento.data <= data_fim)
+
+    motor = create_engine(url_banco, poolclass=NullPool)
+    try:
+        with motor.connect() as conexao:
+            linhas = conexao.execution_options(yield_per=TAMANHO_LOTE).execute(
+                consulta.order_by(Lancamento.data, Lancamento.id)
+            )
+            return renderizar_extrato({
+                'data_inicio': data_inicio.isoformat() if data_inicio else None,
+                'data_fim': data_fim.isoformat() if data_fim else None,
+                'resumo': resumo,
+                'lancamentos': (
+                    {'data': data.isoformat(), 'tipo': tipo, 'categoria': categoria, 'descricao': descricao, 'valor': valor}
+                    for data, tipo, categoria, descricao, valor in linhas
+                )
+            })
+    finally:
+        motor.dispose()
+
+def _escrever_zip(temporario, ids, incluir_extrato, data_inicio, data_fim, progresso):
+    pool = obter_pool()
+    pendentes = {}
+
+    # PDFs já são comprimidos: ZIP_STORED evita gastar CPU à toa
+    with zipfile.ZipFile(temporario, 'w', zipfile.ZIP_STORED) as arquivo_zip:
+        if incluir_extrato:
+            pendentes[pool.submit(
+                _renderizar_extrato_periodo,
+                db.engine.url.render_as_string(hide_password=False),
+                data_inicio, data_fim, calcular_resumo(data_inicio, data_fim)
+            )] = (None, 'extrato.pdf')
+
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            lote = Orcamento.query.options(selectinload(Orcamento.servicos)).filter(
+                Orcamento.id.in_(ids[inicio:inicio + TAMANHO_LOTE])
+            ).order_by(Orcamento.id).all()
+
+            for orcamento in lote:
+                dados = orcamento.to_dict()
+                chave = chave_cache('orcamento', dados)
+                nome = f'orcamentos/orcamento_{orcamento.id}.pdf'
+
+                em_cache = usar_cache(chave)
+                if em_cache:
+                    arquivo_zip.write(em_cache, nome)
+                    progresso.avancar()
+                    continue
+
+                pendentes[pool.submit(renderizar_orcamento, dados)] = (chave, nome)
+                if len(pendentes) >= JANELA_PROCESSOS:
+                    _drenar(pendentes, arquivo_zip, progresso)
+
+        _drenar(pendentes, arquivo_zip, progresso, todos=True)
+
+@tipo_job('relatorio_lote')
+def gerar_relatorio_lote(job, progresso):
+    parametros = job.obter_parametros()
+    data_inicio = _data(parametros.get('data_inicio'))
+    data_fim = _data(parametros.get('data_fim'))
+    status = parametros.get('status', 'aceito')
+    incluir_extrato = parametros.get('incluir_extrato', True)
+
+    query = db.session.query(Orcamento.id).filter(Orcamento.status == status)
+    if data_inicio:
+        query = query.filter(Orcamento.data_criacao >= data_inicio)
+    if data_fim:
+        query = query.filter(Orcamento.data_criacao < data_fim + timedelta(days=1))
+    ids = [linha[0] for linha in query.order_by(Orcamento.id)]
+
+    progresso.definir_total(len(ids) + (1 if incluir_extrato else 0))
+
+    destino = caminho_resultado(job.id, 'zip')
+    temporario = temporario_resultado(job.id, 'zip')
+    try:
+        _escrever_zip(temporario, ids, incluir_extrato, data_inicio, data_fim, progresso)
+        os.replace(temporario, destino)
+    except Exception:
+        # Uma tentativa que falhou não deixa o .tmp para trás
+        os.remove(temporario)
+        raise
+    return destino
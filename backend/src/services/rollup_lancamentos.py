@@ -0,0 +1,76 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.user import db
+from src.models.lancamento import Lancamento, LancamentoRollupDiario
+
+def aplicar_no_rollup(deltas):
+    # deltas: iterável de (data, categoria, tipo, valor, quantidade).
+    # Deve ser chamado antes do commit para ficar na mesma transação do lançamento.
+    agregados = {}
+    for data, categoria, tipo, valor, quantidade in deltas:
+        chave = (data, categoria, tipo)
+        total_atual, quantidade_atual = agregados.get(chave, (0, 0))
+        agregados[chave] = (total_atual + valor, quantidade_atual + quantidade)
+
+    if not agregados:
+        return
+
+    rollup = LancamentoRollupDiario.__table__
+    stmt = sqlite_insert(rollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[rollup.c.data, rollup.c.categoria, rollup.c.tipo],
+        set_={
+            'total': rollup.c.total + stmt.excluded.total,
+            'quantidade': rollup.c.quantidade + stmt.excluded.quantidade
+        }
+    )
+    db.session.execute(stmt, [
+        {'data': data, 'categoria': categoria, 'tipo': tipo, 'total': total, 'quantidade': quantidade}
+        for (data, categoria, tipo), (total, quantidade) in agregados.items()
+    ])
+
+    # Dias sem lançamentos restantes deixam de existir no rollup
+    if any(quantidade < 0 for _, quantidade in agregados.values()):
+        db.session.execute(rollup.delete().where(rollup.c.quantidade <= 0))
+
+def registrar_lancamento(lancamento, sinal=1):
+    # sinal=1 ao criar, sinal=-1 ao remover
+    aplicar_no_rollup([(
+        lancamento.data,
+        lancamento.categoria,
+        lancamento.tipo,
+        sinal * lancamento.valor,
+        sinal
+    )])
+
+def reconstruir_rollup():
+    # Recalcula o rollup inteiro a partir da tabela de lançamentos (backfill)
+    rollup = LancamentoRollupDiario.__table__
+    agregacao = select(
+        Lancamento.data,
+        Lancamento.categoria,
+        Lancamento.tipo,
+        func.sum(Lancamento.valor),
+        func.count(Lancamento.id)
+    ).group_by(Lancamento.data, Lancamento.categoria, Lancamento.tipo)
+
+    try:
+        db.session.execute(rollup.delete())
+        db.session.execute(
+            insert(rollup).from_select(
+                ['data', 'categoria', 'tipo', 'total', 'quantidade'],
+                agregacao
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return db.session.query(func.count()).select_from(rollup).scalar()
+
+def garantir_rollup():
+    # Bancos criados antes do rollup precisam de backfill na primeira execução
+    rollup_vazio = db.session.query(LancamentoRollupDiario.data).first() is None
+    if rollup_vazio and db.session.query(Lancamento.id).first() is not None:
+        reconstruir_rollup()
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from sqlalchemy import func
+from src.models.user import db
+from src.models.tarefa import Tarefa
+from src.services.versoes import obter_versoes
+
+TIPOS_TAREFA = ['captacao', 'edicao', 'reuniao']
+
+# Cache em memória do calendário por (ano, mes). Cada entrada guarda a versão
+# da tabela tarefas em que foi montada: qualquer commit em tarefas, feito por
+# qualquer worker, a torna obsoleta.
+CALENDARIO_MAX_MESES = 48
+
+_calendario = OrderedDict()
+_calendario_lock = threading.Lock()
+
+def _texto(dados, campo):
+    valor = dados.get(campo)
+    return valor.strip() if isinstance(valor, str) else ''
+
+def validar_tarefa(dados, parcial=False):
+    # Regras de criação de uma tarefa (API e lote). Com parcial=True valida só
+    # os campos enviados (alteração em lote), incluindo concluida.
+    # Devolve os campos prontos para o modelo ou levanta ValueError com a mensagem.
+    campos = {}
+    
+    def enviado(campo):
+        return not parcial or campo in dados
+    
+    if enviado('titulo'):
+        campos['titulo'] = _texto(dados, 'titulo')
+        if not campos['titulo']:
+            raise ValueError('Título é obrigatório')
+    
+    if enviado('tipo'):
+        campos['tipo'] = _texto(dados, 'tipo')
+        if not campos['tipo'] or campos['tipo'] not in TIPOS_TAREFA:
+            raise ValueError('Tipo deve ser "captacao", "edicao" ou "reuniao"')
+    
+    if enviado('data'):
+        data_tarefa = _texto(dados, 'data')
+        if not data_tarefa:
+            raise ValueError('Data é obrigatória')
+        try:
+            campos['data'] = datetime.strptime(data_tarefa, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('Formato de data inválido')
+    
+    if enviado('horario'):
+        horario = _texto(dados, 'horario')
+        campos['horario'] = None
+        if horario:
+            try:
+                campos['horario'] = datetime.strptime(horario, '%H:%M').time()
+            except ValueError:
+                raise ValueError('Formato de horário inválido (use HH:MM)')
+    
+    for campo in ('cliente', 'local', 'descricao'):
+        if enviado(campo):
+            campos[campo] = _texto(dados, campo)
+    
+    if parcial and 'concluida' in dados:
+        if not isinstance(dados['concluida'], bool):
+            raise ValueError('Concluída deve ser true ou false')
+        campos['concluida'] = dados['concluida']
+    
+    if parcial and not campos:
+        raise ValueError('Nenhum campo para alterar')
+    return campos
+
+def datas_do_lote(plano):
+    # Datas (antigas e novas) tocadas por um lote, para invalidar o calendário
+    datas = {campos['data'] for campos in plano['criar']}
+    for _, alteracoes, atual in plano['atualizar']:
+        datas.update([atual.data, alteracoes.get('data')])
+    datas.update(atual.data for _, atual in plano['remover'])
+    return datas
+
+def calcular_estatisticas(data_inicio=None, data_fim=None):
+    # Uma única consulta agrupada por (tipo, concluida)
+    query = db.session.query(Tarefa.tipo, Tarefa.concluida, func.count(Tarefa.id))
+    if data_inicio:
+        query = query.filter(Tarefa.data >= data_inicio)
+    if data_fim:
+        query = query.filter(Tarefa.data <= data_fim)
+    linhas = query.group_by(Tarefa.tipo, Tarefa.concluida).all()
+
+    total_tarefas = 0
+    concluidas = 0
+    por_categoria = {tipo: 0 for tipo in TIPOS_TAREFA}
+    for tipo, concluida, quantidade in linhas:
+        total_tarefas += quantidade
+        if concluida:
+            concluidas += quantidade
+        if tipo in por_categoria:
+            por_categoria[tipo] += quantidade
+
+    taxa_conclusao = (concluidas / total_tarefas * 100) if total_tarefas > 0 else 0
+
+    return {
+        'total_tarefas': total_tarefas,
+        'concluidas': concluidas,
+        'pendentes': total_tarefas - concluidas,
+        'taxa_conclusao': round(taxa_conclusao, 1),
+        'por_categoria': por_categoria
+    }
+
+def _carregar_calendario(ano, mes):
+    data_inicio = date(ano, mes, 1)
+    data_fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+
+    tarefas = Tarefa.query.filter(
+        Tarefa.data >= data_inicio,
+        Tarefa.data < data_fim
+    ).order_by(Tarefa.data, Tarefa.horario, Tarefa.id).all()
+
+    # Agrupar tarefas por dia
+    calendario = {}
+    for tarefa in tarefas:
+        calendario.setdefault(tarefa.data.day, []).append(tarefa.to_dict())
+    return calendario
+
+def obter_calendario(ano, mes):
+    chave = (ano, mes)
+    versao = obter_versoes(['tarefas']).get('tarefas')
+
+    with _calendario_lock:
+        entrada = _calendario.get(chave)
+        if entrada and versao is not None and entrada[0] == versao:
+            _calendario.move_to_end(chave)
+            return entrada[1]
+
+    calendario = _carregar_calendario(ano, mes)
+
+    with _calendario_lock:
+        _calendario[chave] = (versao, calendario)
+        _calendario.move_to_end(chave)
+        while len(_calendario) > CALENDARIO_MAX_MESES:
+            _calendario.popitem(last=False)
+
+    return calendario
+
+def invalidar_calendario(*datas):
+    # Chamar depois do commit, com a(s) data(s) das tarefas alteradas
+    with _calendario_lock:
+        for data in datas:
+            if data is not None:
+                _calendario.pop((data.year, data.month), None)
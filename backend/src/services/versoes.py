@@ -0,0 +1,58 @@
+from sqlalchemy import event, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.versao import VersaoTabela
+
+# Tabelas com contador de versão. O contador é incrementado uma vez por
+# commit que toque a tabela, na mesma transação, e serve para validar
+# caches (ETag, calendário) sem consultar os dados em si.
+TABELAS_VERSIONADAS = ('lancamentos', 'orcamentos', 'servicos_orcamento', 'contratos', 'tarefas')
+
+CHAVE_SESSAO = 'tabelas_alteradas'
+
+def _registrar(session, tabela):
+    if tabela in TABELAS_VERSIONADAS:
+        session.info.setdefault(CHAVE_SESSAO, set()).add(tabela)
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_flush(session, contexto):
+    # Objetos inseridos, alterados ou removidos via ORM
+    for objeto in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabela = getattr(objeto, '__tablename__', None)
+        if tabela:
+            _registrar(session, tabela)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _registrar_dml(estado):
+    # INSERT/UPDATE/DELETE em massa executados por session.execute()
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabela = getattr(estado.statement, 'table', None)
+        if tabela is not None:
+            _registrar(estado.session, tabela.name)
+
+@event.listens_for(Session, 'before_commit')
+def _incrementar_versoes(session):
+    session.flush()
+    tabelas = session.info.pop(CHAVE_SESSAO, None)
+    if tabelas:
+        session.execute(
+            update(VersaoTabela)
+            .where(VersaoTabela.tabela.in_(sorted(tabelas)))
+            .values(versao=VersaoTabela.versao + 1)
+        )
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar(session):
+    session.info.pop(CHAVE_SESSAO, None)
+
+def garantir_versoes():
+    stmt = sqlite_insert(VersaoTabela).on_conflict_do_nothing(index_elements=['tabela'])
+    db.session.execute(stmt, [{'tabela': tabela, 'versao': 0} for tabela in TABELAS_VERSIONADAS])
+    db.session.commit()
+
+def obter_versoes(tabelas):
+    linhas = db.session.query(VersaoTabela.tabela, VersaoTabela.versao).filter(
+        VersaoTabela.tabela.in_(tabelas)
+    ).all()
+    return dict(linhas)
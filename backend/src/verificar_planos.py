@@ -0,0 +1,139 @@
+import os
+import re
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event
+
+from src.config import DevelopmentConfig
+from src.main import create_app, inicializar_banco
+from src.models.user import db
+
+# Executa as rotas da API contra um banco temporário, captura cada SELECT
+# emitido e roda EXPLAIN QUERY PLAN. Falha (exit 1) se algum plano fizer
+# varredura completa de tabela ("SCAN tabela" sem índice) ou se a rota não
+# consultar a própria tabela (consulta principal que não chegou a rodar).
+#
+# Uso: python src/verificar_planos.py
+
+# (rota, tabela principal que a rota tem de consultar, tabelas que podem ser
+#  varridas por completo nesta rota, motivo)
+CASOS = [
+    ('/api/lancamentos', 'lancamentos', set(), None),
+    ('/api/lancamentos?data_inicio=2025-01-01&data_fim=2025-01-31', 'lancamentos', set(), None),
+    ('/api/lancamentos?limite=5', 'lancamentos', set(), None),
+    ('/api/lancamentos/resumo?data_inicio=2025-01-01&data_fim=2025-12-31&group_by=mes', 'lancamentos_rollup_diario', set(), None),
+    ('/api/lancamentos/resumo', 'lancamentos_rollup_diario', {'lancamentos_rollup_diario'}, 'sem filtro, soma o rollup inteiro'),
+    ('/api/orcamentos', 'orcamentos', set(), None),
+    ('/api/orcamentos?status=aceito', 'orcamentos', set(), None),
+    ('/api/orcamentos?texto=casamento', 'orcamentos', set(), None),
+    ('/api/orcamentos?limite=5', 'orcamentos', set(), None),
+    ('/api/orcamentos?ordenar_por=valor_total', 'orcamentos', {'orcamentos'}, 'ordenação por coluna calculada'),
+    ('/api/orcamentos/1', 'orcamentos', set(), None),
+    ('/api/orcamentos/clientes', 'orcamentos', set(), None),
+    ('/api/contratos', 'contratos', set(), None),
+    ('/api/contratos?cliente=ana', 'contratos', set(), None),
+    ('/api/contratos/clientes', 'contratos', set(), None),
+    ('/api/tarefas', 'tarefas', set(), None),
+    ('/api/tarefas?tipo=edicao', 'tarefas', set(), None),
+    ('/api/tarefas?concluida=true', 'tarefas', set(), None),
+    ('/api/tarefas?data_inicio=2025-01-01&data_fim=2025-01-31', 'tarefas', set(), None),
+    ('/api/tarefas/calendario/2025/1', 'tarefas', set(), None),
+    ('/api/tarefas/estatisticas?data_inicio=2025-01-01&data_fim=2025-12-31', 'tarefas', set(), None),
+    ('/api/busca?q=casamento', 'orcamentos_fts', set(), None),
+    ('/api/jobs/1', 'jobs', set(), None),
+    ('/api/dashboard?data_inicio=2025-01-01&data_fim=2025-12-31', 'orcamentos', set(), None),
+    ('/api/lancamentos/export?data_inicio=2025-01-01', 'lancamentos', set(), None),
+    ('/api/orcamentos/export?status=pendente', 'orcamentos', set(), None),
+    ('/api/tarefas/export?formato=xlsx&tipo=edicao', 'tarefas', set(), None)
+]
+
+SCAN_COMPLETO = re.compile(r'^SCAN (\w+)$')
+
+def consulta_tabela(instrucao, tabela):
+    return re.search(rf'\b(?:FROM|JOIN)\s+"?{tabela}\b', instrucao, re.IGNORECASE) is not None
+
+def popular(cliente):
+    for i in range(20):
+        cliente.post('/api/lancamentos', json={
+            'tipo': 'entrada' if i % 2 else 'saida', 'valor': 10 + i,
+            'data': f'2025-01-{i + 1:02d}', 'categoria': f'cat{i % 3}'
+        })
+        cliente.post('/api/orcamentos', json={
+            'titulo': f'Casamento {i}', 'cliente': f'Cliente {i}',
+            'servicos': [{'nome': 'Fotografia', 'quantidade': 1, 'preco_unitario': 100 + i}]
+        })
+        cliente.post('/api/tarefas', json={
+            'titulo': f'Tarefa {i}', 'tipo': 'edicao', 'data': f'2025-01-{i + 1:02d}', 'horario': '10:00'
+        })
+
+def main():
+    descritor, caminho = tempfile.mkstemp(suffix='.db')
+    os.close(descritor)
+
+    class ConfigVerificacao(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+
+    app = create_app(ConfigVerificacao)
+    inicializar_banco(app)
+    cliente = app.test_client()
+    popular(cliente)
+
+    capturadas = []
+    with app.app_context():
+        engine = db.engine
+
+    def capturar(conexao, cursor, instrucao, parametros, contexto, executemany):
+        if instrucao.lstrip().upper().startswith(('SELECT', 'WITH')):
+            capturadas.append((instrucao, parametros))
+
+    event.listen(engine, 'before_cursor_execute', capturar)
+
+    falhas = []
+    try:
+        for rota, tabela, permitidas, motivo in CASOS:
+            capturadas.clear()
+            resposta = cliente.get(rota)
+            # Respostas em fluxo (exportações, NDJSON) só consultam o banco
+            # enquanto o corpo é lido
+            resposta.get_data()
+            resposta.close()
+            if resposta.status_code >= 500:
+                falhas.append(f'{rota}: HTTP {resposta.status_code}')
+                continue
+
+            consultas = list(capturadas)
+            if not any(consulta_tabela(instrucao, tabela) for instrucao, _ in consultas):
+                falhas.append(f'{rota}: nenhuma consulta em {tabela}')
+            with engine.connect() as conexao:
+                for instrucao, parametros in consultas:
+                    plano = conexao.exec_driver_sql('EXPLAIN QUERY PLAN ' + instrucao, parametros).fetchall()
+                    for linha in plano:
+                        detalhe = linha[-1]
+                        encontrado = SCAN_COMPLETO.match(detalhe)
+                        if encontrado and encontrado.group(1) not in permitidas:
+                            falhas.append(f'{rota}: {detalhe}\n    {" ".join(instrucao.split())}')
+
+            status = 'OK' if not any(f.startswith(rota + ':') for f in falhas) else 'FALHOU'
+            observacao = f' (varredura permitida: {motivo})' if motivo else ''
+            print(f'{status:7} {rota} [{len(consultas)} consultas]{observacao}')
+    finally:
+        event.remove(engine, 'before_cursor_execute', capturar)
+        with app.app_context():
+            db.engine.dispose()
+        for sufixo in ('', '-wal', '-shm'):
+            if os.path.exists(caminho + sufixo):
+                os.remove(caminho + sufixo)
+
+    if falhas:
+        print('\n❌ Planos com varredura completa de tabela ou consultas ausentes:')
+        for falha in falhas:
+            print('  ' + falha)
+        return 1
+
+    print('\n✅ Nenhuma rota faz varredura completa de tabela.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import create_app
+
+# Ponto de entrada WSGI para o servidor de produção (gunicorn src.wsgi:app)
+app = create_app()